@@ -5,24 +5,43 @@ Com persistência de dados no Supabase (PostgreSQL na nuvem)
 """
 
 import streamlit as st
+from dataclasses import replace
+from functools import partial
+import numpy as np
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta, date, time as dt_time
 from utils.supabase_client import (
-    get_all_items, add_item, update_item, delete_item, update_all_items,
+    add_item, update_item, delete_item, update_all_items,
+    add_parcelas, update_parcela, delete_parcela,
     get_all_tasks, add_task, update_task, delete_task,
-    get_config, update_config, update_all_config,
+    get_config, update_config, update_all_config, get_resumo_totais, get_dashboard_summary,
     get_all_categorias, add_categoria, update_categoria, delete_categoria,
-    get_all_orcamentos, add_orcamento, update_orcamento, delete_orcamento,
+    add_orcamento, update_orcamento, delete_orcamento,
+    get_fornecedor_aliases, add_fornecedor_aliases, delete_fornecedor_aliases,
     get_all_agendamentos, get_agendamentos_by_data, get_proximos_agendamentos,
     add_agendamento, update_agendamento, delete_agendamento
 )
 from utils.calculations import (
-    calcular_total_orcado, calcular_reserva, calcular_porcentagem_usada,
-    calcular_investimento_mensal, formatar_moeda, calcular_porcentagem_tarefas
+    calcular_reserva, calcular_porcentagem_usada,
+    calcular_investimento_mensal, calcular_curva_acumulada, formatar_moeda, formatar_moeda_vetorizado,
+    calcular_grade_cenarios, simular_monte_carlo, dividir_em_parcelas, calcular_fluxo_caixa,
+    otimizar_orcamentos,
+    calcular_total_orcado_resumo, calcular_total_status_resumo, contar_itens_status_resumo,
+    calcular_totais_categoria_resumo, calcular_porcentagem_tarefas_resumo
 )
 from utils.calendar_utils import gerar_ics_agendamento, gerar_ics_multiplos_agendamentos
+from utils.feed import iniciar_feed, url_feed
+from utils.feriados import nome_feriado
+from utils.agenda import (
+    eventos_calendario, filtrar_agendamentos, janela_mes, meses_com_agendamentos,
+    verificar_conflitos, relatorio_conflitos, horarios_livres, INTERVALO_DESLOCAMENTO
+)
+from utils.models import Agendamento, FiltroAgendamentos, DURACAO_PADRAO, normalizar_rrule
+from utils.busca import buscar
+from utils.fornecedores import registro_fornecedores, totais_por_fornecedor, gastos_por_fornecedor
+from utils.frames import frame_items, frame_tasks, frame_orcamentos, frame_parcelas
 
 # Configuração da página (mobile-first)
 st.set_page_config(
@@ -35,21 +54,29 @@ st.set_page_config(
 
 # ==================== CONSTANTES DO CALENDÁRIO ====================
 
-# Feriados nacionais brasileiros 2026
-FERIADOS_2026 = {
-    "2026-01-01": "Ano Novo",
-    "2026-02-16": "Carnaval",
-    "2026-02-17": "Carnaval",
-    "2026-04-03": "Sexta-feira Santa",
-    "2026-04-21": "Tiradentes",
-    "2026-05-01": "Dia do Trabalho",
-    "2026-06-04": "Corpus Christi",
-    "2026-09-07": "Independência do Brasil",
-    "2026-10-12": "Nossa Senhora Aparecida",
-    "2026-11-02": "Finados",
-    "2026-11-15": "Proclamação da República",
-    "2026-11-20": "Dia da Consciência Negra",
-    "2026-12-25": "Natal"
+# Anos à frente disponíveis nos seletores de data (feriados vêm de utils.feriados)
+ANOS_PLANEJAMENTO = 5
+
+# Opções de tamanho de página da lista de agendamentos
+AGENDAMENTOS_POR_PAGINA = [10, 20, 50, 100]
+
+# Busca de horários livres: dias à frente, sugestões exibidas e durações (min)
+DIAS_BUSCA_HORARIOS = 30
+SUGESTOES_HORARIOS = 6
+DURACOES_VISITA = [30, 60, 90, 120]
+
+# Opções de repetição do formulário (RRULE sem COUNT; vazio = visita única)
+REPETICOES = {
+    "Não se repete": "",
+    "🔁 Toda semana": "FREQ=WEEKLY",
+    "🔁 A cada 2 semanas": "FREQ=WEEKLY;INTERVAL=2",
+    "🔁 Todo mês": "FREQ=MONTHLY",
+}
+FREQUENCIAS_RRULE = {
+    "DAILY": ("Diária", "dias"),
+    "WEEKLY": ("Semanal", "semanas"),
+    "MONTHLY": ("Mensal", "meses"),
+    "YEARLY": ("Anual", "anos"),
 }
 
 # Categorias de agendamento
@@ -90,37 +117,8 @@ STATUS_CORES = {
     "⏰ Reagendar": "#2196F3"    # Azul
 }
 
-
-# ==================== HELPER FUNCTIONS PARA CALENDÁRIO ====================
-
-def parse_agend_date(date_value):
-    """
-    Converte valor de data do banco para objeto date
-    
-    Args:
-        date_value: String 'YYYY-MM-DD' ou objeto date
-        
-    Returns:
-        Objeto datetime.date
-    """
-    if isinstance(date_value, str):
-        return datetime.strptime(date_value, '%Y-%m-%d').date()
-    return date_value
-
-
-def parse_agend_time(time_value):
-    """
-    Converte valor de hora do banco para objeto time
-    
-    Args:
-        time_value: String 'HH:MM:SS' ou objeto time
-        
-    Returns:
-        Objeto datetime.time
-    """
-    if isinstance(time_value, str):
-        return datetime.strptime(time_value, '%H:%M:%S').time()
-    return time_value
+# Dias da semana abreviados (índice = date.weekday(), segunda = 0)
+DIAS_SEMANA = ["Seg", "Ter", "Qua", "Qui", "Sex", "Sáb", "Dom"]
 
 
 def load_mobile_css():
@@ -305,33 +303,396 @@ st.title("💍 Gerenciador de Casamento")
 st.markdown("### Organize seu grande dia com amor e planejamento! 💕")
 st.markdown("---")
 
-# Carregar dados do Supabase
+# Carregar configurações do Supabase (items e tasks são carregados
+# apenas nas seções que precisam das listas completas)
 with st.spinner("⏳ Carregando dados do Supabase..."):
-    items = get_all_items()
     config = get_config()
-    tasks = get_all_tasks()
+
+def _abrir_secao(secao):
+    """Abre no menu a seção de um resultado da busca"""
+    st.session_state.menu = secao
+
 
 # Sidebar para navegação
 st.sidebar.title("📋 Menu de Navegação")
 menu_option = st.sidebar.radio(
     "Escolha uma seção:",
     ["🏠 Dashboard", "📋 Itens do Casamento", "💰 Planejamento Financeiro", 
-     "✅ Checklist", "📊 Relatórios", "💸 Orçamentos", "📅 Calendário"]
+     "✅ Checklist", "📊 Relatórios", "💸 Orçamentos", "📅 Calendário"],
+    key="menu"
 )
 
+# Busca global (itens, orçamentos, tarefas e agendamentos)
+st.sidebar.markdown("---")
+consulta_busca = st.sidebar.text_input(
+    "🔎 Buscar",
+    key="busca_global",
+    placeholder="Ex: buffet, chácara, 98765..."
+)
+if consulta_busca.strip():
+    try:
+        resultados_busca = buscar(consulta_busca)
+        if resultados_busca:
+            for resultado in resultados_busca:
+                st.sidebar.markdown(f"**{resultado.titulo}**")
+                if resultado.detalhe:
+                    st.sidebar.caption(resultado.detalhe)
+                st.sidebar.button(
+                    f"Abrir {resultado.secao}",
+                    key=f"busca_{resultado.tabela}_{resultado.id}",
+                    on_click=_abrir_secao, args=(resultado.secao,),
+                    use_container_width=True
+                )
+        else:
+            st.sidebar.info("Nenhum resultado encontrado")
+    except Exception as e:
+        st.sidebar.error(f"❌ Erro na busca: {str(e)}")
+
 st.sidebar.markdown("---")
 st.sidebar.markdown("### 💝 Dicas")
 st.sidebar.info("💡 Mantenha seu orçamento atualizado regularmente!")
 
 
 # ==================== HELPER FUNCTIONS ====================
+@st.cache_data(ttl=300, max_entries=20)
+def grade_cenarios(taxa_max, meses_max, orcamento_maximo, passos_valor=21):
+    """
+    Grade de cenários (taxa × meses × valor inicial) em cache pelos parâmetros
+    
+    Args:
+        taxa_max: Maior taxa mensal da grade (decimal)
+        meses_max: Maior prazo da grade (meses)
+        orcamento_maximo: Valor final desejado
+        passos_valor: Quantidade de valores iniciais (de 0 ao orçamento)
+        
+    Returns:
+        Tupla (taxas, meses, valores_iniciais, grade)
+    """
+    taxas = np.linspace(0.0, taxa_max, 41)
+    meses = np.arange(1, meses_max + 1)
+    valores_iniciais = np.linspace(0.0, orcamento_maximo, passos_valor)
+    grade = calcular_grade_cenarios(taxas, meses, valores_iniciais, orcamento_maximo)
+    return taxas, meses, valores_iniciais, grade
+
+
+@st.cache_data(ttl=300, max_entries=20)
+def simulacao_monte_carlo(valor_inicial, aporte_mensal, taxa_media, volatilidade,
+                          numero_meses, valor_meta, numero_simulacoes):
+    """Simulação de Monte Carlo em cache pelos parâmetros (semente fixa)"""
+    return simular_monte_carlo(
+        valor_inicial, aporte_mensal, taxa_media, volatilidade,
+        numero_meses, valor_meta, numero_simulacoes=numero_simulacoes
+    )
+
+
+def descrever_conflito(conflito, agendamento_id=None):
+    """
+    Texto de um conflito de horário para exibição
+    
+    Args:
+        conflito: Conflito (utils.agenda)
+        agendamento_id: Visita em edição; se informado, descreve só a outra
+        
+    Returns:
+        Texto em markdown
+    """
+    icone = "🔴" if conflito.tipo == "sobreposição" else "🟠"
+    minutos = int(abs(conflito.folga).total_seconds() // 60)
+    detalhe = (f"sobreposição de {minutos} min" if conflito.tipo == "sobreposição"
+               else f"apenas {minutos} min para deslocamento")
+    visitas = [conflito.primeiro, conflito.segundo]
+    if agendamento_id is not None:
+        visitas = [v for v in visitas if v.id != agendamento_id] or visitas[:1]
+    nomes = " × ".join(
+        f"**{v.categoria} - {v.local}** ({v.data.strftime('%d/%m/%Y')} {v.hora.strftime('%H:%M')})"
+        for v in visitas
+    )
+    return f"{icone} {nomes}: {detalhe}"
+
+
+def chave_agendamento(agend):
+    """Chave única de widgets por linha (ocorrências de uma série têm o mesmo id)"""
+    return f"{agend.id}_{agend.data.strftime('%Y%m%d')}" if agend.rrule else agend.id
+
+
+def descrever_recorrencia(rrule):
+    """
+    Descrição legível de uma RRULE canônica
+    
+    Args:
+        rrule: Regra (ex: "FREQ=WEEKLY;COUNT=8;INTERVAL=2")
+        
+    Returns:
+        Texto (ex: "A cada 2 semanas, 8 vezes")
+    """
+    partes = dict(parte.partition("=")[::2] for parte in rrule.split(";"))
+    nome, unidade = FREQUENCIAS_RRULE.get(partes.get("FREQ"), ("Repetição", "vezes"))
+    intervalo = int(partes.get("INTERVAL", 1))
+    texto = f"A cada {intervalo} {unidade}" if intervalo > 1 else nome
+    if "COUNT" in partes:
+        texto += f", {partes['COUNT']} vezes"
+    elif "UNTIL" in partes:
+        ate = partes["UNTIL"]
+        texto += f", até {ate[6:8]}/{ate[4:6]}/{ate[:4]}"
+    return texto
+
+
+def _mudar_pagina_agendamentos(passo):
+    """Avança/volta a página da lista de agendamentos"""
+    st.session_state.agend_pagina = st.session_state.get('agend_pagina', 1) + passo
+
+
+def _alternar_acoes_agendamento(agend_id):
+    """Abre as ações de um agendamento da lista (fechando as de outro)"""
+    aberto = st.session_state.get('agend_acoes') == agend_id
+    st.session_state.agend_acoes = None if aberto else agend_id
+
+
+def _usar_horario_sugerido(momento):
+    """Preenche data e hora do formulário de novo agendamento com a sugestão"""
+    st.session_state.novo_agend_data = momento.date()
+    st.session_state.novo_agend_hora = momento.time().replace(tzinfo=None)
+
+
+def _abrir_edicao_agendamento(serie_id, origem):
+    """Abre o formulário de edição de uma série na linha de origem (fechando o de outra)"""
+    st.session_state[f'editing_agend_{serie_id}'] = origem
+
+
+def rotulo_deletar_agendamento(agend):
+    """Rótulo do botão de exclusão (em agendamentos recorrentes, apaga a série inteira)"""
+    return "🗑️ Deletar série" if agend.rrule else "🗑️ Deletar"
+
+
+def pular_data_agendamento(agend):
+    """
+    Remove a data de uma ocorrência da sua série (EXDATE)
+    
+    Args:
+        agend: Ocorrência (ou a própria série) de um agendamento recorrente
+        
+    Returns:
+        True se a série foi atualizada
+    """
+    serie = agend.serie or agend
+    exdates = sorted(set(serie.exdates) | {agend.data})
+    return update_agendamento(serie.id, {"exdates": [dia.isoformat() for dia in exdates]})
+
+
+def formulario_edicao_agendamento(serie, origem):
+    """
+    Formulário de edição de um agendamento (a série inteira, se recorrente)
+    
+    O estado editing_agend_{id} guarda a linha onde o formulário foi aberto
+    (origem), para que ele apareça só ali, em qualquer uma das telas.
+    
+    Args:
+        serie: Agendamento (série de origem, não uma ocorrência expandida)
+        origem: Identificador da linha/tela que abriu o formulário
+    """
+    with st.form(f"form_edit_{origem}"):
+        st.markdown("#### ✏️ Editar Agendamento")
+        
+        edit_col1, edit_col2, edit_col3 = st.columns(3)
+        
+        with edit_col1:
+            edit_data = st.date_input("Início da série" if serie.rrule else "Data",
+                                      value=serie.data, format="DD/MM/YYYY")
+        with edit_col2:
+            edit_hora = st.time_input("Hora", value=serie.hora)
+        with edit_col3:
+            edit_categoria = st.selectbox("Categoria", CATEGORIAS_AGENDAMENTO, 
+                                          index=CATEGORIAS_AGENDAMENTO.index(serie.categoria) if serie.categoria in CATEGORIAS_AGENDAMENTO else 0)
+        
+        edit_local = st.text_input("Local", value=serie.local)
+        edit_contato = st.text_input("Contato", value=serie.contato)
+        edit_telefone = st.text_input("Telefone", value=serie.telefone)
+        edit_status = st.selectbox("Status", STATUS_AGENDAMENTO,
+                                    index=STATUS_AGENDAMENTO.index(serie.status) if serie.status in STATUS_AGENDAMENTO else 0)
+        edit_endereco = st.text_input("Endereço", value=serie.endereco)
+        edit_link = st.text_input("Link", value=serie.link)
+        edit_observacao = st.text_area("Observações", value=serie.observacao)
+        edit_rrule = st.text_input(
+            "🔁 Repetição (RRULE)", value=serie.rrule,
+            help="Ex: FREQ=WEEKLY;COUNT=8 (vazio para visita única; UNTIL em UTC, com Z)"
+        )
+        edit_ignorar = st.checkbox("⚠️ Salvar mesmo com conflito de horário")
+        
+        col_save, col_cancel = st.columns(2)
+        with col_save:
+            if st.form_submit_button("✅ Salvar", use_container_width=True, type="primary"):
+                cor = STATUS_CORES.get(edit_status, "#FF69B4")
+                try:
+                    edit_regra = normalizar_rrule(edit_rrule)
+                    conflitos = verificar_conflitos(replace(
+                        serie, data=edit_data, hora=edit_hora, categoria=edit_categoria,
+                        local=edit_local, endereco=edit_endereco, status=edit_status,
+                        rrule=edit_regra
+                    ))
+                except ValueError as e:
+                    st.error(f"❌ Repetição inválida: {e}")
+                else:
+                    if conflitos and not edit_ignorar:
+                        st.warning("⚠️ **Conflito de horário:**\n\n" +
+                                   "\n".join(f"- {descrever_conflito(c, serie.id)}" for c in conflitos))
+                    else:
+                        update_data = {
+                            "data": str(edit_data),
+                            "hora": str(edit_hora),
+                            "categoria": edit_categoria,
+                            "local": edit_local,
+                            "endereco": edit_endereco,
+                            "telefone": edit_telefone,
+                            "contato": edit_contato,
+                            "observacao": edit_observacao,
+                            "status": edit_status,
+                            "link": edit_link,
+                            "cor": cor,
+                            "rrule": edit_regra or None
+                        }
+                        
+                        if update_agendamento(serie.id, update_data):
+                            st.session_state.pop(f'editing_agend_{serie.id}', None)
+                            st.success("✅ Agendamento atualizado!")
+                            st.rerun()
+        
+        with col_cancel:
+            if st.form_submit_button("❌ Cancelar", use_container_width=True):
+                st.session_state.pop(f'editing_agend_{serie.id}', None)
+                st.rerun()
+
+
+@st.fragment
+def lista_agendamentos(agendamentos_filtrados, filtro):
+    """
+    Lista paginada dos agendamentos filtrados
+    
+    Só a página atual é renderizada, e os botões de ação (Maps, Editar,
+    Deletar, Calendário) apenas do agendamento aberto. Trocar de página ou
+    abrir ações reexecuta só este fragmento, não a página inteira.
+    
+    Args:
+        agendamentos_filtrados: Agendamentos já filtrados (ordem de exibição)
+        filtro: Filtro aplicado (FiltroAgendamentos; volta à página 1 se mudar)
+    """
+    if st.session_state.get('agend_filtros') != filtro:
+        st.session_state.agend_filtros = filtro
+        st.session_state.agend_pagina = 1
+    
+    total = len(agendamentos_filtrados)
+    col_total, col_tamanho = st.columns([3, 1])
+    with col_tamanho:
+        por_pagina = st.selectbox("Por página:", AGENDAMENTOS_POR_PAGINA, index=1, key="agend_por_pagina")
+    
+    total_paginas = max(1, -(-total // por_pagina))
+    pagina = min(max(st.session_state.get('agend_pagina', 1), 1), total_paginas)
+    st.session_state.agend_pagina = pagina
+    inicio = (pagina - 1) * por_pagina
+    fim = min(inicio + por_pagina, total)
+    
+    with col_total:
+        st.write(f"**{total} agendamento(s) encontrado(s)** · exibindo {inicio + 1}–{fim}")
+    
+    for agend in agendamentos_filtrados[inicio:fim]:
+        data_agend = agend.data
+        chave = chave_agendamento(agend)
+        serie = agend.serie or agend  # Edição e exclusão valem para a série inteira
+        
+        # Card para cada agendamento
+        with st.container():
+            col1, col2 = st.columns([4, 1])
+            
+            with col1:
+                detalhes = [f"**{agend.categoria} - {agend.local}**", f"📊 Status: {agend.status}"]
+                if agend.rrule:
+                    detalhes.append(f"🔁 {descrever_recorrencia(agend.rrule)}")
+                if agend.endereco:
+                    detalhes.append(f"📍 {agend.endereco}")
+                if agend.contato:
+                    detalhes.append(f"👤 {agend.contato}")
+                if agend.telefone:
+                    detalhes.append(f"📞 {agend.telefone}")
+                if agend.observacao:
+                    detalhes.append(f"📝 {agend.observacao}")
+                st.markdown(f"### {data_agend.strftime('%d/%m/%Y')} - {agend.hora.strftime('%H:%M')}")
+                st.markdown("  \n".join(detalhes))
+            
+            with col2:
+                acoes_abertas = st.session_state.get('agend_acoes') == chave
+                st.button(
+                    "✖️ Fechar" if acoes_abertas else "⚙️ Ações",
+                    key=f"acoes_all_{chave}",
+                    on_click=_alternar_acoes_agendamento,
+                    args=(chave,),
+                    use_container_width=True
+                )
+                
+                # Ações criadas só para o agendamento aberto
+                if acoes_abertas:
+                    if agend.link:
+                        st.link_button("🗺️ Maps", agend.link, use_container_width=True)
+                    
+                    st.button("✏️ Editar", key=f"edit_all_{chave}", on_click=_abrir_edicao_agendamento,
+                              args=(serie.id, f"all_{chave}"), use_container_width=True)
+                    
+                    if agend.rrule and st.button("⏭️ Pular esta data", key=f"pular_all_{chave}",
+                                                 use_container_width=True):
+                        if pular_data_agendamento(agend):
+                            st.session_state.agend_acoes = None
+                            st.success("✅ Data removida da série!")
+                            st.rerun()
+                    
+                    if st.button(rotulo_deletar_agendamento(agend), key=f"del_all_{chave}", use_container_width=True):
+                        if delete_agendamento(agend.id):
+                            st.session_state.agend_acoes = None
+                            st.success("✅ Agendamento deletado!")
+                            st.rerun()
+                    
+                    # Botão para exportar para calendário
+                    try:
+                        nome_arquivo = f"visita_{agend.local.replace(' ', '_')}_{agend.data}.ics"
+                        st.download_button(
+                            label="📅 Calendário",
+                            data=partial(gerar_ics_agendamento, agend),  # Gerado só no clique
+                            file_name=nome_arquivo,
+                            mime="text/calendar",
+                            use_container_width=True,
+                            key=f"ics_all_{chave}",
+                            help="Baixar e adicionar ao Google Calendar, Apple Calendar, Outlook, etc."
+                        )
+                    except Exception as e:
+                        st.error(f"Erro ao gerar .ics: {str(e)}")
+            
+            # Formulário de edição (se aberto nesta linha)
+            if st.session_state.get(f'editing_agend_{serie.id}') == f"all_{chave}":
+                formulario_edicao_agendamento(serie, f"all_{chave}")
+            
+            st.divider()
+    
+    # Navegação entre páginas
+    if total_paginas > 1:
+        col_ant, col_info, col_prox = st.columns([1, 2, 1])
+        with col_ant:
+            st.button("◀ Anterior", key="agend_pagina_anterior", disabled=pagina <= 1,
+                      on_click=_mudar_pagina_agendamentos, args=(-1,), use_container_width=True)
+        with col_info:
+            st.markdown(f"<div style='text-align: center;'>Página {pagina} de {total_paginas}</div>",
+                        unsafe_allow_html=True)
+        with col_prox:
+            st.button("Próxima ▶", key="agend_pagina_proxima", disabled=pagina >= total_paginas,
+                      on_click=_mudar_pagina_agendamentos, args=(1,), use_container_width=True)
+
+
 # ==================== SEÇÃO: DASHBOARD ====================
 if menu_option == "🏠 Dashboard":
     st.header("🏠 Dashboard - Visão Geral")
     
+    # Tudo o que o Dashboard exibe vem em uma única chamada
+    resumo = get_dashboard_summary()
+    
     # Calcular métricas principais
-    total_orcado = calcular_total_orcado(items)
-    orcamento_maximo = config.get('orcamento_maximo', 30000.0)
+    total_orcado = resumo['total_orcado']
+    orcamento_maximo = resumo['orcamento_maximo']
     reserva = calcular_reserva(orcamento_maximo, total_orcado)
     porcentagem_usada = calcular_porcentagem_usada(orcamento_maximo, total_orcado)
     
@@ -362,11 +723,11 @@ if menu_option == "🏠 Dashboard":
         )
     
     with col4:
-        porcentagem_tarefas = calcular_porcentagem_tarefas(tasks)
+        porcentagem_tarefas = calcular_porcentagem_tarefas_resumo(resumo)
         st.metric(
             "✅ Tarefas Concluídas",
             f"{porcentagem_tarefas:.0f}%",
-            delta=f"{sum(1 for t in tasks if t.get('concluida', False))}/{len(tasks)}"
+            delta=f"{resumo['tasks']['concluidas']}/{resumo['tasks']['total']}"
         )
     
     # Barra de progresso do orçamento com porcentagem visível
@@ -389,11 +750,9 @@ if menu_option == "🏠 Dashboard":
     
     with col1:
         st.markdown("### 🥧 Distribuição dos Gastos")
-        # Filtrar apenas itens com preço > 0
-        items_com_preco = [item for item in items if item['preco'] > 0]
-        
-        if items_com_preco:
-            df_gastos = pd.DataFrame(items_com_preco)
+        # Apenas itens com preço > 0 (já filtrados no banco)
+        if resumo['gastos']:
+            df_gastos = pd.DataFrame(resumo['gastos'])
             fig = px.pie(
                 df_gastos,
                 values='preco',
@@ -407,14 +766,9 @@ if menu_option == "🏠 Dashboard":
     
     with col2:
         st.markdown("### 📊 Status dos Itens")
-        # Contar itens por status
-        status_count = {}
-        for item in items:
-            status = item.get('status', 'Pendente')
-            status_count[status] = status_count.get(status, 0) + 1
-        
+        # Quantidade de itens por status (já agregada)
         df_status = pd.DataFrame(
-            list(status_count.items()),
+            [(s['status'], s['quantidade']) for s in resumo['status']],
             columns=['Status', 'Quantidade']
         )
         
@@ -430,7 +784,7 @@ if menu_option == "🏠 Dashboard":
     
     # Próximas tarefas pendentes
     st.markdown("### 📝 Próximas Tarefas Pendentes")
-    tarefas_pendentes = [t for t in tasks if not t.get('concluida', False)][:5]
+    tarefas_pendentes = resumo['tarefas_pendentes']
     
     if tarefas_pendentes:
         for tarefa in tarefas_pendentes:
@@ -451,25 +805,17 @@ elif menu_option == "📋 Itens do Casamento":
             ["Todos", "Contratado", "Pendente"]
         )
     
-    # Aplicar filtro
-    if filtro_status == "Todos":
-        items_filtrados = items
-    else:
-        items_filtrados = [item for item in items if item.get('status') == filtro_status]
-    
-    # Converter para DataFrame
-    df_items = pd.DataFrame(items_filtrados)
+    # Aplicar filtro sobre o DataFrame compartilhado (cache colunar)
+    df_items = frame_items()
+    if filtro_status != "Todos":
+        df_items = df_items[df_items['status'] == filtro_status]
     
     # Renomear colunas para exibição
     if not df_items.empty:
-        df_items_display = df_items.copy()
-        
-        # Remover coluna created_at se existir (vem do Supabase)
-        if 'created_at' in df_items_display.columns:
-            df_items_display = df_items_display.drop('created_at', axis=1)
-        
-        # Agora renomear as 6 colunas restantes
-        df_items_display.columns = ['ID', 'Item', 'Serviço', 'Preço', 'Status', 'Comentários']
+        df_items_display = df_items[['id', 'item', 'servico', 'preco', 'status', 'comentarios']].rename(columns={
+            'id': 'ID', 'item': 'Item', 'servico': 'Serviço',
+            'preco': 'Preço', 'status': 'Status', 'comentarios': 'Comentários'
+        })
         
         # Editor de dados
         st.markdown("### 📝 Tabela de Itens")
@@ -538,7 +884,7 @@ elif menu_option == "📋 Itens do Casamento":
                     st.error("❌ Erro ao adicionar item. Tente novamente.")
     
     # Mostrar total
-    total_atual = calcular_total_orcado(items_filtrados)
+    total_atual = float(df_items['preco'].sum())
     st.markdown(f"### 💰 Total ({filtro_status}): {formatar_moeda(total_atual)}")
 
 
@@ -603,7 +949,7 @@ elif menu_option == "💰 Planejamento Financeiro":
     st.markdown("### 📊 Análise Financeira")
     
     # Cálculos automáticos
-    total_orcado = calcular_total_orcado(items)
+    total_orcado = calcular_total_orcado_resumo(get_resumo_totais())
     reserva = calcular_reserva(orcamento_maximo, total_orcado)
     porcentagem_usada = calcular_porcentagem_usada(orcamento_maximo, total_orcado)
     
@@ -658,26 +1004,16 @@ elif menu_option == "💰 Planejamento Financeiro":
     # Gráfico de evolução do investimento
     st.markdown("### 📈 Projeção de Investimento")
     
-    meses = list(range(numero_meses + 1))
-    valores_acumulados = []
-    
-    for mes in meses:
-        if mes == 0:
-            valores_acumulados.append(valor_inicial)
-        else:
-            # Valor futuro com aportes mensais
-            fator = (1 + config.get('taxa_juros', 0.0035)) ** mes
-            valor_futuro_inicial = valor_inicial * fator
-            
-            if investimento_mensal > 0:
-                valor_aportes = investimento_mensal * ((fator - 1) / config.get('taxa_juros', 0.0035))
-            else:
-                valor_aportes = 0
-            
-            valores_acumulados.append(valor_futuro_inicial + valor_aportes)
+    # Curva completa calculada de uma vez (vetorizada)
+    valores_acumulados = calcular_curva_acumulada(
+        valor_inicial,
+        config.get('taxa_juros', 0.0035),
+        numero_meses,
+        investimento_mensal
+    )
     
     df_projecao = pd.DataFrame({
-        'Mês': meses,
+        'Mês': range(numero_meses + 1),
         'Valor Acumulado': valores_acumulados
     })
     
@@ -698,6 +1034,261 @@ elif menu_option == "💰 Planejamento Financeiro":
     )
     
     st.plotly_chart(fig, use_container_width=True)
+    
+    # Explorador de cenários (grade calculada em lote e mantida em cache)
+    with st.expander("🧭 Explorar Cenários"):
+        st.caption("Investimento mensal necessário para cada combinação de taxa e prazo")
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            taxa_max = st.number_input(
+                "💹 Taxa Máxima (% ao mês)",
+                min_value=0.05,
+                max_value=100.0,
+                value=max(2.0, round(taxa_juros * 2, 2)),
+                step=0.05,
+                format="%.2f"
+            )
+        with col2:
+            meses_max = st.number_input(
+                "📅 Prazo Máximo (meses)",
+                min_value=1,
+                max_value=240,
+                value=max(24, int(numero_meses) * 2),
+                step=1
+            )
+        
+        taxas, meses_grade, valores_iniciais, grade = grade_cenarios(
+            taxa_max / 100, int(meses_max), orcamento_maximo
+        )
+        
+        # Trocar o valor inicial apenas seleciona outra fatia da grade em cache
+        indice_valor = st.select_slider(
+            "💰 Valor Inicial",
+            options=list(range(len(valores_iniciais))),
+            value=int(np.abs(valores_iniciais - valor_inicial).argmin()),
+            format_func=lambda i: formatar_moeda(valores_iniciais[i])
+        )
+        
+        fig_cenarios = px.imshow(
+            grade[:, :, indice_valor],
+            x=meses_grade,
+            y=np.round(taxas * 100, 3),
+            labels={'x': 'Meses', 'y': 'Taxa Mensal (%)', 'color': 'Aporte Mensal (R$)'},
+            aspect='auto',
+            origin='lower',
+            color_continuous_scale='RdPu',
+            title=f"Aporte Mensal para {formatar_moeda(orcamento_maximo)} "
+                  f"(Valor Inicial: {formatar_moeda(valores_iniciais[indice_valor])})"
+        )
+        st.plotly_chart(fig_cenarios, use_container_width=True)
+    
+    # Simulação com taxas variáveis (Monte Carlo)
+    with st.expander("🎲 Simulação com Taxas Variáveis"):
+        st.caption("Simula milhares de trajetórias com a taxa mensal variando a cada mês")
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            volatilidade = st.number_input(
+                "📉 Volatilidade Mensal (%)",
+                min_value=0.0,
+                max_value=20.0,
+                value=0.30,
+                step=0.05,
+                format="%.2f",
+                help="Desvio padrão da taxa mensal em % (0 = taxa fixa)"
+            )
+        with col2:
+            numero_simulacoes = st.selectbox(
+                "🔢 Simulações",
+                [5000, 10000, 20000, 50000],
+                index=2
+            )
+        
+        simulacao = simulacao_monte_carlo(
+            valor_inicial,
+            investimento_mensal,
+            config.get('taxa_juros', 0.0035),
+            volatilidade / 100,
+            int(numero_meses),
+            orcamento_maximo,
+            numero_simulacoes
+        )
+        faixas = simulacao['percentis']
+        
+        st.metric(
+            "🎯 Probabilidade de Atingir o Orçamento",
+            f"{simulacao['probabilidade_meta'] * 100:.1f}%"
+        )
+        
+        fig_mc = go.Figure()
+        for inferior, superior, nome in [(5, 95, 'Faixa 5% - 95%'), (25, 75, 'Faixa 25% - 75%')]:
+            fig_mc.add_trace(go.Scatter(
+                x=simulacao['meses'], y=faixas[superior],
+                mode='lines', line=dict(width=0), showlegend=False, hoverinfo='skip'
+            ))
+            fig_mc.add_trace(go.Scatter(
+                x=simulacao['meses'], y=faixas[inferior],
+                mode='lines', line=dict(width=0), fill='tonexty',
+                fillcolor='rgba(255, 105, 180, 0.2)', name=nome
+            ))
+        fig_mc.add_trace(go.Scatter(
+            x=simulacao['meses'], y=faixas[50],
+            mode='lines', line=dict(color='#FF69B4', width=3), name='Mediana'
+        ))
+        fig_mc.add_hline(
+            y=orcamento_maximo,
+            line_dash="dash",
+            line_color="red",
+            annotation_text="Orçamento Máximo"
+        )
+        fig_mc.update_layout(
+            title='Faixas de Valor Acumulado (Monte Carlo)',
+            xaxis_title='Mês',
+            yaxis_title='Valor Acumulado'
+        )
+        st.plotly_chart(fig_mc, use_container_width=True)
+    
+    # Parcelas dos itens contratados e fluxo de caixa
+    st.markdown("---")
+    st.markdown("### 💳 Parcelas e Fluxo de Caixa")
+    
+    with st.expander("➕ Parcelar Item Contratado"):
+        df_contratados = frame_items()
+        df_contratados = df_contratados[df_contratados['status'] == 'Contratado']
+        
+        if df_contratados.empty:
+            st.info("📝 Nenhum item contratado para parcelar.")
+        else:
+            with st.form("nova_parcela_form"):
+                contratados = dict(zip(df_contratados['id'], df_contratados['item']))
+                
+                col1, col2 = st.columns(2)
+                with col1:
+                    parcela_item_id = st.selectbox(
+                        "Item *",
+                        options=list(contratados),
+                        format_func=lambda item_id: contratados[item_id]
+                    )
+                    parcela_valor = st.number_input(
+                        "Valor Total (R$) *",
+                        min_value=0.0,
+                        step=100.0,
+                        help="Deixe 0 para usar o preço do item"
+                    )
+                with col2:
+                    parcela_quantidade = st.number_input("Número de Parcelas *", min_value=1, max_value=60, value=1, step=1)
+                    parcela_vencimento = st.date_input("Primeiro Vencimento *", value=date.today(), format="DD/MM/YYYY")
+                
+                submitted = st.form_submit_button("➕ Gerar Parcelas", use_container_width=True, type="primary")
+                
+                if submitted:
+                    valor_total = parcela_valor or float(
+                        df_contratados.loc[df_contratados['id'] == parcela_item_id, 'preco'].iloc[0]
+                    )
+                    if valor_total <= 0:
+                        st.warning("⚠️ Informe o valor total ou cadastre o preço do item!")
+                    else:
+                        novas_parcelas = [
+                            {**parcela, 'item_id': int(parcela_item_id)}
+                            for parcela in dividir_em_parcelas(valor_total, parcela_quantidade, parcela_vencimento)
+                        ]
+                        with st.spinner("⏳ Salvando no Supabase..."):
+                            if add_parcelas(novas_parcelas):
+                                st.success(f"✅ {len(novas_parcelas)} parcela(s) adicionada(s)!")
+                                st.rerun()
+    
+    df_parcelas = frame_parcelas()
+    
+    if df_parcelas.empty:
+        st.info("📝 Nenhuma parcela cadastrada. Parcele um item contratado acima!")
+    else:
+        df_parcelas_display = df_parcelas[['id', 'item', 'descricao', 'vencimento', 'valor', 'paga']].assign(excluir=False)
+        edited_parcelas = st.data_editor(
+            df_parcelas_display,
+            use_container_width=True,
+            column_config={
+                "id": None,
+                "item": st.column_config.TextColumn("Item", disabled=True),
+                "descricao": st.column_config.TextColumn("Parcela"),
+                "vencimento": st.column_config.DateColumn("Vencimento", format="DD/MM/YYYY", required=True),
+                "valor": st.column_config.NumberColumn("Valor (R$)", format="R$ %.2f", min_value=0.0, required=True),
+                "paga": st.column_config.CheckboxColumn("Paga"),
+                "excluir": st.column_config.CheckboxColumn("🗑️ Excluir")
+            },
+            hide_index=True,
+            key="editor_parcelas"
+        )
+        
+        if st.button("💾 Salvar Parcelas", use_container_width=True, type="primary"):
+            colunas = ['descricao', 'vencimento', 'valor', 'paga']
+            alteradas = (edited_parcelas[colunas] != df_parcelas_display[colunas]).any(axis=1)
+            sucesso = True
+            
+            with st.spinner("⏳ Salvando no Supabase..."):
+                for _, parcela in edited_parcelas[edited_parcelas['excluir']].iterrows():
+                    sucesso &= delete_parcela(int(parcela['id']))
+                for _, parcela in edited_parcelas[alteradas & ~edited_parcelas['excluir']].iterrows():
+                    sucesso &= update_parcela(int(parcela['id']), {
+                        'descricao': parcela['descricao'],
+                        'vencimento': pd.Timestamp(parcela['vencimento']).date().isoformat(),
+                        'valor': float(parcela['valor']),
+                        'paga': bool(parcela['paga'])
+                    })
+            
+            if sucesso:
+                st.success("✅ Parcelas salvas com sucesso no Supabase!")
+                st.rerun()
+        
+        # Saldo mês a mês: aportes e rendimento menos as parcelas em aberto
+        em_aberto = df_parcelas[~df_parcelas['paga']]
+        fluxo = calcular_fluxo_caixa(
+            valor_inicial,
+            config.get('taxa_juros', 0.0035),
+            investimento_mensal,
+            numero_meses,
+            em_aberto['vencimento'],
+            em_aberto['valor']
+        )
+        meses_fluxo = pd.to_datetime(fluxo['meses'])
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("💳 Total em Aberto", formatar_moeda(em_aberto['valor'].sum()))
+        with col2:
+            st.metric("✅ Total Pago", formatar_moeda(df_parcelas.loc[df_parcelas['paga'], 'valor'].sum()))
+        
+        fig_fluxo = go.Figure()
+        fig_fluxo.add_trace(go.Bar(
+            x=meses_fluxo, y=fluxo['saidas'], name='Parcelas', marker_color='#F44336'
+        ))
+        fig_fluxo.add_trace(go.Scatter(
+            x=meses_fluxo, y=fluxo['acumulado'], name='Acumulado sem Parcelas',
+            mode='lines', line=dict(color='#9E9E9E', dash='dot')
+        ))
+        fig_fluxo.add_trace(go.Scatter(
+            x=meses_fluxo, y=fluxo['saldo'], name='Saldo', mode='lines+markers',
+            line=dict(color='#FF69B4', width=3)
+        ))
+        fig_fluxo.update_layout(
+            title='Fluxo de Caixa Mensal',
+            xaxis_title='Mês',
+            yaxis_title='Valor (R$)'
+        )
+        st.plotly_chart(fig_fluxo, use_container_width=True)
+        
+        if fluxo['deficit'].any():
+            meses_deficit = meses_fluxo[fluxo['deficit']]
+            st.error(
+                f"🚨 Saldo insuficiente em {len(meses_deficit)} mês(es), "
+                f"a partir de {meses_deficit[0].strftime('%m/%Y')} "
+                f"(menor saldo: {formatar_moeda(fluxo['saldo'].min())})"
+            )
+        else:
+            st.success("✅ O saldo cobre todas as parcelas no período!")
+        
+        if fluxo['fora_do_horizonte'] > 0:
+            st.info(f"ℹ️ {formatar_moeda(fluxo['fora_do_horizonte'])} em parcelas vencem após o período da projeção.")
 
 
 # ==================== SEÇÃO: CHECKLIST ====================
@@ -705,6 +1296,8 @@ elif menu_option == "✅ Checklist":
     st.title("✅ Checklist de Tarefas")
     st.write("Organize e acompanhe todas as tarefas do seu casamento")
     
+    tasks = get_all_tasks()
+    
     # ===== ADICIONAR NOVA TAREFA =====
     with st.expander("➕ Adicionar Nova Tarefa"):
         with st.form("form_add_task"):
@@ -731,7 +1324,7 @@ elif menu_option == "✅ Checklist":
     # ===== LISTAR TAREFAS =====
     if tasks:
         # Calcular progresso
-        concluidas = sum(1 for t in tasks if t.get('concluida', False))
+        concluidas = sum(1 for t in tasks if t.concluida)
         total = len(tasks)
         porcentagem = (concluidas / total * 100) if total > 0 else 0
         
@@ -765,9 +1358,9 @@ elif menu_option == "✅ Checklist":
         
         # Aplicar filtro
         if filtro == "Pendentes":
-            tasks_filtradas = [t for t in tasks if not t.get('concluida', False)]
+            tasks_filtradas = [t for t in tasks if not t.concluida]
         elif filtro == "Concluídas":
-            tasks_filtradas = [t for t in tasks if t.get('concluida', False)]
+            tasks_filtradas = [t for t in tasks if t.concluida]
         else:
             tasks_filtradas = tasks
         
@@ -781,23 +1374,23 @@ elif menu_option == "✅ Checklist":
                     # Checkbox para marcar/desmarcar
                     checked = st.checkbox(
                         "",
-                        value=task.get('concluida', False),
-                        key=f"check_{task['id']}",
+                        value=task.concluida,
+                        key=f"check_{task.id}",
                         label_visibility="collapsed"
                     )
                     
                     # Atualizar status se mudou
-                    if checked != task.get('concluida', False):
+                    if checked != task.concluida:
                         with st.spinner("⏳ Atualizando..."):
-                            if update_task(task['id'], {"concluida": checked}):
+                            if update_task(task.id, {"concluida": checked}):
                                 st.rerun()
                 
                 with col2:
                     # Texto da tarefa (riscado se concluída)
-                    if task.get('concluida', False):
-                        st.markdown(f"~~{task['tarefa']}~~")
+                    if task.concluida:
+                        st.markdown(f"~~{task.tarefa}~~")
                     else:
-                        st.write(task['tarefa'])
+                        st.write(task.tarefa)
         else:
             # Mensagem se lista vazia após filtro
             if filtro == "Pendentes":
@@ -813,18 +1406,21 @@ elif menu_option == "✅ Checklist":
 elif menu_option == "📊 Relatórios":
     st.header("📊 Relatórios e Análises")
     
+    # Carregar dados (DataFrames compartilhados do cache colunar)
+    df_items = frame_items()
+    df_tasks = frame_tasks()
+    
     # Calcular métricas
-    total_orcado = calcular_total_orcado(items)
+    resumo = get_resumo_totais()
+    total_orcado = calcular_total_orcado_resumo(resumo)
     orcamento_maximo = config.get('orcamento_maximo', 30000.0)
     
     # Gráfico de barras - Gastos por item
     st.markdown("### 📊 Gastos por Item")
     
-    items_com_preco = [item for item in items if item['preco'] > 0]
+    df_gastos = df_items[df_items['preco'] > 0].sort_values('preco', ascending=True)
     
-    if items_com_preco:
-        df_gastos = pd.DataFrame(items_com_preco)
-        df_gastos = df_gastos.sort_values('preco', ascending=True)
+    if not df_gastos.empty:
         
         fig = px.bar(
             df_gastos,
@@ -843,7 +1439,7 @@ elif menu_option == "📊 Relatórios":
     # Gráfico de pizza - Distribuição percentual
     st.markdown("### 🥧 Distribuição Percentual dos Gastos")
     
-    if items_com_preco:
+    if not df_gastos.empty:
         fig = px.pie(
             df_gastos,
             values='preco',
@@ -854,6 +1450,22 @@ elif menu_option == "📊 Relatórios":
         fig.update_traces(textposition='inside', textinfo='percent+label')
         st.plotly_chart(fig, use_container_width=True)
     
+    # Gastos por fornecedor (grafias do mesmo fornecedor somadas juntas)
+    st.markdown("### 🏢 Gastos por Fornecedor")
+    
+    df_por_fornecedor = gastos_por_fornecedor(df_items, registro_fornecedores())
+    
+    if not df_por_fornecedor.empty:
+        st.dataframe(
+            df_por_fornecedor.assign(
+                total=formatar_moeda_vetorizado(df_por_fornecedor['total'])
+            ).rename(columns={'fornecedor': 'Fornecedor', 'itens': 'Itens', 'total': 'Total'}),
+            hide_index=True,
+            use_container_width=True
+        )
+    else:
+        st.info("Informe o serviço (fornecedor) dos itens com preço para visualizar esta tabela.")
+    
     # Tabela resumo
     st.markdown("### 📋 Resumo: Itens Contratados vs Pendentes")
     
@@ -861,27 +1473,27 @@ elif menu_option == "📊 Relatórios":
     
     with col1:
         st.markdown("#### ✅ Itens Contratados")
-        itens_contratados = [item for item in items if item.get('status') == 'Contratado']
+        df_contratados = df_items[df_items['status'] == 'Contratado']
         
-        if itens_contratados:
-            df_contratados = pd.DataFrame(itens_contratados)
-            df_display = df_contratados[['item', 'servico', 'preco']].copy()
-            df_display.columns = ['Item', 'Serviço', 'Preço (R$)']
+        if not df_contratados.empty:
+            df_display = df_contratados[['item', 'servico']].assign(
+                preco=formatar_moeda_vetorizado(df_contratados['preco'])
+            ).rename(columns={'item': 'Item', 'servico': 'Serviço', 'preco': 'Preço'})
             st.dataframe(df_display, hide_index=True, use_container_width=True)
-            st.markdown(f"**Total: {formatar_moeda(sum(item['preco'] for item in itens_contratados))}**")
+            st.markdown(f"**Total: {formatar_moeda(calcular_total_status_resumo(resumo, 'Contratado'))}**")
         else:
             st.info("Nenhum item contratado ainda.")
     
     with col2:
         st.markdown("#### ⏳ Itens Pendentes")
-        itens_pendentes = [item for item in items if item.get('status') == 'Pendente']
+        df_pendentes = df_items[df_items['status'] == 'Pendente']
         
-        if itens_pendentes:
-            df_pendentes = pd.DataFrame(itens_pendentes)
-            df_display = df_pendentes[['item', 'preco']].copy()
-            df_display.columns = ['Item', 'Preço (R$)']
+        if not df_pendentes.empty:
+            df_display = df_pendentes[['item']].assign(
+                preco=formatar_moeda_vetorizado(df_pendentes['preco'])
+            ).rename(columns={'item': 'Item', 'preco': 'Preço'})
             st.dataframe(df_display, hide_index=True, use_container_width=True)
-            st.markdown(f"**Total: {formatar_moeda(sum(item['preco'] for item in itens_pendentes))}**")
+            st.markdown(f"**Total: {formatar_moeda(calcular_total_status_resumo(resumo, 'Pendente'))}**")
         else:
             st.success("Todos os itens foram contratados! 🎉")
     
@@ -893,9 +1505,8 @@ elif menu_option == "📊 Relatórios":
     
     with col1:
         # CSV de itens
-        if items:
-            df_items_download = pd.DataFrame(items)
-            csv_items = df_items_download.to_csv(index=False, encoding='utf-8-sig')
+        if not df_items.empty:
+            csv_items = df_items.to_csv(index=False, encoding='utf-8-sig')
             st.download_button(
                 label="📥 Download Itens (CSV)",
                 data=csv_items,
@@ -905,9 +1516,8 @@ elif menu_option == "📊 Relatórios":
     
     with col2:
         # CSV de tarefas
-        if tasks:
-            df_tasks_download = pd.DataFrame(tasks)
-            csv_tasks = df_tasks_download.to_csv(index=False, encoding='utf-8-sig')
+        if not df_tasks.empty:
+            csv_tasks = df_tasks.to_csv(index=False, encoding='utf-8-sig')
             st.download_button(
                 label="📥 Download Tarefas (CSV)",
                 data=csv_tasks,
@@ -924,11 +1534,11 @@ Total Orçado: {formatar_moeda(total_orcado)}
 Reserva Disponível: {formatar_moeda(orcamento_maximo - total_orcado)}
 Porcentagem Utilizada: {calcular_porcentagem_usada(orcamento_maximo, total_orcado):.2f}%
 
-Itens Contratados: {len([i for i in items if i.get('status') == 'Contratado'])}
-Itens Pendentes: {len([i for i in items if i.get('status') == 'Pendente'])}
+Itens Contratados: {contar_itens_status_resumo(resumo, 'Contratado')}
+Itens Pendentes: {contar_itens_status_resumo(resumo, 'Pendente')}
 
-Tarefas Concluídas: {sum(1 for t in tasks if t.get('concluida', False))} de {len(tasks)}
-Progresso: {calcular_porcentagem_tarefas(tasks):.1f}%
+Tarefas Concluídas: {resumo['tasks']['concluidas']} de {resumo['tasks']['total']}
+Progresso: {calcular_porcentagem_tarefas_resumo(resumo):.1f}%
 """
         
         st.download_button(
@@ -945,7 +1555,7 @@ elif menu_option == "💸 Orçamentos":
     
     # Carregar dados
     categorias = get_all_categorias()
-    orcamentos = get_all_orcamentos()
+    df_orcamentos = frame_orcamentos()
     
     # ===== SEÇÃO 1: GERENCIAR CATEGORIAS (colapsável) =====
     with st.expander("📁 Gerenciar Categorias"):
@@ -985,41 +1595,24 @@ elif menu_option == "💸 Orçamentos":
     # Filtro por categoria
     col1, col2 = st.columns([3, 1])
     with col1:
-        cat_options = ["Todas"] + [cat['nome'] for cat in categorias]
+        cat_options = ["Todas"] + [cat.nome for cat in categorias]
         filtro_cat = st.selectbox("Filtrar por categoria:", cat_options)
     
-    # Aplicar filtro
+    # Aplicar filtro sobre o DataFrame compartilhado (cache colunar)
     if filtro_cat == "Todas":
-        orcamentos_filtrados = orcamentos
+        orcamentos_filtrados = df_orcamentos
     else:
-        orcamentos_filtrados = [
-            orc for orc in orcamentos 
-            if orc.get('categorias', {}).get('nome') == filtro_cat
-        ]
-    
-    # Converter para DataFrame
-    if orcamentos_filtrados:
-        # Preparar dados para exibição
-        orcamentos_display = []
-        for orc in orcamentos_filtrados:
-            orcamentos_display.append({
-                'id': orc['id'],
-                'categoria': orc['categorias']['nome'],
-                'categoria_id': orc['categoria_id'],
-                'fornecedor': orc['fornecedor'],
-                'valor': float(orc['valor']),
-                'telefone': orc.get('telefone', ''),
-                'observacao': orc.get('observacao', '')
-            })
-        
-        df_orcamentos = pd.DataFrame(orcamentos_display)
-        
+        orcamentos_filtrados = df_orcamentos[df_orcamentos['categoria'] == filtro_cat]
+    
+    if not orcamentos_filtrados.empty:
         # Preparar DataFrame para exibição (sem categoria_id)
-        df_display = df_orcamentos[['id', 'categoria', 'fornecedor', 'valor', 'telefone', 'observacao']].copy()
-        df_display.columns = ['ID', 'Categoria', 'Fornecedor', 'Valor', 'Telefone', 'Observação']
+        df_display = orcamentos_filtrados[['id', 'categoria', 'fornecedor', 'valor', 'nota', 'telefone', 'observacao']].rename(columns={
+            'id': 'ID', 'categoria': 'Categoria', 'fornecedor': 'Fornecedor',
+            'valor': 'Valor', 'nota': 'Nota', 'telefone': 'Telefone', 'observacao': 'Observação'
+        })
         
         # Criar mapeamento de categorias para SelectboxColumn
-        categorias_dict = {cat['nome']: cat['id'] for cat in categorias}
+        categorias_dict = {cat.nome: cat.id for cat in categorias}
         categorias_nomes = list(categorias_dict.keys())
         
         # Editor de dados (IGUAL Itens do Casamento)
@@ -1048,6 +1641,13 @@ elif menu_option == "💸 Orçamentos":
                     min_value=0.0,
                     required=True
                 ),
+                "Nota": st.column_config.NumberColumn(
+                    "Nota ⭐",
+                    help="Preferência de 0 a 10 (usada pelo otimizador)",
+                    min_value=0,
+                    max_value=10,
+                    step=1
+                ),
                 "Telefone": st.column_config.TextColumn(
                     "Telefone"
                 ),
@@ -1061,7 +1661,7 @@ elif menu_option == "💸 Orçamentos":
         # Botão para salvar alterações (IGUAL Itens do Casamento)
         if st.button("💾 Salvar Alterações", use_container_width=True, type="primary"):
             # Converter de volta para formato original
-            edited_df.columns = ['id', 'categoria', 'fornecedor', 'valor', 'telefone', 'observacao']
+            edited_df.columns = ['id', 'categoria', 'fornecedor', 'valor', 'nota', 'telefone', 'observacao']
             
             # Converter nome de categoria para categoria_id
             orcamentos_atualizados = []
@@ -1075,6 +1675,7 @@ elif menu_option == "💸 Orçamentos":
                         'categoria_id': categoria_id,
                         'fornecedor': row['fornecedor'],
                         'valor': float(row['valor']),
+                        'nota': int(row['nota']) if pd.notna(row['nota']) else 5,
                         'telefone': row['telefone'],
                         'observacao': row['observacao']
                     })
@@ -1101,7 +1702,7 @@ elif menu_option == "💸 Orçamentos":
         
         with col1:
             total_filtrado = df_display['Valor'].sum()
-            st.metric("💰 Total (filtrado)", f"R$ {total_filtrado:,.2f}")
+            st.metric("💰 Total (filtrado)", formatar_moeda(total_filtrado))
         
         with col2:
             qtd_orcamentos = len(df_display)
@@ -1121,7 +1722,7 @@ elif menu_option == "💸 Orçamentos":
             if categorias:
                 nova_categoria = st.selectbox(
                     "Categoria *",
-                    options=[cat['nome'] for cat in categorias]
+                    options=[cat.nome for cat in categorias]
                 )
             else:
                 st.warning("⚠️ Adicione categorias primeiro!")
@@ -1141,7 +1742,7 @@ elif menu_option == "💸 Orçamentos":
                 format="%.2f"
             )
         
-        col4, col5 = st.columns(2)
+        col4, col5, col6 = st.columns(3)
         
         with col4:
             novo_telefone = st.text_input(
@@ -1155,13 +1756,22 @@ elif menu_option == "💸 Orçamentos":
                 placeholder="Detalhes adicionais"
             )
         
+        with col6:
+            nova_nota = st.slider(
+                "Nota ⭐",
+                min_value=0,
+                max_value=10,
+                value=5,
+                help="Preferência de 0 a 10 (usada pelo otimizador)"
+            )
+        
         submitted = st.form_submit_button("➕ Adicionar Orçamento", use_container_width=True, type="primary")
         
         if submitted:
             if nova_categoria and novo_fornecedor:
                 # Obter categoria_id
                 categoria_id = next(
-                    (cat['id'] for cat in categorias if cat['nome'] == nova_categoria),
+                    (cat.id for cat in categorias if cat.nome == nova_categoria),
                     None
                 )
                 
@@ -1172,7 +1782,8 @@ elif menu_option == "💸 Orçamentos":
                             fornecedor=novo_fornecedor,
                             valor=novo_valor,
                             telefone=novo_telefone,
-                            observacao=nova_observacao
+                            observacao=nova_observacao,
+                            nota=nova_nota
                         )
                         
                         if result:
@@ -1186,34 +1797,166 @@ elif menu_option == "💸 Orçamentos":
                 st.error("❌ Os campos 'Categoria' e 'Fornecedor' são obrigatórios!")
     
     # ===== TOTAIS POR CATEGORIA =====
-    if orcamentos:
+    if not df_orcamentos.empty:
         st.divider()
         st.markdown("### 📊 Totais por Categoria")
         
-        totais = {}
-        for orc in orcamentos:
-            cat_nome = orc['categorias']['nome']
-            totais[cat_nome] = totais.get(cat_nome, 0) + float(orc['valor'])
+        # Totais pré-agregados no banco
+        totais = calcular_totais_categoria_resumo(get_resumo_totais())
+        
+        # Fornecedores por categoria contados pelo nome canônico
+        # (grafias diferentes do mesmo fornecedor contam uma vez)
+        registro = registro_fornecedores()
+        df_fornecedores = totais_por_fornecedor(df_orcamentos, registro)
+        qtd_fornecedores = df_fornecedores.groupby('categoria', observed=True)['fornecedor'].size()
         
         # Criar DataFrame para exibição
-        df_totais = pd.DataFrame([
-            {'Categoria': cat, 'Total': valor}
-            for cat, valor in sorted(totais.items())
-        ])
+        df_totais = pd.DataFrame({
+            'Categoria': list(totais.keys()),
+            'Fornecedores': [int(qtd_fornecedores.get(categoria, 0)) for categoria in totais],
+            'Total': formatar_moeda_vetorizado(list(totais.values()))
+        })
         
         st.dataframe(
             df_totais,
-            column_config={
-                "Total": st.column_config.NumberColumn(
-                    "Total (R$)",
-                    format="R$ %.2f"
-                )
-            },
             hide_index=True,
             use_container_width=True
         )
         
-        st.markdown(f"### 💰 **TOTAL GERAL: R$ {sum(totais.values()):,.2f}**")
+        st.markdown(f"### 💰 **TOTAL GERAL: {formatar_moeda(sum(totais.values()))}**")
+        
+        # ===== TOTAIS POR FORNECEDOR =====
+        st.divider()
+        st.markdown("### 🏢 Totais por Fornecedor")
+        st.caption("Grafias do mesmo fornecedor (mesmo nome, mesmo telefone ou unificadas) são somadas juntas")
+        
+        st.dataframe(
+            df_fornecedores.assign(
+                menor=formatar_moeda_vetorizado(df_fornecedores['menor']),
+                total=formatar_moeda_vetorizado(df_fornecedores['total'])
+            ).rename(columns={
+                'categoria': 'Categoria', 'fornecedor': 'Fornecedor', 'quantidade': 'Orçamentos',
+                'menor': 'Menor Valor', 'total': 'Total'
+            }),
+            hide_index=True,
+            use_container_width=True
+        )
+        
+        sugestoes = registro.sugestoes()
+        with st.expander(f"🔗 Fornecedores Parecidos ({len(sugestoes)})"):
+            if sugestoes:
+                st.caption("Nomes parecidos que podem ser o mesmo fornecedor")
+                for sugestao in sugestoes:
+                    col1, col2 = st.columns([3, 1])
+                    with col1:
+                        st.markdown(
+                            f"**{sugestao.manter}** ↔ **{sugestao.unir}** "
+                            f"({sugestao.semelhanca:.0%} parecidos)"
+                        )
+                    with col2:
+                        if st.button("🔗 Unificar", key=f"unificar_{'|'.join(sugestao.chaves)}",
+                                     use_container_width=True):
+                            if add_fornecedor_aliases(list(sugestao.chaves), sugestao.manter):
+                                st.success(f"✅ '{sugestao.unir}' unificado com '{sugestao.manter}'!")
+                                st.rerun()
+            else:
+                st.success("✅ Nenhum fornecedor parecido encontrado")
+            
+            # Unificações confirmadas, agrupadas pelo nome canônico
+            unificacoes = {}
+            for alias in get_fornecedor_aliases():
+                unificacoes.setdefault(alias.canonico, []).append(alias)
+            if unificacoes:
+                st.divider()
+                st.write("**Unificações confirmadas**")
+                for canonico, aliases in unificacoes.items():
+                    col1, col2 = st.columns([3, 1])
+                    with col1:
+                        st.markdown(f"**{canonico}** ← {', '.join(alias.alias for alias in aliases)}")
+                    with col2:
+                        if st.button("↩️ Desfazer", key=f"desfazer_unificacao_{aliases[0].id}",
+                                     use_container_width=True):
+                            if delete_fornecedor_aliases([alias.id for alias in aliases]):
+                                st.success(f"✅ Unificação de '{canonico}' desfeita!")
+                                st.rerun()
+        
+        # ===== OTIMIZADOR: UM ORÇAMENTO POR CATEGORIA =====
+        st.divider()
+        st.markdown("### 🧮 Otimizador de Orçamentos")
+        st.caption("Escolhe um fornecedor por categoria sem ultrapassar o limite definido")
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            objetivo = st.radio(
+                "Objetivo",
+                ["⭐ Maior preferência", "💰 Menor custo"],
+                horizontal=True
+            )
+        with col2:
+            limite = st.number_input(
+                "💵 Limite (R$)",
+                min_value=0.0,
+                value=float(config.get('orcamento_maximo', 30000.0)),
+                step=1000.0
+            )
+        
+        resultado = otimizar_orcamentos(
+            df_orcamentos['categoria'],
+            df_orcamentos['valor'],
+            df_orcamentos['nota'],
+            limite,
+            objetivo="custo" if objetivo == "💰 Menor custo" else "nota"
+        )
+        df_escolhidos = df_orcamentos.iloc[resultado['escolhidos']]
+        
+        if not resultado['viavel']:
+            st.error(
+                f"🚨 Nem a combinação mais barata cabe no limite "
+                f"({formatar_moeda(resultado['total'])}). Ela é exibida abaixo."
+            )
+        
+        st.dataframe(
+            df_escolhidos[['categoria', 'fornecedor', 'nota']].assign(
+                valor=formatar_moeda_vetorizado(df_escolhidos['valor'])
+            ).rename(columns={
+                'categoria': 'Categoria', 'fornecedor': 'Fornecedor', 'valor': 'Valor', 'nota': 'Nota'
+            })[['Categoria', 'Fornecedor', 'Valor', 'Nota']],
+            hide_index=True,
+            use_container_width=True
+        )
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("💰 Total Escolhido", formatar_moeda(resultado['total']))
+        with col2:
+            st.metric("💵 Sobra", formatar_moeda(limite - resultado['total']))
+        with col3:
+            st.metric("⭐ Nota Total", f"{resultado['nota_total']:.0f}")
+        
+        # Aplicar a escolha aos itens (item com o mesmo nome da categoria)
+        if st.button("📋 Aplicar aos Itens do Casamento", use_container_width=True, disabled=df_escolhidos.empty):
+            df_items = frame_items()
+            items_por_nome = {
+                nome.strip().casefold(): item_id
+                for item_id, nome in zip(df_items['id'], df_items['item'])
+            }
+            sucesso = True
+            
+            with st.spinner("⏳ Salvando no Supabase..."):
+                for orc in df_escolhidos.itertuples():
+                    item_id = items_por_nome.get(str(orc.categoria).strip().casefold())
+                    fornecedor = registro.canonico(orc.fornecedor, orc.telefone)
+                    if item_id is not None:
+                        sucesso &= update_item(int(item_id), {'servico': fornecedor, 'preco': float(orc.valor)})
+                    else:
+                        sucesso &= add_item(
+                            str(orc.categoria), fornecedor, float(orc.valor),
+                            "Pendente", "Escolhido pelo otimizador de orçamentos"
+                        )
+            
+            if sucesso:
+                st.success("✅ Itens atualizados com os orçamentos escolhidos!")
+                st.rerun()
 
 
 # ==================== SEÇÃO: CALENDÁRIO ====================
@@ -1471,8 +2214,10 @@ elif menu_option == "📅 Calendário":
         amanha = hoje + timedelta(days=1)
         
         for agend in proximos[:5]:  # Mostrar no máximo 5
-            data_agend = parse_agend_date(agend['data'])
-            hora_agend = agend['hora']
+            data_agend = agend.data
+            chave = chave_agendamento(agend)
+            serie = agend.serie or agend  # Edição e exclusão valem para a série inteira
+            hora_agend = agend.hora.strftime('%H:%M')
             
             # Determinar label do dia e cor
             if data_agend == hoje:
@@ -1483,7 +2228,7 @@ elif menu_option == "📅 Calendário":
                 cor_badge = "#FF9800"
             else:
                 dias_diff = (data_agend - hoje).days
-                dia_label = f"📅 Em {dias_diff} dias"
+                dia_label = f"📅 {DIAS_SEMANA[agend.dia_semana]}, em {dias_diff} dias"
                 cor_badge = "#2196F3"
             
             # Card estilizado
@@ -1508,9 +2253,9 @@ elif menu_option == "📅 Calendário":
                     ">{dia_label}</span>
                     <span style="color: #FF69B4; font-weight: 600; font-size: 16px;">{hora_agend}</span>
                 </div>
-                <h3 style="color: white; margin: 8px 0;">{agend['categoria']} - {agend['local']}</h3>
-                <p style="color: #b0b0b0; margin: 4px 0;">📍 {agend.get('endereco', 'Endereço não informado')}</p>
-                <p style="color: #b0b0b0; margin: 4px 0;">📊 Status: {agend.get('status', 'Agendado')}</p>
+                <h3 style="color: white; margin: 8px 0;">{agend.categoria} - {'🔁 ' if agend.rrule else ''}{agend.local}</h3>
+                <p style="color: #b0b0b0; margin: 4px 0;">📍 {agend.endereco or 'Endereço não informado'}</p>
+                <p style="color: #b0b0b0; margin: 4px 0;">📊 Status: {agend.status}</p>
             </div>
             """, unsafe_allow_html=True)
             
@@ -1518,36 +2263,43 @@ elif menu_option == "📅 Calendário":
             col1, col2, col3, col4 = st.columns(4)
             
             with col1:
-                if agend.get('link'):
-                    st.link_button("🗺️ Ver no Mapa", agend['link'], use_container_width=True)
+                if agend.link:
+                    st.link_button("🗺️ Ver no Mapa", agend.link, use_container_width=True)
             
             with col2:
-                if st.button("✏️ Editar", key=f"edit_prox_{agend['id']}", use_container_width=True):
-                    st.session_state[f'editing_agend_{agend["id"]}'] = True
-                    st.rerun()
+                st.button("✏️ Editar", key=f"edit_prox_{chave}", on_click=_abrir_edicao_agendamento,
+                          args=(serie.id, f"prox_{chave}"), use_container_width=True)
             
             with col3:
-                if st.button("🗑️ Deletar", key=f"del_prox_{agend['id']}", use_container_width=True):
-                    if delete_agendamento(agend['id']):
+                if agend.rrule and st.button("⏭️ Pular esta data", key=f"pular_prox_{chave}",
+                                             use_container_width=True):
+                    if pular_data_agendamento(agend):
+                        st.success("✅ Data removida da série!")
+                        st.rerun()
+                if st.button(rotulo_deletar_agendamento(agend), key=f"del_prox_{chave}", use_container_width=True):
+                    if delete_agendamento(agend.id):
                         st.success("✅ Agendamento deletado!")
                         st.rerun()
             
             with col4:
                 # Botão para exportar para calendário
                 try:
-                    ics_data = gerar_ics_agendamento(agend)
-                    nome_arquivo = f"visita_{agend['local'].replace(' ', '_')}_{agend['data']}.ics"
+                    nome_arquivo = f"visita_{agend.local.replace(' ', '_')}_{agend.data}.ics"
                     st.download_button(
                         label="📅 Calendário",
-                        data=ics_data,
+                        data=partial(gerar_ics_agendamento, agend),  # Gerado só no clique
                         file_name=nome_arquivo,
                         mime="text/calendar",
                         use_container_width=True,
-                        key=f"ics_prox_{agend['id']}",
+                        key=f"ics_prox_{chave}",
                         help="Baixar e adicionar ao Google Calendar, Apple Calendar, Outlook, etc."
                     )
                 except Exception as e:
                     st.error(f"Erro ao gerar .ics: {str(e)}")
+            
+            # Formulário de edição (se aberto neste card)
+            if st.session_state.get(f'editing_agend_{serie.id}') == f"prox_{chave}":
+                formulario_edicao_agendamento(serie, f"prox_{chave}")
     else:
         st.info("📭 Nenhuma visita agendada para os próximos 7 dias.")
     
@@ -1556,67 +2308,42 @@ elif menu_option == "📅 Calendário":
     # ===== SEÇÃO 2: CALENDÁRIO INTERATIVO =====
     st.markdown("### 📆 Calendário Interativo")
     
+    # Feriados estaduais/municipais (opcional): [feriados] regiao = "SP" nos secrets
+    regiao_feriados = st.secrets.get("feriados", {}).get("regiao")
+    hoje = datetime.now().date()
+    
     # Usar streamlit-calendar (biblioteca mais moderna)
     try:
         from streamlit_calendar import calendar as st_calendar
         
-        # Preparar eventos para o calendário
-        eventos = []
-        
-        # Adicionar feriados brasileiros
-        for data_feriado, nome_feriado in FERIADOS_2026.items():
-            eventos.append({
-                "title": f"🔴 {nome_feriado}",
-                "start": data_feriado,
-                "end": data_feriado,
-                "color": "#F44336",
-                "backgroundColor": "#F44336",
-                "borderColor": "#D32F2F",
-                "textColor": "#FFFFFF",
-                "allDay": True,
-                "display": "background",
-                "classNames": ["evento-feriado"]
-            })
-        
-        # Adicionar agendamentos
-        for agend in agendamentos:
-            try:
-                data_str = agend['data'] if isinstance(agend['data'], str) else str(agend['data'])
-                hora_str = agend['hora'] if isinstance(agend['hora'], str) else str(agend['hora'])
-                
-                # Emoji da categoria (com fallback seguro)
-                emoji = "📅"  # Default
-                if agend['categoria'] and len(agend['categoria']) > 0:
-                    parts = agend['categoria'].split()
-                    first_char = parts[0] if parts else ""
-                    # Verificar se é realmente um emoji (Unicode range simplificado)
-                    # Emojis geralmente estão nas faixas altas do Unicode
-                    if first_char and len(first_char) <= 2 and ord(first_char[0]) > 127:
-                        emoji = first_char
-                
-                eventos.append({
-                    "title": f"{emoji} {agend['local']}",
-                    "start": f"{data_str}T{hora_str}",
-                    "color": agend.get('cor', '#FF69B4'),
-                    "backgroundColor": agend.get('cor', '#FF69B4'),
-                    "borderColor": agend.get('cor', '#FF69B4'),
-                    "textColor": "#FFFFFF",
-                    "extendedProps": {
-                        "id": agend['id'],
-                        "categoria": agend['categoria'],
-                        "local": agend['local'],
-                        "status": agend.get('status', ''),
-                        "observacao": agend.get('observacao', '')
-                    },
-                    "classNames": ["evento-agendamento"]
-                })
-            except Exception as e:
-                st.warning(f"⚠️ Erro ao processar um agendamento")
-                continue
+        # Mês exibido (navegação feita aqui: o componente não informa o período visível)
+        if 'calendario_mes' not in st.session_state:
+            st.session_state.calendario_mes = hoje.replace(day=1)
+        mes_exibido = st.session_state.calendario_mes
+        
+        col_ant, col_hoje, col_prox = st.columns([1, 1, 1])
+        with col_ant:
+            if st.button("◀ Mês anterior", key="cal_mes_anterior", use_container_width=True):
+                st.session_state.calendario_mes = (mes_exibido - timedelta(days=1)).replace(day=1)
+                st.rerun()
+        with col_hoje:
+            if st.button("📍 Hoje", key="cal_mes_atual", use_container_width=True):
+                st.session_state.calendario_mes = hoje.replace(day=1)
+                st.rerun()
+        with col_prox:
+            if st.button("Próximo mês ▶", key="cal_mes_proximo", use_container_width=True):
+                st.session_state.calendario_mes = (mes_exibido + timedelta(days=32)).replace(day=1)
+                st.rerun()
+        
+        # Apenas os eventos (feriados e agendamentos) do período visível, em cache
+        inicio_janela, fim_janela = janela_mes(mes_exibido)
+        eventos = eventos_calendario(inicio_janela, fim_janela, regiao_feriados)
         
         # Configurações do calendário em PORTUGUÊS BRASILEIRO
         calendar_options = {
             "initialView": "dayGridMonth",
+            "initialDate": mes_exibido.isoformat(),
+            "validRange": {"start": inicio_janela.isoformat(), "end": fim_janela.isoformat()},
             "locale": "pt-br",  # PORTUGUÊS BRASILEIRO
             "buttonText": {
                 "today": "Hoje",
@@ -1626,7 +2353,7 @@ elif menu_option == "📅 Calendário":
                 "list": "Lista"
             },
             "headerToolbar": {
-                "left": "prev,next today",
+                "left": "",
                 "center": "title",
                 "right": "dayGridMonth,timeGridWeek,timeGridDay"
             },
@@ -1673,7 +2400,7 @@ elif menu_option == "📅 Calendário":
         selected_date = st_calendar(
             events=eventos,
             options=calendar_options,
-            key="calendario_visitas"
+            key=f"calendario_visitas_{mes_exibido:%Y%m}"  # Remonta ao trocar de mês
         )
         
         st.caption("🔴 Feriado   📅 Agendamento   ⭐ Clique na data para ver detalhes")
@@ -1686,8 +2413,8 @@ elif menu_option == "📅 Calendário":
         data_selecionada = st.date_input(
             "Data",
             value=datetime.now().date(),
-            min_value=date(2026, 1, 1),
-            max_value=date(2026, 12, 31),
+            min_value=date(hoje.year - 1, 1, 1),
+            max_value=date(hoje.year + ANOS_PLANEJAMENTO, 12, 31),
             format="DD/MM/YYYY",
             label_visibility="collapsed"
         )
@@ -1697,49 +2424,61 @@ elif menu_option == "📅 Calendário":
             agends_dia = get_agendamentos_by_data(str(data_selecionada))
             
             # Verificar se é feriado
-            data_str = str(data_selecionada)
-            if data_str in FERIADOS_2026:
-                st.info(f"🔴 **Feriado:** {FERIADOS_2026[data_str]}")
+            feriado = nome_feriado(data_selecionada, regiao_feriados)
+            if feriado:
+                st.info(f"🔴 **Feriado:** {feriado}")
             
             if agends_dia:
                 st.success(f"📅 **{len(agends_dia)} agendamento(s)** em {data_selecionada.strftime('%d/%m/%Y')}")
                 
                 for agend in agends_dia:
+                    chave = chave_agendamento(agend)
+                    serie = agend.serie or agend  # Edição e exclusão valem para a série inteira
                     with st.container():
-                        st.markdown(f"**{agend['hora']} - {agend['categoria']} {agend['local']}**")
-                        st.markdown(f"📊 Status: {agend.get('status', 'Agendado')}")
-                        if agend.get('endereco'):
-                            st.markdown(f"📍 {agend['endereco']}")
+                        st.markdown(f"**{agend.hora.strftime('%H:%M')} - {agend.categoria} {agend.local}**")
+                        st.markdown(f"📊 Status: {agend.status}")
+                        if agend.rrule:
+                            st.markdown(f"🔁 {descrever_recorrencia(agend.rrule)}")
+                        if agend.endereco:
+                            st.markdown(f"📍 {agend.endereco}")
                         
                         col1, col2, col3, col4 = st.columns(4)
                         with col1:
-                            if agend.get('link'):
-                                st.link_button("🗺️", agend['link'], use_container_width=True)
+                            if agend.link:
+                                st.link_button("🗺️", agend.link, use_container_width=True)
                         with col2:
-                            if st.button("✏️", key=f"edit_cal_{agend['id']}", use_container_width=True):
-                                st.session_state[f'editing_agend_{agend["id"]}'] = True
-                                st.rerun()
+                            st.button("✏️", key=f"edit_cal_{chave}", on_click=_abrir_edicao_agendamento,
+                                      args=(serie.id, f"cal_{chave}"), help="Editar", use_container_width=True)
                         with col3:
-                            if st.button("🗑️", key=f"del_cal_{agend['id']}", use_container_width=True):
-                                if delete_agendamento(agend['id']):
+                            if agend.rrule and st.button("⏭️ Pular esta data", key=f"pular_cal_{chave}",
+                                                         use_container_width=True):
+                                if pular_data_agendamento(agend):
+                                    st.success("✅ Data removida da série!")
+                                    st.rerun()
+                            if st.button(rotulo_deletar_agendamento(agend) if agend.rrule else "🗑️",
+                                         key=f"del_cal_{chave}", help="Deletar", use_container_width=True):
+                                if delete_agendamento(agend.id):
                                     st.success("✅ Deletado!")
                                     st.rerun()
                         with col4:
                             try:
-                                ics_data = gerar_ics_agendamento(agend)
-                                nome_arquivo = f"visita_{agend['local'].replace(' ', '_')}_{agend['data']}.ics"
+                                nome_arquivo = f"visita_{agend.local.replace(' ', '_')}_{agend.data}.ics"
                                 st.download_button(
                                     label="📅",
-                                    data=ics_data,
+                                    data=partial(gerar_ics_agendamento, agend),  # Gerado só no clique
                                     file_name=nome_arquivo,
                                     mime="text/calendar",
                                     use_container_width=True,
-                                    key=f"ics_cal_{agend['id']}",
+                                    key=f"ics_cal_{chave}",
                                     help="Calendário"
                                 )
                             except Exception as e:
                                 st.error(f"Erro: {str(e)}")
                         
+                        # Formulário de edição (se aberto nesta linha)
+                        if st.session_state.get(f'editing_agend_{serie.id}') == f"cal_{chave}":
+                            formulario_edicao_agendamento(serie, f"cal_{chave}")
+                        
                         st.divider()
             else:
                 st.info(f"📭 Nenhum agendamento em {data_selecionada.strftime('%d/%m/%Y')}")
@@ -1748,6 +2487,49 @@ elif menu_option == "📅 Calendário":
     
     # ===== SEÇÃO 3: AGENDAR NOVA VISITA =====
     with st.expander("➕ Agendar Nova Visita"):
+        st.session_state.setdefault('novo_agend_data', hoje)
+        st.session_state.setdefault('novo_agend_hora', dt_time(10, 0))
+        
+        # Sugestões de horários livres (expediente, sem feriados nem conflitos)
+        st.markdown("### 🕐 Horários Livres")
+        col_busca, col_duracao = st.columns(2)
+        with col_busca:
+            busca_inicio = st.date_input(
+                "📅 A partir de",
+                value=hoje,
+                min_value=hoje,
+                max_value=date(hoje.year + ANOS_PLANEJAMENTO, 12, 31),
+                format="DD/MM/YYYY",
+                key="busca_horario_inicio"
+            )
+        with col_duracao:
+            busca_duracao = st.selectbox(
+                "⏱️ Duração da visita",
+                DURACOES_VISITA,
+                index=DURACOES_VISITA.index(int(DURACAO_PADRAO.total_seconds() // 60)),
+                format_func=lambda minutos: f"{minutos} min",
+                key="busca_horario_duracao"
+            )
+        
+        sugestoes = horarios_livres(
+            busca_inicio, busca_inicio + timedelta(days=DIAS_BUSCA_HORARIOS),
+            quantidade=SUGESTOES_HORARIOS, duracao=timedelta(minutes=busca_duracao),
+            regiao=regiao_feriados
+        )
+        if sugestoes:
+            st.caption("Clique em um horário para preencher o formulário:")
+            colunas_sugestoes = st.columns(len(sugestoes))
+            for coluna, momento in zip(colunas_sugestoes, sugestoes):
+                with coluna:
+                    st.button(
+                        f"{DIAS_SEMANA[momento.weekday()]} {momento.strftime('%d/%m %H:%M')}",
+                        key=f"sugestao_{momento.strftime('%Y%m%d%H%M')}",
+                        on_click=_usar_horario_sugerido, args=(momento,),
+                        use_container_width=True
+                    )
+        else:
+            st.info(f"📭 Nenhum horário livre nos próximos {DIAS_BUSCA_HORARIOS} dias")
+        
         with st.form("form_novo_agendamento"):
             st.markdown("### 📝 Dados da Visita")
             
@@ -1756,16 +2538,16 @@ elif menu_option == "📅 Calendário":
             with col1:
                 nova_data = st.date_input(
                     "📅 Data *",
-                    value=datetime.now().date(),
-                    min_value=date(2026, 1, 1),
-                    max_value=date(2026, 12, 31),
-                    format="DD/MM/YYYY"
+                    min_value=date(hoje.year - 1, 1, 1),
+                    max_value=date(hoje.year + ANOS_PLANEJAMENTO, 12, 31),
+                    format="DD/MM/YYYY",
+                    key="novo_agend_data"
                 )
             
             with col2:
                 nova_hora = st.time_input(
                     "🕐 Hora *",
-                    value=dt_time(10, 0)
+                    key="novo_agend_hora"
                 )
             
             with col3:
@@ -1819,6 +2601,16 @@ elif menu_option == "📅 Calendário":
                 height=100
             )
             
+            col_repetir, col_vezes = st.columns(2)
+            with col_repetir:
+                nova_repeticao = st.selectbox("🔁 Repetir", list(REPETICOES))
+            with col_vezes:
+                novas_vezes = st.number_input("🔢 Nº de visitas da série", min_value=2, max_value=104, value=4)
+            nova_regra = f"{REPETICOES[nova_repeticao]};COUNT={novas_vezes}" if REPETICOES[nova_repeticao] else ""
+            nova_regra = normalizar_rrule(nova_regra)
+            
+            ignorar_conflitos = st.checkbox("⚠️ Agendar mesmo com conflito de horário")
+            
             submitted = st.form_submit_button(
                 "➕ Agendar Visita",
                 use_container_width=True,
@@ -1826,7 +2618,19 @@ elif menu_option == "📅 Calendário":
             )
             
             if submitted:
-                if nova_data and nova_hora and nova_categoria and novo_local:
+                conflitos = []
+                if nova_data and nova_hora and novo_local:
+                    conflitos = verificar_conflitos(Agendamento(
+                        id=0, data=nova_data, hora=nova_hora, categoria=nova_categoria,
+                        local=novo_local, endereco=novo_endereco, status=novo_status,
+                        rrule=nova_regra
+                    ), duracao=timedelta(minutes=busca_duracao))
+                
+                if conflitos and not ignorar_conflitos:
+                    st.warning("⚠️ **Conflito de horário** com visita(s) já agendada(s):\n\n" +
+                               "\n".join(f"- {descrever_conflito(c, 0)}" for c in conflitos))
+                    st.info("💡 Escolha outro horário ou marque **Agendar mesmo com conflito de horário**.")
+                elif nova_data and nova_hora and nova_categoria and novo_local:
                     try:
                         # Obter cor do status
                         cor = STATUS_CORES.get(novo_status, "#FF69B4")
@@ -1843,7 +2647,8 @@ elif menu_option == "📅 Calendário":
                                 observacao=nova_observacao,
                                 status=novo_status,
                                 link=novo_link,
-                                cor=cor
+                                cor=cor,
+                                rrule=nova_regra
                             )
                         
                         if result:
@@ -1870,6 +2675,17 @@ elif menu_option == "📅 Calendário":
                     if not novo_local:
                         st.warning("⚠️ Local é obrigatório")
     
+    # ===== CONFLITOS DE AGENDA =====
+    conflitos_agenda = relatorio_conflitos()
+    with st.expander(f"⚠️ Conflitos de Horário ({len(conflitos_agenda)})"):
+        if conflitos_agenda:
+            st.caption(f"Cada visita ocupa {int(DURACAO_PADRAO.total_seconds() // 3600)}h; visitas em locais "
+                       f"diferentes precisam de {int(INTERVALO_DESLOCAMENTO.total_seconds() // 60)} min de deslocamento.")
+            for conflito in conflitos_agenda:
+                st.markdown(f"- {descrever_conflito(conflito)}")
+        else:
+            st.success("✅ Nenhum conflito de horário na agenda!")
+    
     st.divider()
     
     # ===== SEÇÃO 4: TODOS OS AGENDAMENTOS =====
@@ -1893,131 +2709,24 @@ elif menu_option == "📅 Calendário":
     with col3:
         meses = ["Todos", "Janeiro", "Fevereiro", "Março", "Abril", "Maio", "Junho",
                  "Julho", "Agosto", "Setembro", "Outubro", "Novembro", "Dezembro"]
-        filtro_mes = st.selectbox("Mês:", meses)
-    
-    # Aplicar filtros
-    agendamentos_filtrados = agendamentos.copy()
-    
-    if filtro_categoria != "Todas":
-        agendamentos_filtrados = [a for a in agendamentos_filtrados if a['categoria'] == filtro_categoria]
-    
-    if filtro_status != "Todos":
-        agendamentos_filtrados = [a for a in agendamentos_filtrados if a['status'] == filtro_status]
+        filtro_mes = st.selectbox(
+            "Mês:",
+            [None] + meses_com_agendamentos(),
+            format_func=lambda mes: "Todos" if mes is None else f"{meses[mes[1]]}/{mes[0]}"
+        )
     
-    if filtro_mes != "Todos":
-        mes_num = meses.index(filtro_mes)
-        agendamentos_filtrados = [a for a in agendamentos_filtrados 
-                                   if parse_agend_date(a['data']).month == mes_num]
+    # Aplicar filtros (mesmo filtro serve para o banco: get_agendamentos_filtrados)
+    filtro = FiltroAgendamentos(
+        categoria=None if filtro_categoria == "Todas" else filtro_categoria,
+        status=None if filtro_status == "Todos" else filtro_status
+    )
+    if filtro_mes is not None:
+        filtro = FiltroAgendamentos.do_mes(*filtro_mes, filtro.categoria, filtro.status)
+    agendamentos_filtrados = filtrar_agendamentos(filtro)
     
-    # Mostrar agendamentos
+    # Mostrar agendamentos (uma página por vez)
     if agendamentos_filtrados:
-        st.write(f"**{len(agendamentos_filtrados)} agendamento(s) encontrado(s)**")
-        
-        for agend in agendamentos_filtrados:
-            data_agend = parse_agend_date(agend['data'])
-            
-            # Card para cada agendamento
-            with st.container():
-                col1, col2 = st.columns([4, 1])
-                
-                with col1:
-                    st.markdown(f"### {data_agend.strftime('%d/%m/%Y')} - {agend['hora']}")
-                    st.markdown(f"**{agend['categoria']} - {agend['local']}**")
-                    st.markdown(f"📊 Status: {agend.get('status', 'Agendado')}")
-                    
-                    if agend.get('endereco'):
-                        st.markdown(f"📍 {agend['endereco']}")
-                    if agend.get('contato'):
-                        st.markdown(f"👤 {agend['contato']}")
-                    if agend.get('telefone'):
-                        st.markdown(f"📞 {agend['telefone']}")
-                    if agend.get('observacao'):
-                        st.markdown(f"📝 {agend['observacao']}")
-                
-                with col2:
-                    if agend.get('link'):
-                        st.link_button("🗺️ Maps", agend['link'], use_container_width=True)
-                    
-                    if st.button("✏️ Editar", key=f"edit_all_{agend['id']}", use_container_width=True):
-                        st.session_state[f'editing_agend_{agend["id"]}'] = True
-                        st.rerun()
-                    
-                    if st.button("🗑️ Deletar", key=f"del_all_{agend['id']}", use_container_width=True):
-                        if delete_agendamento(agend['id']):
-                            st.success("✅ Agendamento deletado!")
-                            st.rerun()
-                    
-                    # Botão para exportar para calendário
-                    try:
-                        ics_data = gerar_ics_agendamento(agend)
-                        nome_arquivo = f"visita_{agend['local'].replace(' ', '_')}_{agend['data']}.ics"
-                        st.download_button(
-                            label="📅 Calendário",
-                            data=ics_data,
-                            file_name=nome_arquivo,
-                            mime="text/calendar",
-                            use_container_width=True,
-                            key=f"ics_all_{agend['id']}",
-                            help="Baixar e adicionar ao Google Calendar, Apple Calendar, Outlook, etc."
-                        )
-                    except Exception as e:
-                        st.error(f"Erro ao gerar .ics: {str(e)}")
-                
-                # Formulário de edição (se ativado)
-                if st.session_state.get(f'editing_agend_{agend["id"]}'):
-                    with st.form(f"form_edit_{agend['id']}"):
-                        st.markdown("#### ✏️ Editar Agendamento")
-                        
-                        edit_col1, edit_col2, edit_col3 = st.columns(3)
-                        
-                        with edit_col1:
-                            edit_data = st.date_input("Data", value=data_agend, format="DD/MM/YYYY")
-                        with edit_col2:
-                            hora_obj = parse_agend_time(agend['hora'])
-                            edit_hora = st.time_input("Hora", value=hora_obj)
-                        with edit_col3:
-                            edit_categoria = st.selectbox("Categoria", CATEGORIAS_AGENDAMENTO, 
-                                                          index=CATEGORIAS_AGENDAMENTO.index(agend['categoria']) if agend['categoria'] in CATEGORIAS_AGENDAMENTO else 0)
-                        
-                        edit_local = st.text_input("Local", value=agend['local'])
-                        edit_contato = st.text_input("Contato", value=agend.get('contato', ''))
-                        edit_telefone = st.text_input("Telefone", value=agend.get('telefone', ''))
-                        edit_status = st.selectbox("Status", STATUS_AGENDAMENTO,
-                                                    index=STATUS_AGENDAMENTO.index(agend['status']) if agend['status'] in STATUS_AGENDAMENTO else 0)
-                        edit_endereco = st.text_input("Endereço", value=agend.get('endereco', ''))
-                        edit_link = st.text_input("Link", value=agend.get('link', ''))
-                        edit_observacao = st.text_area("Observações", value=agend.get('observacao', ''))
-                        
-                        col_save, col_cancel = st.columns(2)
-                        with col_save:
-                            if st.form_submit_button("✅ Salvar", use_container_width=True, type="primary"):
-                                cor = STATUS_CORES.get(edit_status, "#FF69B4")
-                                
-                                update_data = {
-                                    "data": str(edit_data),
-                                    "hora": str(edit_hora),
-                                    "categoria": edit_categoria,
-                                    "local": edit_local,
-                                    "endereco": edit_endereco,
-                                    "telefone": edit_telefone,
-                                    "contato": edit_contato,
-                                    "observacao": edit_observacao,
-                                    "status": edit_status,
-                                    "link": edit_link,
-                                    "cor": cor
-                                }
-                                
-                                if update_agendamento(agend['id'], update_data):
-                                    st.session_state[f'editing_agend_{agend["id"]}'] = False
-                                    st.success("✅ Agendamento atualizado!")
-                                    st.rerun()
-                        
-                        with col_cancel:
-                            if st.form_submit_button("❌ Cancelar", use_container_width=True):
-                                st.session_state[f'editing_agend_{agend["id"]}'] = False
-                                st.rerun()
-                
-                st.divider()
+        lista_agendamentos(agendamentos_filtrados, filtro)
     else:
         st.info("📭 Nenhum agendamento encontrado com os filtros selecionados.")
     
@@ -2032,10 +2741,9 @@ elif menu_option == "📅 Calendário":
     with col1:
         if agendamentos:
             try:
-                ics_todos = gerar_ics_multiplos_agendamentos(agendamentos, "todas_visitas")
                 st.download_button(
                     label="📥 Baixar Todos os Agendamentos (.ics)",
-                    data=ics_todos,
+                    data=partial(gerar_ics_multiplos_agendamentos, agendamentos, "todas_visitas"),
                     file_name=f"casamento_visitas_todas_{datetime.now().strftime('%Y%m%d')}.ics",
                     mime="text/calendar",
                     use_container_width=True,
@@ -2051,10 +2759,9 @@ elif menu_option == "📅 Calendário":
     with col2:
         if agendamentos_filtrados and agendamentos_filtrados != agendamentos:
             try:
-                ics_filtrados = gerar_ics_multiplos_agendamentos(agendamentos_filtrados, "visitas_filtradas")
                 st.download_button(
                     label="📥 Baixar Agendamentos Filtrados (.ics)",
-                    data=ics_filtrados,
+                    data=partial(gerar_ics_multiplos_agendamentos, agendamentos_filtrados, "visitas_filtradas"),
                     file_name=f"casamento_visitas_filtradas_{datetime.now().strftime('%Y%m%d')}.ics",
                     mime="text/calendar",
                     use_container_width=True,
@@ -2064,6 +2771,26 @@ elif menu_option == "📅 Calendário":
             except Exception as e:
                 st.error(f"Erro ao gerar arquivo: {str(e)}")
     
+    # ===== ASSINATURA (WEBCAL) =====
+    config_feed = st.secrets.get("feed")
+    if config_feed:
+        porta_feed = int(config_feed.get("porta", 8502))
+        token_feed = config_feed.get("token", "")
+        try:
+            feed_ativo = iniciar_feed(porta_feed, token_feed, config_feed.get("endereco", "127.0.0.1"))
+        except ValueError:
+            feed_ativo = None
+            st.warning("⚠️ Feed do calendário desativado: defina `token` na seção [feed] dos secrets.")
+        except OSError as e:
+            feed_ativo = None
+            st.error(f"❌ Erro ao iniciar o feed do calendário: {e}")
+        if feed_ativo:
+            link_feed = url_feed(config_feed.get("host", "localhost"), porta_feed, token_feed)
+            st.markdown("#### 🔔 Assinar Calendário")
+            st.write("Assine o link abaixo no seu calendário para receber as alterações automaticamente, sem reimportar.")
+            st.code(link_feed, language=None)
+            st.link_button("📲 Assinar no Calendário", link_feed)
+    
     # ===== TUTORIAL =====
     with st.expander("❓ Como adicionar ao seu calendário"):
         st.markdown("""
@@ -2172,14 +2899,18 @@ elif menu_option == "📅 Calendário":
     
     ## 💡 **Dica Extra: Atualização Automática**
     
-    **Importante:** Os arquivos `.ics` são uma **exportação estática**. Se você editar/deletar um agendamento aqui, precisará:
+    **Importante:** Os arquivos `.ics` baixados são uma **exportação estática**. Se você editar/deletar um agendamento aqui, precisará:
     
     1. Deletar o evento antigo no seu calendário
     2. Exportar e importar novamente
     
     **OU**
     
-    Sempre usar o calendário deste app como referência principal e exportar apenas para ter lembretes no celular.
+    Use o link **🔔 Assinar Calendário** (quando o feed estiver habilitado): o calendário consulta o app periodicamente e recebe criações, edições e exclusões sozinho.
+    
+    - **Google Calendar:** Outras agendas → **"+"** → **"Do URL"** → cole o link
+    - **Apple Calendar:** Arquivo → **"Nova Assinatura de Calendário"** → cole o link
+    - **Outlook:** Adicionar calendário → **"Assinar da Web"** → cole o link
     """)
     
     # ===== ESTATÍSTICAS =====
@@ -2190,9 +2921,9 @@ elif menu_option == "📅 Calendário":
         col1, col2, col3, col4 = st.columns(4)
         
         total = len(agendamentos)
-        agendados = len([a for a in agendamentos if a['status'] == '⏳ Agendado'])
-        confirmados = len([a for a in agendamentos if a['status'] == '✅ Confirmado'])
-        concluidos = len([a for a in agendamentos if a['status'] == '✔️ Concluído'])
+        agendados = len([a for a in agendamentos if a.status == '⏳ Agendado'])
+        confirmados = len([a for a in agendamentos if a.status == '✅ Confirmado'])
+        concluidos = len([a for a in agendamentos if a.status == '✔️ Concluído'])
         
         with col1:
             st.metric("Total", total)
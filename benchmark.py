@@ -0,0 +1,501 @@
+"""
+Benchmarks das rotinas de cálculo
+Compara as versões vetorizadas (NumPy) com as versões escalares e
+verifica que os resultados são equivalentes.
+
+Execute: python benchmark.py
+"""
+import json
+import os
+import random
+import timeit
+import tracemalloc
+from bisect import bisect_left
+from dataclasses import replace
+from datetime import date, datetime, time, timedelta
+
+import numpy as np
+
+from utils.calendar_utils import (
+    gerar_ics_agendamento, gerar_ics_multiplos_agendamentos, gerar_ics_stream, TZ_SAO_PAULO
+)
+from utils.models import Agendamento, FiltroAgendamentos, Orcamento, decodificar
+from utils.busca import IndiceBusca, _documento_agendamento, _documento_orcamento, termos
+from utils.fornecedores import Mencao, RegistroFornecedores, _trigramas, semelhanca
+from utils.agenda import (
+    INTERVALO_DESLOCAMENTO, _classificar, _evento_agendamento, detectar_conflitos,
+    filtrar_indice, janela_mes
+)
+from utils.feriados import eventos_feriados
+from utils.calculations import (
+    calcular_investimento_mensal, calcular_investimento_mensal_vetorizado,
+    calcular_curva_acumulada, calcular_grade_cenarios, simular_monte_carlo,
+    calcular_fluxo_caixa, otimizar_orcamentos, formatar_moeda, formatar_moeda_vetorizado
+)
+from tests.test_ics import gerar_ics_referencia  # Montagem com icalendar (referência)
+
+
+def _cronometrar(funcao, repeticoes=5):
+    """Retorna o melhor tempo (em ms) de uma execução de funcao()"""
+    return min(timeit.repeat(funcao, number=1, repeat=repeticoes)) * 1000
+
+
+def bench_investimento_mensal(n=100_000):
+    """Aporte mensal: lista de chamadas escalares x uma chamada vetorizada"""
+    rng = random.Random(42)
+    casos = [
+        (rng.uniform(0, 50_000), rng.uniform(0, 80_000),
+         rng.choice([0.0, 0.0035, rng.uniform(0, 0.02)]), rng.randint(0, 120))
+        for _ in range(n)
+    ]
+    vp, vf, i, meses = (np.array(coluna, dtype=float) for coluna in zip(*casos))
+    
+    escalar = np.array([calcular_investimento_mensal(*c) for c in casos])
+    vetorizado = calcular_investimento_mensal_vetorizado(vp, vf, i, meses)
+    assert np.allclose(escalar, vetorizado, rtol=1e-12, atol=1e-9), "Resultados divergentes!"
+    
+    t_escalar = _cronometrar(lambda: [calcular_investimento_mensal(*c) for c in casos])
+    t_vetorizado = _cronometrar(lambda: calcular_investimento_mensal_vetorizado(vp, vf, i, meses))
+    _relatar(f"Aporte mensal ({n:,} combinações)", t_escalar, t_vetorizado)
+
+
+def bench_curva_acumulada(meses=360):
+    """Curva de projeção: laço por mês (como era no app) x curva vetorizada"""
+    vp, taxa, pmt = 30_000.0, 0.0035, 500.0
+    
+    def laco():
+        valores = []
+        for mes in range(meses + 1):
+            fator = (1 + taxa) ** mes
+            valores.append(vp * fator + pmt * ((fator - 1) / taxa))
+        return valores
+    
+    assert np.allclose(laco(), calcular_curva_acumulada(vp, taxa, meses, pmt), rtol=1e-12)
+    
+    t_escalar = _cronometrar(laco)
+    t_vetorizado = _cronometrar(lambda: calcular_curva_acumulada(vp, taxa, meses, pmt))
+    _relatar(f"Curva acumulada ({meses} meses)", t_escalar, t_vetorizado)
+
+
+def bench_grade_cenarios():
+    """Grade de cenários: laço triplo escalar x um lote vetorizado"""
+    taxas = np.linspace(0.0, 0.02, 41)
+    meses = np.arange(1, 121)
+    valores = np.linspace(0.0, 30_000.0, 21)
+    
+    def laco():
+        return [[[calcular_investimento_mensal(v, 30_000.0, t, int(m)) for v in valores]
+                 for m in meses] for t in taxas]
+    
+    assert np.allclose(laco(), calcular_grade_cenarios(taxas, meses, valores, 30_000.0),
+                       rtol=1e-12, atol=1e-9)
+    
+    t_escalar = _cronometrar(laco, repeticoes=3)
+    t_vetorizado = _cronometrar(lambda: calcular_grade_cenarios(taxas, meses, valores, 30_000.0))
+    _relatar(f"Grade de cenários ({taxas.size * meses.size * valores.size:,} combinações)",
+             t_escalar, t_vetorizado)
+
+
+def bench_monte_carlo(simulacoes=20_000):
+    """Monte Carlo: tempo de uma simulação completa (meta: < 200 ms)"""
+    # Sem volatilidade, a mediana deve coincidir com a curva determinística
+    sem_volatilidade = simular_monte_carlo(30_000.0, 500.0, 0.0035, 0.0, 60, 45_000.0,
+                                           numero_simulacoes=1_000)
+    assert np.allclose(sem_volatilidade['percentis'][50],
+                       calcular_curva_acumulada(30_000.0, 0.0035, 60, 500.0), rtol=1e-12)
+    
+    print(f"  Monte Carlo ({simulacoes:,} simulações)")
+    for meses in (12, 60, 120):
+        tempo = _cronometrar(lambda: simular_monte_carlo(
+            30_000.0, 500.0, 0.0035, 0.003, meses, 45_000.0, numero_simulacoes=simulacoes
+        ))
+        print(f"    {meses:3d} meses:  {tempo:10.3f} ms")
+
+
+def bench_fluxo_caixa(parcelas=500, meses=36):
+    """Fluxo de caixa: laço mês a mês sobre as parcelas x bincount vetorizado"""
+    rng = random.Random(42)
+    inicio = date(2026, 1, 1)
+    vencimentos = [inicio + timedelta(days=rng.randint(-30, meses * 31)) for _ in range(parcelas)]
+    valores = [round(rng.uniform(100, 3_000), 2) for _ in range(parcelas)]
+    vp, taxa, pmt = 30_000.0, 0.0035, 2_000.0
+    
+    def laco():
+        saldos = []
+        saldo = vp
+        for mes in range(meses + 1):
+            ano, numero_mes = inicio.year + mes // 12, mes % 12 + 1
+            saidas = sum(
+                valor for vencimento, valor in zip(vencimentos, valores)
+                if (vencimento.year, vencimento.month) == (ano, numero_mes)
+                or (mes == 0 and vencimento < inicio)
+            )
+            saldo = saldo - saidas if mes == 0 else saldo * (1 + taxa) + pmt - saidas
+            saldos.append(saldo)
+        return saldos
+    
+    vetorizado = lambda: calcular_fluxo_caixa(vp, taxa, pmt, meses, vencimentos, valores, inicio=inicio)
+    assert np.allclose(laco(), vetorizado()['saldo'], rtol=1e-9, atol=1e-6)
+    
+    t_escalar = _cronometrar(laco)
+    t_vetorizado = _cronometrar(vetorizado)
+    _relatar(f"Fluxo de caixa ({parcelas} parcelas, {meses} meses)", t_escalar, t_vetorizado)
+
+
+def bench_otimizador(categorias=40, por_categoria=15):
+    """Otimizador de orçamentos: tempo da programação dinâmica (uma escolha por categoria)"""
+    rng = random.Random(42)
+    nomes, valores, notas = [], [], []
+    for categoria in range(categorias):
+        for _ in range(por_categoria):
+            nomes.append(f"Categoria {categoria}")
+            valores.append(round(rng.uniform(300, 6_000), 2))
+            notas.append(rng.randint(0, 10))
+    limite = 0.6 * sum(valores) / por_categoria
+    
+    tempo = _cronometrar(lambda: otimizar_orcamentos(nomes, valores, notas, limite))
+    resultado = otimizar_orcamentos(nomes, valores, notas, limite)
+    assert resultado['viavel'] and resultado['total'] <= limite
+    print(f"  Otimizador ({categorias} categorias, {len(valores)} orçamentos)")
+    print(f"    programação dinâmica: {tempo:10.3f} ms")
+
+
+def bench_formatar_moeda(n=100_000):
+    """Formatação de moeda: três replace por valor x versão atual e em lote"""
+    rng = np.random.default_rng(42)
+    valores = rng.uniform(-1_000_000, 1_000_000, n).round(2).tolist()
+    
+    def antigo(valor):
+        return f"R$ {valor:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
+    
+    esperado = [antigo(valor) for valor in valores]
+    assert [formatar_moeda(valor) for valor in valores] == esperado
+    assert formatar_moeda_vetorizado(valores) == esperado
+    
+    t_antigo = _cronometrar(lambda: [antigo(valor) for valor in valores])
+    t_escalar = _cronometrar(lambda: [formatar_moeda(valor) for valor in valores])
+    t_lote = _cronometrar(lambda: formatar_moeda_vetorizado(valores))
+    _relatar(f"formatar_moeda ({n:,} valores, um a um)", t_antigo, t_escalar, ("3 replace", "2 replace"))
+    _relatar(f"formatar_moeda_vetorizado ({n:,} valores)", t_antigo, t_lote, ("3 replace", "em lote"))
+
+
+def _agendamentos_exemplo(n):
+    """Gera n agendamentos fictícios (datas, horários e revisões variados)"""
+    inicio = date(2026, 1, 5)
+    return [
+        Agendamento(
+            id=indice + 1,
+            data=inicio + timedelta(days=indice % 300),
+            hora=time(8 + indice % 10, 30 * (indice % 2)),
+            categoria="🍰 Buffet",
+            local=f"Fornecedor {indice}",
+            endereco=f"Rua {indice}, São Paulo",
+            telefone="(11) 98765-4321",
+            observacao="Levar lista de convidados; confirmar cardápio",
+            created_at=datetime(2025, 12, 1, 12, 0) + timedelta(minutes=indice),
+            revisao=indice % 3,
+            updated_at=datetime(2025, 12, 1, 12, 0) + timedelta(minutes=indice, days=indice % 3),
+            deleted_at=datetime(2026, 1, 2, 9, 0) if indice % 50 == 0 else None
+        )
+        for indice in range(n)
+    ]
+
+
+def bench_ics_cache(n=300):
+    """Arquivos .ics de uma lista: geração a cada rerun x cache LRU por conteúdo"""
+    agendamentos = _agendamentos_exemplo(n)
+    
+    def sem_cache():
+        return [gerar_ics_agendamento.__wrapped__(agend) for agend in agendamentos]
+    
+    def com_cache():
+        return [gerar_ics_agendamento(agend) for agend in agendamentos]
+    
+    com_cache()  # Aquece o cache (primeiro rerun)
+    t_escalar = _cronometrar(sem_cache, repeticoes=3)
+    t_cache = _cronometrar(com_cache)
+    _relatar(f".ics por visita ({n} agendamentos, reruns seguintes)", t_escalar, t_cache,
+             ("sem cache", "com cache"))
+
+
+def bench_ics_exportacao(n=3_000):
+    """Exportação em massa: icalendar x serializador direto (mesmos bytes)"""
+    agendamentos = _agendamentos_exemplo(n)
+    agora = TZ_SAO_PAULO.localize(datetime(2026, 1, 1, 12, 0, 0))
+    
+    referencia = gerar_ics_referencia(agendamentos, "todas_visitas", agora)
+    direto = gerar_ics_multiplos_agendamentos(agendamentos, "todas_visitas", agora)
+    assert direto == referencia, "Serializador direto divergiu do icalendar!"
+    
+    t_icalendar = _cronometrar(
+        lambda: gerar_ics_referencia(agendamentos, "todas_visitas", agora), repeticoes=3
+    )
+    t_direto = _cronometrar(lambda: gerar_ics_multiplos_agendamentos(agendamentos, "todas_visitas", agora))
+    _relatar(f"Exportação .ics ({n:,} agendamentos, {len(direto) / 1024:.0f} KiB)",
+             t_icalendar, t_direto, ("icalendar", "direto"))
+
+
+def bench_recorrencia(series=200, semanas=52):
+    """Compromissos semanais: uma linha por visita x uma série (RRULE) por compromisso"""
+    base = _agendamentos_exemplo(series)
+    series_rrule = [replace(a, rrule=f"FREQ=WEEKLY;COUNT={semanas}", deleted_at=None) for a in base]
+    linhas = [
+        replace(a, id=a.id * semanas + k, data=a.data + timedelta(weeks=k), deleted_at=None)
+        for a in base for k in range(semanas)
+    ]
+    agora = TZ_SAO_PAULO.localize(datetime(2026, 1, 1, 12, 0, 0))
+    
+    ics_linhas = gerar_ics_multiplos_agendamentos(linhas, "visitas", agora)
+    ics_series = gerar_ics_multiplos_agendamentos(series_rrule, "visitas", agora)
+    assert ics_series == gerar_ics_referencia(series_rrule, "visitas", agora)
+    t_linhas = _cronometrar(lambda: gerar_ics_multiplos_agendamentos(linhas, "visitas", agora))
+    t_series = _cronometrar(lambda: gerar_ics_multiplos_agendamentos(series_rrule, "visitas", agora))
+    _relatar(f"Exportação .ics recorrente ({len(linhas):,} visitas: "
+             f"{len(ics_linhas) / 1024:.0f} → {len(ics_series) / 1024:.0f} KiB)",
+             t_linhas, t_series, ("linhas", "séries"))
+    
+    # Expansão sob demanda: só as ocorrências do mês exibido
+    filtro = FiltroAgendamentos.do_mes(2026, 3)
+    ocorrencias = filtro.expandir(series_rrule)
+    assert [(a.id, a.data) for a in ocorrencias] == [
+        (a.id // semanas, a.data) for a in sorted(filtro.aplicar(linhas), key=lambda a: (a.data, a.hora, a.id))
+    ], "Ocorrências divergentes!"
+    t_expandir = _cronometrar(lambda: filtro.expandir(series_rrule))
+    print(f"  Expansão de {series} séries em um mês ({len(ocorrencias)} ocorrências): {t_expandir:.3f} ms")
+
+
+def bench_render_agendamentos(n=3_000, reruns=20):
+    """Derivados por rerun (conversão, fuso, emoji, mês) x campos prontos da leitura"""
+    agendamentos = _agendamentos_exemplo(n)
+    # Linhas como chegam do PostgREST (data e hora em texto)
+    linhas = [{**a.to_dict(), 'data': a.data.isoformat(), 'hora': a.hora.isoformat()}
+              for a in agendamentos]
+    
+    def emoji_da_categoria(categoria):
+        partes = categoria.split()
+        primeiro = partes[0] if partes else ""
+        return primeiro if primeiro and len(primeiro) <= 2 and ord(primeiro[0]) > 127 else "📅"
+    
+    def por_rerun():
+        # Como era: cada rerun convertia as strings e recalculava os derivados
+        for _ in range(reruns):
+            for linha in linhas:
+                data = date.fromisoformat(linha['data'])
+                inicio = TZ_SAO_PAULO.localize(datetime.combine(data, time.fromisoformat(linha['hora'])))
+                data.month, data.weekday(), emoji_da_categoria(linha['categoria']), inicio
+    
+    def na_leitura():
+        # Agora: uma conversão na leitura e os reruns apenas leem os campos
+        prontos = decodificar(Agendamento, linhas)
+        for _ in range(reruns):
+            for a in prontos:
+                a.mes, a.dia_semana, a.emoji, a.inicio
+    
+    t_rerun = _cronometrar(por_rerun, repeticoes=3)
+    t_leitura = _cronometrar(na_leitura, repeticoes=3)
+    _relatar(f"Derivados de agendamentos ({n:,} visitas, {reruns} reruns)", t_rerun, t_leitura,
+             ("por rerun", "na leitura"))
+
+
+def bench_calendario_janela(n=3_000):
+    """Eventos do calendário: todos a cada rerun x apenas o mês visível (busca binária)"""
+    agendamentos = sorted(_agendamentos_exemplo(n), key=lambda a: (a.data, a.hora, a.id))
+    datas = [a.data for a in agendamentos]
+    inicio, fim = janela_mes(date(2026, 3, 1))
+    
+    def todos():
+        anos = [a.data.year for a in agendamentos]
+        eventos = list(eventos_feriados.__wrapped__(date(min(anos), 1, 1), date(max(anos), 12, 31)))
+        eventos.extend(_evento_agendamento(a) for a in agendamentos)
+        return eventos
+    
+    def janela():
+        eventos = list(eventos_feriados.__wrapped__(inicio, fim - timedelta(days=1)))
+        fatia = agendamentos[bisect_left(datas, inicio):bisect_left(datas, fim)]
+        eventos.extend(_evento_agendamento(a) for a in fatia)
+        return eventos
+    
+    t_todos = _cronometrar(todos)
+    t_janela = _cronometrar(janela)
+    _relatar(f"Eventos do calendário ({n:,} visitas, sem cache)", t_todos, t_janela, ("todos", "mês visível"))
+    print(f"    payload:    {len(json.dumps(todos())) / 1024:8.0f} KiB -> {len(json.dumps(janela())) / 1024:.0f} KiB")
+
+
+def bench_filtro_agendamentos(n=20_000):
+    """Filtros da lista: cópia + três compreensões x filtro único com busca binária"""
+    agendamentos = sorted(_agendamentos_exemplo(n), key=lambda a: (a.data, a.hora, a.id))
+    datas = [a.data for a in agendamentos]
+    filtro = FiltroAgendamentos.do_mes(2026, 3, categoria="🍰 Buffet", status="⏳ Agendado")
+    
+    def tres_passadas():
+        filtrados = agendamentos.copy()
+        filtrados = [a for a in filtrados if a.categoria == filtro.categoria]
+        filtrados = [a for a in filtrados if a.status == filtro.status]
+        return [a for a in filtrados if a.data.year == 2026 and a.data.month == 3]
+    
+    assert tres_passadas() == filtrar_indice(datas, agendamentos, filtro), "Filtros divergentes!"
+    t_antes = _cronometrar(tres_passadas)
+    t_indice = _cronometrar(lambda: filtrar_indice(datas, agendamentos, filtro))
+    _relatar(f"Filtro de agendamentos ({n:,} visitas, um mês)", t_antes, t_indice, ("3 passadas", "índice"))
+
+
+def bench_conflitos(n=2_000):
+    """Conflitos de horário: todos os pares O(n²) x varredura com heap O(n log n)"""
+    agendamentos = [a for a in _agendamentos_exemplo(n) if a.deleted_at is None and 'Cancelado' not in a.status]
+    
+    def todos_os_pares():
+        conflitos = set()
+        for a in agendamentos:
+            for b in agendamentos:
+                if (a.inicio, a.id) < (b.inicio, b.id) and _classificar(a, b, INTERVALO_DESLOCAMENTO):
+                    conflitos.add((a.id, b.id))
+        return conflitos
+    
+    varredura = {(c.primeiro.id, c.segundo.id) for c in detectar_conflitos(agendamentos)}
+    assert todos_os_pares() == varredura, "Conflitos divergentes!"
+    t_pares = _cronometrar(todos_os_pares, repeticoes=1)
+    t_varredura = _cronometrar(lambda: detectar_conflitos(agendamentos))
+    _relatar(f"Conflitos de horário ({n:,} visitas)", t_pares, t_varredura, ("pares", "varredura"))
+
+
+def bench_busca(n=30_000):
+    """Busca global: varredura normalizando cada registro x índice invertido por prefixo"""
+    rng = random.Random(42)
+    palavras = ["Chácara", "Buffet", "Fotógrafo", "Decoração", "Igreja", "Música", "Salão",
+                "Flores", "Convite", "Bolo", "Vestido", "Maquiagem", "Aliança", "Transporte"]
+    orcamentos = [
+        Orcamento(
+            id=indice + 1, categoria_id=1, categoria=rng.choice(palavras),
+            fornecedor=f"{rng.choice(palavras)} {rng.choice(palavras)} {indice}",
+            valor=1000.0, telefone=f"(11) 9{rng.randrange(10**7, 10**8)}",
+            observacao=" ".join(rng.choice(palavras) for _ in range(8))
+        )
+        for indice in range(n // 2)
+    ]
+    documentos = {
+        "orcamentos": [_documento_orcamento(o) for o in orcamentos],
+        "agendamentos": [_documento_agendamento(a) for a in _agendamentos_exemplo(n // 2)],
+    }
+    indice = IndiceBusca()
+    for tabela, docs in documentos.items():
+        indice.atualizar_tabela(tabela, docs)
+    consultas = ["chacara", "Buf flo", "fornecedor 123", "98765", "decoração igreja bolo"]
+    
+    def varredura(consulta):
+        prefixos = set(termos(consulta))
+        return {
+            (resultado.tabela, resultado.id)
+            for docs in documentos.values() for resultado, texto in docs
+            if all(any(t.startswith(p) for t in termos(texto)) for p in prefixos)
+        }
+    
+    for consulta in consultas:
+        encontrados = {(r.tabela, r.id) for r in indice.buscar(consulta, limite=n)}
+        assert varredura(consulta) == encontrados, f"Busca divergente: {consulta}"
+    t_varredura = _cronometrar(lambda: [varredura(c) for c in consultas], repeticoes=1) / len(consultas)
+    t_indice = _cronometrar(lambda: [indice.buscar(c) for c in consultas]) / len(consultas)
+    _relatar(f"Busca global ({n:,} registros, por consulta)", t_varredura, t_indice, ("varredura", "índice"))
+    
+    # Após uma escrita só o registro alterado é reindexado
+    documentos["orcamentos"][0] = _documento_orcamento(replace(orcamentos[0], fornecedor="Zéfiro"))
+    assert indice.atualizar_tabela("orcamentos", documentos["orcamentos"]) == 1
+    assert [r.id for r in indice.buscar("zefiro")] == [1]
+    novo = IndiceBusca()
+    t_completo = _cronometrar(lambda: novo.atualizar_tabela("orcamentos", documentos["orcamentos"]), repeticoes=1)
+    t_incremental = _cronometrar(lambda: indice.atualizar_tabela("orcamentos", documentos["orcamentos"]))
+    _relatar(f"Reindexação após escrita ({n // 2:,} orçamentos)", t_completo, t_incremental,
+             ("completa", "incremental"))
+
+
+def bench_fornecedores(n=3_000, limiar=0.5):
+    """Sugestões de fornecedores parecidos: todos os pares x filtro de prefixo dos trigramas"""
+    rng = random.Random(42)
+    silabas = [consoante + vogal for consoante in "bcdfglmnprstv" for vogal in "aeiou"]
+    palavras = ["".join(rng.choice(silabas) for _ in range(rng.randint(2, 4))) for _ in range(400)]
+    
+    def grafia(nome):
+        # Erro de digitação: uma letra a menos ou trocada
+        i = rng.randrange(len(nome))
+        return nome[:i] + nome[i + 1:] if rng.random() < 0.5 else nome[:i] + rng.choice("aeiou") + nome[i + 1:]
+    
+    nomes = [" ".join(rng.sample(palavras, rng.randint(1, 3))) for _ in range(n)]
+    nomes += [grafia(nome) for nome in rng.sample(nomes, n // 10)]
+    registro = RegistroFornecedores([Mencao("orcamentos", i, nome) for i, nome in enumerate(nomes)])
+    
+    def todos_os_pares():
+        chaves = list(registro._raiz)
+        gramas = [_trigramas(chave) for chave in chaves]
+        melhores = {}
+        for i in range(len(chaves)):
+            for j in range(i + 1, len(chaves)):
+                par = tuple(sorted((registro._raiz[chaves[i]], registro._raiz[chaves[j]])))
+                valor = semelhanca(gramas[i], gramas[j])
+                if par[0] != par[1] and valor >= limiar and valor > melhores.get(par, 0.0):
+                    melhores[par] = valor
+        return sorted(melhores.values())
+    
+    assert todos_os_pares() == sorted(s.semelhanca for s in registro.sugestoes(limiar)), "Sugestões divergentes!"
+    t_pares = _cronometrar(todos_os_pares, repeticoes=1)
+    t_prefixo = _cronometrar(lambda: registro._juntar(limiar))
+    _relatar(f"Fornecedores parecidos ({len(nomes):,} nomes)", t_pares, t_prefixo, ("pares", "prefixo"))
+
+
+def _pico_memoria(funcao):
+    """Executa funcao() e retorna o pico de memória alocada (em KiB)"""
+    tracemalloc.start()
+    try:
+        funcao()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def bench_ics_stream(tamanhos=(1_000, 10_000)):
+    """Exportação em partes: pico de memória x arquivo inteiro em memória"""
+    print("  Exportação .ics em partes (pico de memória)")
+    for n in tamanhos:
+        def eventos():
+            # Agendamentos criados sob demanda, como em iterar_agendamentos
+            return (agend for pagina in range(0, n, 500)
+                    for agend in _agendamentos_exemplo(min(500, n - pagina)))
+        
+        def inteiro():
+            gerar_ics_multiplos_agendamentos(list(eventos()), "todas_visitas")
+        
+        def em_partes():
+            with open(os.devnull, "wb") as destino:
+                for parte in gerar_ics_stream(eventos(), "todas_visitas", total=n):
+                    destino.write(parte)
+        
+        print(f"    {n:6,} eventos: inteiro {_pico_memoria(inteiro):9.0f} KiB | "
+              f"em partes {_pico_memoria(em_partes):6.0f} KiB")
+
+
+def _relatar(nome, t_antes, t_depois, rotulos=("escalar", "vetorizado")):
+    print(f"  {nome}")
+    print(f"    {rotulos[0] + ':':<12}{t_antes:10.3f} ms")
+    print(f"    {rotulos[1] + ':':<12}{t_depois:10.3f} ms  ({t_antes / t_depois:.1f}x)")
+
+
+if __name__ == "__main__":
+    print("=" * 80)
+    print("⏱️  BENCHMARKS - Gerenciador de Casamento")
+    print("=" * 80)
+    bench_investimento_mensal()
+    bench_curva_acumulada()
+    bench_grade_cenarios()
+    bench_monte_carlo()
+    bench_fluxo_caixa()
+    bench_otimizador()
+    bench_formatar_moeda()
+    bench_render_agendamentos()
+    bench_calendario_janela()
+    bench_filtro_agendamentos()
+    bench_conflitos()
+    bench_busca()
+    bench_fornecedores()
+    bench_ics_cache()
+    bench_ics_exportacao()
+    bench_recorrencia()
+    bench_ics_stream()
+    print("=" * 80)
@@ -12,11 +12,50 @@ CREATE TABLE IF NOT EXISTS agendamentos (
     status VARCHAR(50) DEFAULT '⏳ Agendado',
     link TEXT,
     cor VARCHAR(20) DEFAULT '#FF69B4',
-    created_at TIMESTAMP DEFAULT NOW()
+    created_at TIMESTAMP DEFAULT NOW(),
+    revisao INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT NOW(),
+    deleted_at TIMESTAMP,
+    rrule TEXT,
+    exdates DATE[] NOT NULL DEFAULT '{}'
 );
 
+-- Controle de alterações (para tabelas criadas antes destas colunas)
+ALTER TABLE agendamentos ADD COLUMN IF NOT EXISTS revisao INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE agendamentos ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP DEFAULT NOW();
+ALTER TABLE agendamentos ADD COLUMN IF NOT EXISTS deleted_at TIMESTAMP;
+UPDATE agendamentos SET updated_at = created_at WHERE updated_at IS NULL;
+
+-- Recorrência: RRULE (RFC 5545, sem o prefixo "RRULE:") e datas excluídas da série
+ALTER TABLE agendamentos ADD COLUMN IF NOT EXISTS rrule TEXT;
+ALTER TABLE agendamentos ADD COLUMN IF NOT EXISTS exdates DATE[] NOT NULL DEFAULT '{}';
+
+-- Cada alteração incrementa a revisão (SEQUENCE no .ics) e atualiza updated_at
+CREATE OR REPLACE FUNCTION agendamentos_nova_revisao()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.revisao := OLD.revisao + 1;
+    NEW.updated_at := NOW();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_agendamentos_revisao ON agendamentos;
+CREATE TRIGGER trg_agendamentos_revisao
+    BEFORE UPDATE ON agendamentos
+    FOR EACH ROW EXECUTE FUNCTION agendamentos_nova_revisao();
+
 -- Índice para busca por data
 CREATE INDEX IF NOT EXISTS idx_agendamentos_data ON agendamentos(data);
 
--- Índice para busca por status
-CREATE INDEX IF NOT EXISTS idx_agendamentos_status ON agendamentos(status);
+-- Índices compostos dos filtros (categoria/status + período), só dos ativos.
+-- Substituem o antigo índice simples por status.
+DROP INDEX IF EXISTS idx_agendamentos_status;
+CREATE INDEX IF NOT EXISTS idx_agendamentos_categoria_data ON agendamentos(categoria, data, hora) WHERE deleted_at IS NULL;
+CREATE INDEX IF NOT EXISTS idx_agendamentos_status_data ON agendamentos(status, data, hora) WHERE deleted_at IS NULL;
+
+-- Índice para os agendamentos ativos (exclusão lógica via deleted_at)
+CREATE INDEX IF NOT EXISTS idx_agendamentos_ativos ON agendamentos(data, hora) WHERE deleted_at IS NULL;
+
+-- Índice para as séries recorrentes (entram em qualquer período a partir do início)
+CREATE INDEX IF NOT EXISTS idx_agendamentos_recorrentes ON agendamentos(data) WHERE rrule IS NOT NULL AND deleted_at IS NULL;
@@ -0,0 +1,11 @@
+-- SQL para criar tabela de unificações de fornecedores
+-- (grafias diferentes do mesmo fornecedor em orçamentos, itens e agendamentos)
+CREATE TABLE IF NOT EXISTS fornecedor_aliases (
+    id SERIAL PRIMARY KEY,
+    alias TEXT UNIQUE NOT NULL,
+    canonico TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT NOW()
+);
+
+-- Índice para listar as unificações de um fornecedor
+CREATE INDEX IF NOT EXISTS idx_fornecedor_aliases_canonico ON fornecedor_aliases(canonico);
@@ -0,0 +1,16 @@
+-- SQL para criar tabela de parcelas (pagamentos dos itens contratados)
+CREATE TABLE IF NOT EXISTS parcelas (
+    id SERIAL PRIMARY KEY,
+    item_id INTEGER NOT NULL REFERENCES items(id) ON DELETE CASCADE,
+    vencimento DATE NOT NULL,
+    valor DECIMAL(10,2) NOT NULL,
+    paga BOOLEAN DEFAULT FALSE,
+    descricao TEXT DEFAULT '',
+    created_at TIMESTAMP DEFAULT NOW()
+);
+
+-- Índice para busca por vencimento (fluxo de caixa)
+CREATE INDEX IF NOT EXISTS idx_parcelas_vencimento ON parcelas(vencimento);
+
+-- Índice para busca das parcelas de um item
+CREATE INDEX IF NOT EXISTS idx_parcelas_item ON parcelas(item_id);
@@ -0,0 +1,81 @@
+-- SQL para criar views e funções de agregação (Dashboard, Relatórios e Orçamentos)
+-- Execute no SQL Editor do Supabase depois de database_setup.sql
+
+-- Totais de itens por status
+CREATE OR REPLACE VIEW resumo_items_status AS
+SELECT
+    COALESCE(status, 'Pendente') AS status,
+    COUNT(*)::INT AS quantidade,
+    COALESCE(SUM(preco), 0)::FLOAT8 AS total
+FROM items
+GROUP BY COALESCE(status, 'Pendente');
+
+-- Totais de orçamentos por categoria
+CREATE OR REPLACE VIEW resumo_orcamentos_categoria AS
+SELECT
+    c.nome AS categoria,
+    COUNT(o.id)::INT AS quantidade,
+    COALESCE(SUM(o.valor), 0)::FLOAT8 AS total
+FROM orcamentos o
+JOIN categorias c ON c.id = o.categoria_id
+GROUP BY c.nome;
+
+-- Contagem de tarefas
+CREATE OR REPLACE VIEW resumo_tasks AS
+SELECT
+    COUNT(*)::INT AS total,
+    COUNT(*) FILTER (WHERE concluida)::INT AS concluidas
+FROM tasks;
+
+-- Função RPC: todos os resumos em uma única resposta
+CREATE OR REPLACE FUNCTION resumo_totais()
+RETURNS JSON
+LANGUAGE SQL
+STABLE
+AS $$
+    SELECT json_build_object(
+        'items_por_status', COALESCE(
+            (SELECT json_object_agg(status, json_build_object('quantidade', quantidade, 'total', total))
+             FROM resumo_items_status),
+            '{}'::JSON
+        ),
+        'orcamentos_por_categoria', COALESCE(
+            (SELECT json_object_agg(categoria, json_build_object('quantidade', quantidade, 'total', total))
+             FROM resumo_orcamentos_categoria),
+            '{}'::JSON
+        ),
+        'tasks', (SELECT json_build_object('total', total, 'concluidas', concluidas) FROM resumo_tasks)
+    );
+$$;
+
+-- Função RPC: tudo o que o Dashboard exibe em uma única resposta
+-- (métricas, séries dos gráficos e as 5 primeiras tarefas pendentes)
+CREATE OR REPLACE FUNCTION dashboard_summary()
+RETURNS JSON
+LANGUAGE SQL
+STABLE
+AS $$
+    SELECT json_build_object(
+        'orcamento_maximo', COALESCE(
+            (SELECT valor::FLOAT8 FROM config WHERE chave = 'orcamento_maximo'),
+            30000.0
+        ),
+        'total_orcado', (SELECT COALESCE(SUM(total), 0)::FLOAT8 FROM resumo_items_status),
+        'tasks', (SELECT json_build_object('total', total, 'concluidas', concluidas) FROM resumo_tasks),
+        'gastos', COALESCE(
+            (SELECT json_agg(json_build_object('item', item, 'preco', preco::FLOAT8) ORDER BY id)
+             FROM items WHERE preco > 0),
+            '[]'::JSON
+        ),
+        'status', COALESCE(
+            (SELECT json_agg(json_build_object('status', status, 'quantidade', quantidade))
+             FROM resumo_items_status),
+            '[]'::JSON
+        ),
+        'tarefas_pendentes', COALESCE(
+            (SELECT json_agg(json_build_object('id', id, 'tarefa', tarefa) ORDER BY id)
+             FROM (SELECT id, tarefa FROM tasks WHERE NOT concluida ORDER BY id LIMIT 5) p),
+            '[]'::JSON
+        )
+    );
+$$;
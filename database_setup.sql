@@ -215,9 +215,14 @@ CREATE TABLE IF NOT EXISTS orcamentos (
   valor DECIMAL(10,2) NOT NULL,
   telefone TEXT,
   observacao TEXT,
+  nota INTEGER DEFAULT 5,
   created_at TIMESTAMP DEFAULT NOW()
 );
 
+-- Nota de preferência (0 a 10) usada pelo otimizador de orçamentos
+-- (para bancos criados antes desta coluna)
+ALTER TABLE orcamentos ADD COLUMN IF NOT EXISTS nota INTEGER DEFAULT 5;
+
 -- Dados iniciais de categorias
 INSERT INTO categorias (nome) VALUES
 ('Buffet'),
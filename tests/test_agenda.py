@@ -0,0 +1,177 @@
+"""
+Testes de conflitos de horário e horários livres da agenda (utils/agenda.py)
+"""
+from datetime import date, datetime, time, timedelta
+
+import pytest
+
+from utils import agenda
+from utils.agenda import (
+    HORIZONTE_RECORRENCIA, INTERVALO_DESLOCAMENTO, detectar_conflitos, horarios_livres,
+    verificar_conflitos
+)
+from utils.models import TZ_SAO_PAULO, Agendamento
+
+DIA = date(2026, 3, 10)  # Terça-feira
+
+
+def _visita(id, hora, dia=DIA, local="Buffet", **campos):
+    return Agendamento(id=id, data=dia, hora=time(*hora), categoria="🍰 Buffet", local=local, **campos)
+
+
+@pytest.fixture
+def agenda_com(monkeypatch):
+    """Define os agendamentos lidos pela agenda (sem banco) e limpa os caches"""
+    caches = (agenda._indice, agenda._expandido, agenda._ocupados, agenda._conflitos)
+
+    def definir(*agendamentos):
+        monkeypatch.setattr(agenda, "get_all_agendamentos", lambda: list(agendamentos))
+        for cache in caches:
+            cache.clear()
+
+    yield definir
+    for cache in caches:
+        cache.clear()
+
+
+def _pares(conflitos):
+    return [(c.primeiro.id, c.segundo.id, c.tipo, c.folga) for c in conflitos]
+
+
+def test_detectar_sobreposicao_e_deslocamento():
+    conflitos = detectar_conflitos([
+        _visita(1, (10, 0)),
+        _visita(2, (10, 30)),                   # Sobrepõe a 1
+        _visita(3, (11, 45), local="Salão"),    # 15 min depois da 2, outro local
+        _visita(4, (13, 15), local="Salão"),    # Mesmo local da 3, logo depois
+        _visita(5, (14, 45), local="Igreja"),   # Exatamente o deslocamento mínimo
+        _visita(6, (10, 0), status="🚫 Cancelado"),
+    ])
+    assert _pares(conflitos) == [
+        (1, 2, "sobreposição", timedelta(minutes=-30)),
+        (2, 3, "deslocamento", timedelta(minutes=15)),
+    ]
+    assert INTERVALO_DESLOCAMENTO == timedelta(minutes=30)
+
+
+def test_detectar_conflitos_na_virada_do_dia():
+    conflitos = detectar_conflitos([
+        _visita(1, (23, 30)),
+        _visita(2, (0, 15), dia=DIA + timedelta(days=1), local="Salão"),
+        _visita(3, (0, 45), dia=DIA + timedelta(days=1), local="Salão"),
+    ])
+    assert _pares(conflitos) == [
+        (1, 2, "sobreposição", timedelta(minutes=-15)),
+        (1, 3, "deslocamento", timedelta(minutes=15)),
+        (2, 3, "sobreposição", timedelta(minutes=-30)),
+    ]
+
+
+def test_verificar_conflitos_usa_a_duracao_da_visita(agenda_com):
+    agenda_com(_visita(1, (12, 0), local="Salão"))
+    nova = _visita(0, (10, 30))
+    assert verificar_conflitos(nova) == []
+    assert _pares(verificar_conflitos(nova, duracao=timedelta(minutes=90))) == [
+        (0, 1, "deslocamento", timedelta(0))
+    ]
+    assert _pares(verificar_conflitos(nova, duracao=timedelta(hours=2))) == [
+        (0, 1, "sobreposição", timedelta(minutes=-30))
+    ]
+    # A própria visita (mesmo id) é ignorada ao editar
+    assert verificar_conflitos(_visita(1, (12, 30), local="Salão")) == []
+
+
+def test_verificar_conflitos_com_vizinhos_em_outros_dias(agenda_com):
+    anterior = _visita(1, (23, 30), dia=DIA - timedelta(days=1))
+    seguinte = _visita(2, (1, 0), dia=DIA + timedelta(days=1), local="Salão")
+    agenda_com(anterior, seguinte)
+
+    assert _pares(verificar_conflitos(_visita(0, (0, 10)))) == [(1, 0, "sobreposição", timedelta(minutes=-20))]
+    assert verificar_conflitos(_visita(0, (22, 0))) == []
+    assert _pares(verificar_conflitos(_visita(0, (23, 30)), duracao=timedelta(hours=2))) == [
+        (0, 2, "sobreposição", timedelta(minutes=-30))
+    ]
+
+
+def _momento(dia, hora, minuto=0):
+    return TZ_SAO_PAULO.localize(datetime(dia.year, dia.month, dia.day, hora, minuto))
+
+
+def _livres(inicio, fim=None, agora=None, **opcoes):
+    agora = agora or _momento(inicio - timedelta(days=1), 0)
+    return horarios_livres(inicio, fim or inicio, quantidade=10, agora=agora, **opcoes)
+
+
+def test_ocupados_une_blocos_sobrepostos_e_encostados(agenda_com):
+    agenda_com(
+        _visita(1, (10, 0)),
+        _visita(2, (11, 0)),                              # Sobrepõe o bloco da 1
+        _visita(3, (13, 0)),                              # Encosta no bloco da 2 (12:30)
+        _visita(4, (16, 0)),
+        _visita(5, (16, 30), status="🚫 Cancelado"),
+    )
+    inicios, fins = agenda._ocupados(0, INTERVALO_DESLOCAMENTO)
+    assert list(zip(inicios, fins)) == [
+        (_momento(DIA, 9, 30), _momento(DIA, 14, 30)),
+        (_momento(DIA, 15, 30), _momento(DIA, 17, 30)),
+    ]
+
+
+def test_um_horario_por_espaco_livre(agenda_com):
+    agenda_com(_visita(1, (10, 0)), _visita(2, (11, 0)), _visita(3, (13, 30)))
+    # 09:00-09:30 e 12:30-13:00 são curtos demais para 1h
+    assert _livres(DIA) == [_momento(DIA, 15, 0)]
+    assert _livres(DIA, duracao=timedelta(minutes=30)) == [
+        _momento(DIA, 9, 0), _momento(DIA, 12, 30), _momento(DIA, 15, 0)
+    ]
+
+
+def test_limites_do_horario_comercial(agenda_com):
+    agenda_com(_visita(1, (15, 30)))
+    # Ocupado até 17:00: a última visita de 1h cabe exatamente até as 18:00
+    assert _livres(DIA, duracao=timedelta(hours=6)) == [_momento(DIA, 9, 0)]
+    assert _livres(DIA)[-1] == _momento(DIA, 17, 0)
+    assert _livres(DIA, duracao=timedelta(hours=1, minutes=30)) == [_momento(DIA, 9, 0)]
+
+    sabado = date(2026, 3, 14)
+    assert _livres(sabado, duracao=timedelta(hours=4)) == [_momento(sabado, 9, 0)]
+    assert _livres(sabado, duracao=timedelta(hours=4, minutes=30)) == []
+    # Horários já passados não são sugeridos (arredondados ao passo de 30 min)
+    assert _livres(DIA, agora=_momento(DIA, 17, 5)) == []
+    assert _livres(DIA, agora=_momento(DIA, 10, 10))[0] == _momento(DIA, 10, 30)
+
+
+def test_pula_feriados_e_fins_de_semana(agenda_com):
+    agenda_com()
+    sexta_santa = date(2026, 4, 3)
+    assert _livres(sexta_santa, sexta_santa + timedelta(days=3)) == [
+        _momento(date(2026, 4, 4), 9, 0), _momento(date(2026, 4, 6), 9, 0)
+    ]
+    # Feriado estadual só com a região
+    revolucao = date(2026, 7, 9)
+    assert _livres(revolucao) == [_momento(revolucao, 9, 0)]
+    assert _livres(revolucao, regiao="SP") == []
+
+
+def test_ocorrencias_recorrentes_ocupam_a_agenda(agenda_com):
+    segunda = date(2026, 3, 9)
+    agenda_com(_visita(1, (9, 0), dia=segunda - timedelta(weeks=4), rrule="FREQ=WEEKLY"))
+    assert _livres(segunda, segunda + timedelta(days=1)) == [
+        _momento(segunda, 10, 30), _momento(segunda + timedelta(days=1), 9, 0)
+    ]
+
+
+def test_series_sem_fim_expandidas_ate_o_horizonte(agenda_com):
+    hoje = date.today()
+    sem_fim = _visita(1, (9, 0), dia=hoje - timedelta(weeks=2), rrule="FREQ=WEEKLY")
+    com_count = _visita(2, (15, 0), dia=hoje, rrule="FREQ=DAILY;COUNT=3", local="Salão")
+    unica = _visita(3, (11, 0), dia=hoje + timedelta(days=400), local="Igreja")
+    agenda_com(sem_fim, com_count, unica)
+
+    expandido = agenda._expandido(0)
+    ocorrencias = [a.data for a in expandido if a.id == 1]
+    limite = unica.data + HORIZONTE_RECORRENCIA  # Horizonte conta da última visita
+    assert ocorrencias[0] == sem_fim.data
+    assert limite - timedelta(weeks=1) <= ocorrencias[-1] < limite
+    assert [a.data for a in expandido if a.id == 2] == [hoje + timedelta(days=k) for k in range(3)]
+    assert expandido == sorted(expandido, key=lambda a: (a.data, a.hora, a.id))
@@ -0,0 +1,44 @@
+"""
+Testes da busca global (utils/busca.py)
+"""
+from utils import busca
+from utils.busca import IndiceBusca, Resultado
+
+
+def _documento(registro):
+    id, texto = registro
+    return Resultado("tasks", id, texto, "", "✅ Checklist"), texto
+
+
+def test_busca_sem_acentos_e_por_prefixo():
+    indice = IndiceBusca()
+    indice.atualizar_tabela("tasks", map(_documento, [(1, "Visitar a Chácara"), (2, "Provar o buffet")]))
+    assert [r.id for r in indice.buscar("chacara")] == [1]
+    assert [r.id for r in indice.buscar("BUF")] == [2]
+    assert indice.buscar("buffet chacara") == []
+
+
+def test_falha_na_consulta_mantem_o_indice_anterior(monkeypatch):
+    registros = [(1, "Visitar a Chácara"), (2, "Provar o buffet")]
+
+    def consultar():
+        if registros is None:
+            raise ConnectionError("sem conexão")
+        return registros
+
+    monkeypatch.setattr(busca, "FONTES", {"tasks": (consultar, _documento)})
+    indice = IndiceBusca()
+    assert indice.sincronizar(agora=0.0) == []
+    assert len(indice) == 2
+
+    # Falha depois do TTL: nada é removido e a tabela continua pendente
+    registros = None
+    assert indice.sincronizar(agora=busca.TTL_BUSCA + 1) == ["tasks"]
+    assert [r.id for r in indice.buscar("chacara")] == [1]
+    assert indice.sincronizar(agora=busca.TTL_BUSCA + 2) == ["tasks"]
+
+    # Na próxima consulta bem-sucedida a tabela é atualizada
+    registros = [(2, "Provar o buffet")]
+    assert indice.sincronizar(agora=busca.TTL_BUSCA + 3) == []
+    assert indice.buscar("chacara") == []
+    assert len(indice) == 1
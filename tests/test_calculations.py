@@ -0,0 +1,219 @@
+"""
+Testes das rotinas de cálculo (utils/calculations.py)
+"""
+import itertools
+import random
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.calculations import (
+    calcular_curva_acumulada, calcular_fluxo_caixa, calcular_grade_cenarios,
+    calcular_investimento_mensal, calcular_investimento_mensal_vetorizado, dividir_em_parcelas,
+    formatar_moeda, formatar_moeda_vetorizado, otimizar_orcamentos, simular_monte_carlo
+)
+
+TAXAS = [0.0, 0.0001, 0.0035, 0.01, 0.02]
+PRAZOS = [0, 1, 12, 60, 120, 360]
+VALORES_INICIAIS = [0.0, 15_000.0, 50_000.0, 120_000.0]
+
+CATEGORIAS = [0, 0, 1, 1, 1, 2, 2, 2]
+VALORES = [12053.02, 13645.61, 5629.91, 2837.18, 10869.69, 8190.16, 4546.98, 7762.2]
+NOTAS = [8, 5, 7, 6, 7, 7, 7, 5]
+LIMITE = 19443.8
+
+
+def _curva_laco(valor_inicial, taxa, numero_meses, aporte):
+    """Curva mês a mês como o Planejamento calculava antes da versão vetorizada"""
+    valores = [valor_inicial]
+    for mes in range(1, numero_meses + 1):
+        fator = (1 + taxa) ** mes
+        if aporte <= 0:
+            valor_aportes = 0
+        elif taxa == 0:
+            valor_aportes = aporte * mes
+        else:
+            valor_aportes = aporte * ((fator - 1) / taxa)
+        valores.append(valor_inicial * fator + valor_aportes)
+    return valores
+
+
+def _forca_bruta(categorias, valores, notas, limite):
+    """Melhor (nota, -custo) entre todas as combinações que cabem no limite"""
+    opcoes = {}
+    for posicao, categoria in enumerate(categorias):
+        opcoes.setdefault(categoria, []).append(posicao)
+    melhor = None
+    for combinacao in itertools.product(*opcoes.values()):
+        centavos = sum(round(valores[p] * 100) for p in combinacao)
+        if centavos <= round(limite * 100):
+            chave = (sum(notas[p] for p in combinacao), -centavos)
+            melhor = max(melhor or chave, chave)
+    return melhor
+
+
+@pytest.mark.parametrize("valor_final", [0.0, 30_000.0, 80_000.0])
+def test_investimento_mensal_vetorizado_igual_ao_escalar(valor_final):
+    taxas, meses, valores = np.meshgrid(TAXAS, PRAZOS, VALORES_INICIAIS, indexing='ij')
+    escalar = np.vectorize(calcular_investimento_mensal)(valores, valor_final, taxas, meses)
+    np.testing.assert_allclose(
+        calcular_investimento_mensal_vetorizado(valores, valor_final, taxas, meses),
+        escalar, rtol=1e-12, atol=1e-9
+    )
+    np.testing.assert_allclose(
+        calcular_grade_cenarios(TAXAS, PRAZOS, VALORES_INICIAIS, valor_final),
+        escalar, rtol=1e-12, atol=1e-9
+    )
+
+
+@pytest.mark.parametrize("taxa", TAXAS)
+@pytest.mark.parametrize("aporte", [0.0, 500.0, 2_750.55])
+def test_curva_acumulada_igual_ao_laco(taxa, aporte):
+    for valor_inicial in VALORES_INICIAIS:
+        for numero_meses in PRAZOS:
+            np.testing.assert_allclose(
+                calcular_curva_acumulada(valor_inicial, taxa, numero_meses, aporte),
+                _curva_laco(valor_inicial, taxa, numero_meses, aporte), rtol=1e-12, atol=1e-9
+            )
+
+
+def test_curva_acumulada_em_lote_preenche_nan_apos_o_prazo():
+    curvas = calcular_curva_acumulada(10_000.0, 0.0035, np.array([2, 4]), 100.0)
+    assert curvas.shape == (2, 5)
+    assert np.isnan(curvas[0, 3:]).all()
+    np.testing.assert_allclose(curvas[1], _curva_laco(10_000.0, 0.0035, 4, 100.0), rtol=1e-12)
+
+
+def test_monte_carlo_reproduzivel_pela_semente():
+    argumentos = (30_000.0, 500.0, 0.0035, 0.004, 24, 45_000.0)
+    primeira = simular_monte_carlo(*argumentos, numero_simulacoes=2_000, semente=7)
+    segunda = simular_monte_carlo(*argumentos, numero_simulacoes=2_000, semente=7)
+    outra = simular_monte_carlo(*argumentos, numero_simulacoes=2_000, semente=8)
+
+    for percentil, faixa in primeira['percentis'].items():
+        np.testing.assert_array_equal(faixa, segunda['percentis'][percentil])
+        assert faixa.shape == (25,) and faixa[0] == 30_000.0
+    assert primeira['probabilidade_meta'] == segunda['probabilidade_meta']
+    assert not np.array_equal(primeira['valores_finais'], outra['valores_finais'])
+    assert list(primeira['percentis']) == [5, 25, 50, 75, 95]
+    assert (np.diff(np.vstack(list(primeira['percentis'].values())), axis=0) >= 0).all()
+
+
+def test_monte_carlo_igual_a_simulacao_mes_a_mes():
+    resultado = simular_monte_carlo(10_000.0, 800.0, 0.005, 0.05, 12, 20_000.0,
+                                    numero_simulacoes=300, semente=3)
+    # Mesmos sorteios, na mesma ordem, aplicados mês a mês
+    taxas = np.random.default_rng(3).standard_normal(size=(12, 300)) * 0.05 + 0.005
+    saldo = np.full(300, 10_000.0)
+    for mes in range(12):
+        saldo = saldo * np.maximum(1.0 + taxas[mes], 0.01) + 800.0
+    np.testing.assert_allclose(resultado['valores_finais'], saldo, rtol=1e-10)
+    assert resultado['probabilidade_meta'] == np.mean(saldo >= 20_000.0)
+
+    sem_volatilidade = simular_monte_carlo(10_000.0, 800.0, 0.005, 0.0, 12, 20_000.0, numero_simulacoes=10)
+    np.testing.assert_allclose(sem_volatilidade['percentis'][50],
+                               calcular_curva_acumulada(10_000.0, 0.005, 12, 800.0), rtol=1e-12)
+
+
+@pytest.mark.parametrize("total, numero", [(1000.0, 3), (100.01, 7), (0.05, 4), (8400.0, 1), (12345.67, 12)])
+def test_parcelas_somam_exatamente_o_total(total, numero):
+    parcelas = dividir_em_parcelas(total, numero, date(2026, 1, 10))
+    valores = [p['valor'] for p in parcelas]
+    assert len(valores) == numero
+    assert sum(round(v * 100) for v in valores) == round(total * 100)
+    assert len(set(valores[:-1])) <= 1 and 0 <= valores[-1] - valores[0] < numero / 100
+    assert [p['descricao'] for p in parcelas] == [f"{k}/{numero}" for k in range(1, numero + 1)]
+
+
+def test_vencimentos_no_fim_do_mes_e_na_virada_do_ano():
+    parcelas = dividir_em_parcelas(400.0, 5, date(2027, 10, 31))
+    assert [p['vencimento'] for p in parcelas] == [
+        date(2027, 10, 31), date(2027, 11, 30), date(2027, 12, 31), date(2028, 1, 31), date(2028, 2, 29)
+    ]
+
+
+def test_fluxo_de_caixa_agrupa_por_mes_entre_anos():
+    vencimentos = [date(2026, 9, 5), date(2026, 11, 30), date(2026, 12, 1), date(2027, 1, 1),
+                   date(2027, 1, 31), date(2027, 2, 10), date(2027, 3, 1)]
+    valores = [100.0, 200.0, 300.0, 400.0, 500.0, 600.0, 700.0]
+    fluxo = calcular_fluxo_caixa(5_000.0, 0.01, 1_000.0, 3, vencimentos, valores, inicio=date(2026, 11, 15))
+
+    # Vencidas entram no mês 0; março de 2027 fica fora do horizonte de 3 meses
+    assert [str(mes) for mes in fluxo['meses']] == ["2026-11", "2026-12", "2027-01", "2027-02"]
+    np.testing.assert_array_equal(fluxo['saidas'], [300.0, 300.0, 900.0, 600.0])
+    assert fluxo['fora_do_horizonte'] == 700.0
+
+    saldo, esperado = 5_000.0 - 300.0, [4_700.0]
+    for saidas in (300.0, 900.0, 600.0):
+        saldo = saldo * 1.01 + 1_000.0 - saidas
+        esperado.append(saldo)
+    np.testing.assert_allclose(fluxo['saldo'], esperado, rtol=1e-12)
+    assert not fluxo['deficit'].any()
+    assert calcular_fluxo_caixa(100.0, 0.0, 0.0, 1, [date(2026, 12, 1)], [150.0],
+                                inicio=date(2026, 11, 1))['deficit'].tolist() == [False, True]
+
+
+@pytest.mark.parametrize("valor, esperado", [
+    (0, "R$ 0,00"),
+    (-0.0, "R$ -0,00"),
+    (0.005, "R$ 0,01"),
+    (1234.5, "R$ 1.234,50"),
+    (-1234.567, "R$ -1.234,57"),
+    (999999.999, "R$ 1.000.000,00"),
+    (1_000_000, "R$ 1.000.000,00"),
+    (-98_765_432.1, "R$ -98.765.432,10"),
+    (float("nan"), "R$ nan"),
+])
+def test_formatar_moeda_em_lote_igual_ao_escalar(valor, esperado):
+    assert formatar_moeda(valor) == esperado
+    assert formatar_moeda_vetorizado([valor]) == [esperado]
+    serie = formatar_moeda_vetorizado(pd.Series([valor, 1.0], index=["a", "b"], name="valor"))
+    assert serie.tolist() == [esperado, "R$ 1,00"]
+    assert list(serie.index) == ["a", "b"] and serie.name == "valor"
+
+
+def test_formatar_moeda_em_lote_vazio_e_numpy():
+    assert formatar_moeda_vetorizado([]) == []
+    valores = np.array([-1.5, 0.0, 2_500_000.25, np.nan])
+    assert formatar_moeda_vetorizado(valores) == [formatar_moeda(v) for v in valores]
+
+
+@pytest.mark.parametrize("resolucao", [None, 1.0])
+def test_otimizador_nunca_estoura_o_limite(resolucao):
+    resultado = otimizar_orcamentos(CATEGORIAS, VALORES, NOTAS, LIMITE, resolucao=resolucao)
+    assert resultado['viavel']
+    assert resultado['total'] <= LIMITE
+    assert sorted(CATEGORIAS[p] for p in resultado['escolhidos']) == [0, 1, 2]
+    assert (resultado['nota_total'], -round(resultado['total'] * 100)) == _forca_bruta(
+        CATEGORIAS, VALORES, NOTAS, LIMITE
+    )
+
+
+def test_otimizador_exato_perto_do_limite():
+    resultado = otimizar_orcamentos(["a", "a", "b", "b", "c", "c"],
+                                    [3333.01, 100.0, 3333.01, 100.0, 3333.01, 100.0],
+                                    [5, 1, 5, 1, 5, 1], 10000)
+    assert resultado['nota_total'] == 15
+    assert resultado['total'] == pytest.approx(9999.03)
+
+
+def test_otimizador_inviavel_devolve_os_mais_baratos():
+    resultado = otimizar_orcamentos(CATEGORIAS, VALORES, NOTAS, 10000)
+    assert not resultado['viavel']
+    assert list(resultado['escolhidos']) == [0, 3, 6]
+
+
+def test_otimizador_igual_a_forca_bruta():
+    rng = random.Random(34)
+    for _ in range(200):
+        categorias = [rng.randrange(4) for _ in range(rng.randint(1, 9))]
+        valores = [round(rng.uniform(100, 9000), 2) for _ in categorias]
+        notas = [rng.randint(0, 10) for _ in categorias]
+        limite = round(rng.uniform(0.3, 1.2) * sum(valores) / 2, 2)
+        resultado = otimizar_orcamentos(categorias, valores, notas, limite)
+        esperado = _forca_bruta(categorias, valores, notas, limite)
+        assert resultado['viavel'] == (esperado is not None)
+        if esperado is not None:
+            assert (resultado['nota_total'], -round(resultado['total'] * 100)) == esperado
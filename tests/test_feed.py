@@ -0,0 +1,89 @@
+"""
+Testes do feed de calendário (utils/feed.py)
+"""
+import threading
+from http.server import ThreadingHTTPServer
+from urllib.error import HTTPError
+from urllib.parse import quote
+from urllib.request import Request, urlopen
+
+import pytest
+
+from utils import feed
+from utils.feed import CAMINHO_FEED, _criar_handler
+
+TOKEN = "segredo-çã"
+
+
+class _CacheFixo:
+    """Substitui o _FeedCache: sempre o mesmo calendário (ou um erro)"""
+
+    ttl = 300
+    erro = None
+
+    def obter(self):
+        if self.erro:
+            raise self.erro
+        return '"abc123"', b"BEGIN:VCALENDAR\r\nEND:VCALENDAR\r\n"
+
+
+@pytest.fixture
+def servidor():
+    cache = _CacheFixo()
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), _criar_handler(cache, TOKEN))
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    yield servidor, cache
+    servidor.shutdown()
+    servidor.server_close()
+
+
+def _get(servidor, token, cabecalhos=None, caminho=CAMINHO_FEED):
+    url = f"http://127.0.0.1:{servidor.server_address[1]}{caminho}?token={quote(token)}"
+    try:
+        with urlopen(Request(url, headers=cabecalhos or {}), timeout=5) as resposta:
+            return resposta.status, dict(resposta.headers), resposta.read()
+    except HTTPError as erro:
+        return erro.code, dict(erro.headers), b""
+
+
+@pytest.mark.parametrize("token", ["", "errado", "ç", TOKEN + "x"])
+def test_token_invalido_responde_403(servidor, token):
+    assert _get(servidor[0], token)[0] == 403
+
+
+def test_token_correto_responde_200_e_304_com_etag(servidor):
+    status, cabecalhos, corpo = _get(servidor[0], TOKEN)
+    assert status == 200
+    assert cabecalhos['ETag'] == '"abc123"'
+    assert corpo.startswith(b"BEGIN:VCALENDAR")
+
+    status, cabecalhos, corpo = _get(servidor[0], TOKEN, {'If-None-Match': 'W/"abc123", "outro"'})
+    assert (status, cabecalhos['ETag'], corpo) == (304, '"abc123"', b"")
+    assert _get(servidor[0], TOKEN, {'If-None-Match': '"outro"'})[0] == 200
+
+
+def test_caminho_desconhecido_e_falha_no_banco(servidor):
+    assert _get(servidor[0], TOKEN, caminho="/outro.ics")[0] == 404
+    servidor[1].erro = ConnectionError("sem conexão")
+    assert _get(servidor[0], TOKEN)[0] == 503
+
+
+def test_falha_ao_iniciar_nao_fica_em_cache():
+    with pytest.raises(ValueError):
+        feed.iniciar_feed(0, "")
+
+    # Porta ocupada: a falha não é guardada e a próxima chamada tenta de novo
+    ocupante = ThreadingHTTPServer(("127.0.0.1", 0), _criar_handler(_CacheFixo(), TOKEN))
+    porta = ocupante.server_address[1]
+    with pytest.raises(OSError):
+        feed.iniciar_feed(porta, TOKEN)
+    ocupante.server_close()
+
+    servidor = feed.iniciar_feed(porta, TOKEN)
+    try:
+        assert feed.iniciar_feed(porta, TOKEN) is servidor
+        assert servidor.server_address[1] == porta
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
+        feed.iniciar_feed.clear()
@@ -0,0 +1,29 @@
+"""
+Testes do índice de feriados (utils/feriados.py)
+"""
+from datetime import date
+
+import pytest
+
+from utils.feriados import feriados_periodo, nome_feriado
+
+
+@pytest.mark.parametrize("regiao", [None, "SP"])
+@pytest.mark.parametrize("dia", [date(2026, 10, 28), date(2026, 12, 24), date(2026, 12, 31), date(2026, 2, 18)])
+def test_pontos_facultativos_comuns_nao_sao_feriados(dia, regiao):
+    assert nome_feriado(dia, regiao) is None
+
+
+def test_carnaval_e_corpus_christi_sao_feriados():
+    assert nome_feriado(date(2026, 2, 16)) == "Carnaval"
+    assert nome_feriado(date(2026, 2, 17)) == "Carnaval"
+    assert nome_feriado(date(2026, 6, 4)) == "Corpus Christi"
+    assert nome_feriado(date(2027, 5, 27)) == "Corpus Christi"
+
+
+def test_feriados_estaduais_e_periodo_entre_anos():
+    assert nome_feriado(date(2026, 7, 9)) is None
+    assert nome_feriado(date(2026, 7, 9), "SP") == "Revolução Constitucionalista"
+    assert [dia for dia, _ in feriados_periodo(date(2026, 12, 20), date(2027, 1, 5))] == [
+        date(2026, 12, 25), date(2027, 1, 1)
+    ]
@@ -0,0 +1,54 @@
+"""
+Testes do cadastro de fornecedores (utils/fornecedores.py)
+"""
+import pandas as pd
+
+from utils.fornecedores import Mencao, RegistroFornecedores, totais_por_fornecedor
+
+
+def _registro(*nomes_telefones):
+    return RegistroFornecedores(
+        Mencao("orcamentos", i, nome, telefone) for i, (nome, telefone) in enumerate(nomes_telefones)
+    )
+
+
+def test_mesmo_telefone_e_nome_normalizado_formam_um_grupo():
+    registro = _registro(
+        ("Buffet Marquinhos", "(11) 98765-4321"),
+        ("Marquinhos Buffet Ltda", ""),
+        ("Buffet do Zé", "+55 11 98765-4321"),
+    )
+    assert registro.canonico("marquinhos buffet") == "Buffet Marquinhos"
+    assert registro.canonico("Buffet do Zé") == "Buffet Marquinhos"
+    assert registro.canonico("Outro", "8765-4321") == "Buffet Marquinhos"
+    assert registro.canonico(" Desconhecido ") == "Desconhecido"
+
+
+def test_sugestoes_ignoram_numeros_diferentes():
+    registro = _registro(("Buffet Marquinhos", ""), ("Bufet Marquinho", ""), ("Salão 1", ""), ("Salão 2", ""))
+    sugestoes = registro.sugestoes()
+    assert [(s.manter, s.unir) for s in sugestoes] == [("Bufet Marquinho", "Buffet Marquinhos")]
+
+
+def test_totais_por_fornecedor_com_categoria_categorica():
+    # frame_orcamentos() entrega categoria como Categorical, com categorias
+    # sem orçamentos; no pandas 2 o groupby sem observed=True fazia o produto
+    df = pd.DataFrame({
+        'categoria': pd.Categorical(["Buffet", "Buffet", "Fotografia"],
+                                    categories=["Buffet", "Fotografia", "DJ/Música"]),
+        'fornecedor': ["Buffet Marquinhos", "Marquinhos Buffet", "Sá Teles"],
+        'telefone': ["", "", ""],
+        'valor': [8400.0, 9000.0, 1780.0],
+    })
+    registro = _registro(*zip(df['fornecedor'], df['telefone']))
+
+    totais = totais_por_fornecedor(df, registro)
+
+    assert totais[['categoria', 'fornecedor', 'quantidade', 'menor', 'total']].astype(
+        {'categoria': str}
+    ).values.tolist() == [
+        ["Buffet", "Buffet Marquinhos", 2, 8400.0, 17400.0],
+        ["Fotografia", "Sá Teles", 1, 1780.0, 1780.0],
+    ]
+    por_categoria = totais.groupby('categoria', observed=True)['fornecedor'].size()
+    assert por_categoria.to_dict() == {"Buffet": 1, "Fotografia": 1}
@@ -0,0 +1,268 @@
+"""
+Testes da exportação .ics (utils/calendar_utils.py)
+
+O serializador direto deve produzir exatamente os mesmos bytes que a
+montagem com a biblioteca icalendar (gerar_ics_referencia, abaixo).
+"""
+import random
+from dataclasses import replace
+from datetime import date, datetime, time, timedelta, timezone
+
+import pytest
+from icalendar import Alarm, Calendar, Event, vRecur
+
+from utils.calendar_utils import (
+    DURACAO_PADRAO, TZ_SAO_PAULO, _datas_controle, _exdates, _series, _status_evento,
+    gerar_ics_agendamento, gerar_ics_multiplos_agendamentos, gerar_ics_stream
+)
+from utils.models import Agendamento, normalizar_rrule
+
+AGORA = TZ_SAO_PAULO.localize(datetime(2026, 10, 19, 15, 4, 5, 123))
+# Caracteres que exigem escape, dobra ou cuidado com UTF-8 (inclui CRLF e \N)
+ALFABETO = "abc XYZ;,\\^\n\r\t😀çã—éN:\"'" + "\\N"
+
+
+def gerar_ics_referencia(agendamentos, nome_arquivo="visitas", agora=None):
+    """
+    Gera o .ics de múltiplos agendamentos montando objetos icalendar
+
+    Implementação de referência de gerar_ics_multiplos_agendamentos.
+
+    Args:
+        agendamentos (list): Lista de agendamentos (Agendamento)
+        nome_arquivo (str): Nome base do arquivo
+        agora (datetime): Momento usado em DTSTAMP/CREATED dos agendamentos
+            sem datas de controle (padrão: agora)
+
+    Returns:
+        bytes: Conteúdo do arquivo .ics
+    """
+    agendamentos = list(_series(agendamentos))
+    cal = Calendar()
+
+    # Propriedades do calendário
+    cal.add('prodid', '-//Gerenciador de Casamento//douglas-s29//PT-BR')
+    cal.add('version', '2.0')
+    cal.add('calscale', 'GREGORIAN')
+    cal.add('method', 'PUBLISH')
+    cal.add('x-wr-calname', f'Casamento - {nome_arquivo.title()}')
+    cal.add('x-wr-timezone', 'America/Sao_Paulo')
+    cal.add('x-wr-caldesc', f'Agendamentos de visitas para o casamento ({len(agendamentos)} eventos)')
+
+    agora = agora or datetime.now(TZ_SAO_PAULO)
+    agora_utc = agora.astimezone(timezone.utc).replace(microsecond=0)
+
+    for agendamento in agendamentos:
+        try:
+            evento = Event()
+            inicio = agendamento.inicio
+
+            evento.add('uid', f"agendamento-{agendamento.id}@casamento.douglas-s29.streamlit.app")
+            evento.add('summary', f"{agendamento.categoria} - {agendamento.local}")
+            evento.add('dtstart', inicio)
+            evento.add('dtend', inicio + DURACAO_PADRAO)
+            criado, modificado = _datas_controle(agendamento, agora_utc)
+            evento.add('dtstamp', modificado)
+            evento.add('sequence', agendamento.revisao)
+            evento.add('created', criado)
+            evento.add('last-modified', modificado)
+
+            if agendamento.rrule:
+                evento.add('rrule', vRecur.from_ical(agendamento.rrule))
+                if agendamento.exdates:
+                    evento.add('exdate', _exdates(agendamento))
+
+            descricao = f"📅 Visita: {agendamento.categoria}\n"
+            descricao += f"🏢 Local: {agendamento.local}\n\n"
+            if agendamento.contato:
+                descricao += f"👤 Contato: {agendamento.contato}\n"
+            if agendamento.telefone:
+                descricao += f"📞 Telefone: {agendamento.telefone}\n"
+            if agendamento.observacao:
+                descricao += f"\n📝 Observações:\n{agendamento.observacao}\n"
+            if agendamento.link:
+                descricao += f"\n🔗 Link: {agendamento.link}\n"
+            descricao += f"\n📊 Status: {agendamento.status}\n"
+            descricao += "\n💍 Gerenciador de Casamento"
+            evento.add('description', descricao)
+
+            if agendamento.endereco:
+                evento.add('location', agendamento.endereco)
+            evento.add('status', _status_evento(agendamento))
+            categoria = agendamento.categoria.replace('🍰 ', '').replace('🏛️ ', '').replace('📸 ', '').strip()
+            evento.add('categories', [categoria, 'Casamento'])
+            evento.add('color', agendamento.cor)
+            if agendamento.link:
+                evento.add('url', agendamento.link)
+
+            # Alarme 1 dia antes às 9h, só se for antes do evento e a visita não foi excluída
+            dia_anterior_9h = TZ_SAO_PAULO.localize(
+                datetime.combine(agendamento.data - timedelta(days=1), time(9, 0))
+            )
+            trigger_1dia = dia_anterior_9h - inicio
+            if trigger_1dia.total_seconds() < 0 and agendamento.deleted_at is None:
+                alarme = Alarm()
+                alarme.add('action', 'DISPLAY')
+                alarme.add('description', f"Lembrete: {agendamento.local}")
+                alarme.add('trigger', trigger_1dia)
+                evento.add_component(alarme)
+
+            cal.add_component(evento)
+        except (ValueError, KeyError, TypeError, AttributeError):
+            continue
+
+    cal.add_missing_timezones()
+    return cal.to_ical()
+
+
+def _texto(rng, tamanho):
+    return ''.join(rng.choice(ALFABETO) for _ in range(rng.randint(0, tamanho)))
+
+
+def _momento(rng):
+    """Data de controle ausente, ingênua ou com fuso"""
+    sorteio = rng.random()
+    if sorteio < 0.3:
+        return None
+    momento = datetime(2025, 1, 1) + timedelta(seconds=rng.randint(0, 10**8), microseconds=rng.randint(0, 999_999))
+    return momento if sorteio < 0.7 else momento.replace(tzinfo=timezone(timedelta(hours=-3)))
+
+
+def _regra(rng):
+    partes = [f"freq={rng.choice(['daily', 'weekly', 'monthly', 'yearly'])}"]
+    if rng.random() < 0.5:
+        partes.append(f"count={rng.randint(1, 30):03d}")
+    elif rng.random() < 0.5:
+        partes.append("until=20271231T235959Z")
+    if rng.random() < 0.5:
+        partes.append(f"interval={rng.randint(1, 3)}")
+    if rng.random() < 0.3:
+        partes.append("byday=MO,WE,FR")
+    if rng.random() < 0.2:
+        partes.append("wkst=SU")
+    rng.shuffle(partes)
+    return normalizar_rrule(";".join(partes))
+
+
+def _agendamentos_aleatorios(semente, n=400):
+    """Agendamentos com escapes, emoji, CRLF, linhas longas, datas de horário de verão e séries"""
+    rng = random.Random(semente)
+    agendamentos = []
+    for indice in range(n):
+        # 2017-2019 inclui as transições do horário de verão de São Paulo
+        data = date.fromordinal(date(2017, 1, 1).toordinal() + rng.randint(0, 4000))
+        agendamento = Agendamento(
+            id=indice,
+            data=data,
+            hora=time(rng.randint(0, 23), rng.choice([0, 15, 30, 59]), rng.choice([0, 0, 17])),
+            categoria=rng.choice(["🍰 Buffet", "📸 Fotografia", "Outro " + _texto(rng, 5)]),
+            local=_texto(rng, 40) or "x",
+            endereco=_texto(rng, 60),
+            telefone=_texto(rng, 10),
+            contato=_texto(rng, 10),
+            observacao=_texto(rng, 300),
+            status=rng.choice(["⏳ Agendado", "✅ Confirmado", "🚫 Cancelado", "✔️ Concluído"]),
+            link=rng.choice(["", "https://maps.google.com/?q=a,b;c^d\\e" + _texto(rng, 80).replace("\r", "").replace("\n", "")]),
+            cor=rng.choice(["#FF69B4", "#FFF;,"]),
+            created_at=_momento(rng),
+            revisao=rng.randint(0, 9),
+            updated_at=_momento(rng),
+            deleted_at=_momento(rng) if rng.random() < 0.3 else None,
+        )
+        if rng.random() < 0.3:
+            exdates = {data + timedelta(days=rng.randint(1, 400)) for _ in range(rng.randint(0, 40))}
+            agendamento = replace(agendamento, rrule=_regra(rng), exdates=tuple(sorted(exdates)))
+        agendamentos.append(agendamento)
+    return agendamentos
+
+
+@pytest.mark.parametrize("semente", [7, 29, 2026])
+@pytest.mark.parametrize("nome_arquivo", ["visitas", "todas_visitas", "a,b;c"])
+def test_serializador_direto_igual_ao_icalendar(semente, nome_arquivo):
+    agendamentos = _agendamentos_aleatorios(semente)
+    direto = gerar_ics_multiplos_agendamentos(agendamentos, nome_arquivo, AGORA)
+    assert direto == gerar_ics_referencia(agendamentos, nome_arquivo, AGORA)
+    assert b"".join(gerar_ics_stream(iter(agendamentos), nome_arquivo, AGORA, total=len(agendamentos))) == direto
+    assert all(len(linha) <= 75 for linha in direto.split(b"\r\n"))
+
+
+def test_ocorrencias_expandidas_viram_a_serie():
+    agendamentos = _agendamentos_aleatorios(48)
+    ocorrencias = []
+    for agendamento in agendamentos:
+        fim = agendamento.data + timedelta(days=60)
+        ocorrencias.extend(list(agendamento.ocorrencias(agendamento.data, fim))[:3] or [agendamento])
+    assert any(a.serie is not None for a in ocorrencias)
+
+    direto = gerar_ics_multiplos_agendamentos(ocorrencias, "visitas", AGORA)
+    assert direto == gerar_ics_referencia(ocorrencias, "visitas", AGORA)
+    assert direto == gerar_ics_multiplos_agendamentos(agendamentos, "visitas", AGORA)
+
+    ocorrencia = next(a for a in ocorrencias if a.serie is not None)
+    assert gerar_ics_agendamento(ocorrencia) == gerar_ics_agendamento(ocorrencia.serie)
+
+
+def test_link_com_quebra_de_linha_e_ignorado():
+    valido = Agendamento(id=1, data=date(2026, 3, 10), hora=time(14, 0), categoria="🍰 Buffet", local="Buffet")
+    invalido = replace(valido, id=2, link="https://exemplo.com/\r\nX-INJETADO:1")
+    direto = gerar_ics_multiplos_agendamentos([valido, invalido], "visitas", AGORA)
+    assert direto.count(b"BEGIN:VEVENT") == 1
+    assert b"X-INJETADO" not in direto
+
+
+def _propriedades(ics):
+    """Linhas desdobradas de cada VEVENT, como {propriedade: valor}"""
+    eventos = []
+    for linha in ics.replace(b"\r\n ", b"").decode('utf-8').split("\r\n"):
+        if linha == "BEGIN:VEVENT":
+            eventos.append({})
+        elif eventos and linha != "END:VEVENT" and ":" in linha:
+            nome, _, valor = linha.partition(":")
+            eventos[-1].setdefault(nome, valor)
+    return eventos
+
+
+def test_exclusao_vira_cancelamento_com_sequence_maior():
+    ativo = Agendamento(id=42, data=date(2026, 5, 20), hora=time(15, 0), categoria="📸 Fotografia",
+                        local="Estúdio", created_at=datetime(2026, 1, 5, 12, 0),
+                        revisao=2, updated_at=datetime(2026, 2, 1, 18, 30))
+    # Soft delete é um UPDATE: o banco incrementa a revisão e grava deleted_at (UTC)
+    excluido = replace(ativo, revisao=3, updated_at=datetime(2026, 3, 2, 9, 15),
+                       deleted_at=datetime(2026, 3, 2, 9, 15))
+
+    antes, depois = (
+        _propriedades(gerar_ics_multiplos_agendamentos([a], "visitas", AGORA))[0] for a in (ativo, excluido)
+    )
+    assert antes["UID"] == depois["UID"] == "agendamento-42@casamento.douglas-s29.streamlit.app"
+    assert (antes["SEQUENCE"], antes["STATUS"]) == ("2", "TENTATIVE")
+    assert (depois["SEQUENCE"], depois["STATUS"]) == ("3", "CANCELLED")
+    assert antes["LAST-MODIFIED"] == antes["DTSTAMP"] == "20260201T183000Z"
+    assert depois["LAST-MODIFIED"] == depois["DTSTAMP"] == "20260302T091500Z"
+    assert antes["CREATED"] == depois["CREATED"] == "20260105T120000Z"
+
+    ics = gerar_ics_multiplos_agendamentos([excluido], "visitas", AGORA)
+    assert b"BEGIN:VALARM" not in ics
+    assert ics == gerar_ics_referencia([excluido], "visitas", AGORA)
+    assert b"STATUS:CANCELLED" in gerar_ics_agendamento(excluido)
+
+    # deleted_at com fuso é convertido para UTC
+    com_fuso = replace(excluido, deleted_at=datetime(2026, 3, 2, 6, 15, tzinfo=timezone(timedelta(hours=-3))))
+    assert _propriedades(gerar_ics_multiplos_agendamentos([com_fuso], "visitas", AGORA))[0]["LAST-MODIFIED"] == (
+        "20260302T091500Z"
+    )
+
+
+def test_vtimezone_antes_dos_eventos():
+    verao = Agendamento(id=1, data=date(2018, 1, 20), hora=time(10, 0), categoria="🍰 Buffet", local="Buffet")
+    outra = replace(verao, id=2, data=date(2026, 3, 10))
+    for ics in (gerar_ics_multiplos_agendamentos([verao, outra], "visitas", AGORA), gerar_ics_agendamento(verao)):
+        assert ics.count(b"BEGIN:VTIMEZONE") == 1
+        assert b"BEGIN:VTIMEZONE\r\nTZID:America/Sao_Paulo\r\n" in ics
+        assert ics.index(b"X-WR-TIMEZONE") < ics.index(b"END:VTIMEZONE") < ics.index(b"BEGIN:VEVENT")
+        # Horário de verão de 2017/2018 (-02) coberto pelo bloco
+        assert b"TZOFFSETTO:-0200" in ics and b"20180218T000000" in ics.replace(b"\r\n ", b"")
+
+    # Sem eventos, nenhum TZID é referenciado
+    vazio = gerar_ics_multiplos_agendamentos([], "visitas", AGORA)
+    assert b"VTIMEZONE" not in vazio
+    assert vazio == gerar_ics_referencia([], "visitas", AGORA)
@@ -0,0 +1,105 @@
+"""
+Testes dos modelos e da recorrência de agendamentos (utils/models.py)
+"""
+from datetime import date, time, timedelta
+
+import pytest
+
+from utils.models import Agendamento, FiltroAgendamentos, normalizar_rrule
+
+INICIO = date(2026, 3, 10)  # Terça-feira
+
+
+def _serie(rrule, exdates=(), **campos):
+    return Agendamento(id=7, data=INICIO, hora=time(19, 0), categoria="🍰 Buffet", local="Ensaio",
+                       rrule=normalizar_rrule(rrule), exdates=tuple(exdates), **campos)
+
+
+def _datas(agendamentos):
+    return [a.data for a in agendamentos]
+
+
+class _ConsultaGravada:
+    """Consulta do PostgREST que só registra os predicados recebidos"""
+
+    def __init__(self):
+        self.chamadas = []
+
+    def __getattr__(self, metodo):
+        def gravar(*args):
+            self.chamadas.append((metodo, *args))
+            return self
+        return gravar
+
+
+def test_normalizar_rrule_forma_canonica():
+    assert normalizar_rrule("RRULE:count=04;interval=02;freq=weekly") == "FREQ=WEEKLY;COUNT=4;INTERVAL=2"
+    assert normalizar_rrule("  ") == ""
+    with pytest.raises(ValueError):
+        normalizar_rrule("FREQ=WEEKLY;FOO=1")
+    with pytest.raises(ValueError):
+        normalizar_rrule("FREQ=WEEKLY;UNTIL=20261231")  # UNTIL sem Z (fora de UTC)
+
+
+def test_ocorrencias_com_count_e_until():
+    semanal = _serie("FREQ=WEEKLY;COUNT=4")
+    ocorrencias = list(semanal.ocorrencias(date(2026, 1, 1), date(2027, 1, 1)))
+    assert _datas(ocorrencias) == [INICIO + timedelta(weeks=k) for k in range(4)]
+    assert ocorrencias[0] is semanal
+    assert all(o.serie is semanal and o.hora == time(19, 0) for o in ocorrencias[1:])
+
+    # UNTIL em UTC: 12/03 às 22:00 UTC ainda inclui a visita das 19:00 (São Paulo)
+    diaria = _serie("FREQ=DAILY;UNTIL=20260312T220000Z")
+    assert _datas(diaria.ocorrencias(INICIO, date(2027, 1, 1))) == [INICIO + timedelta(days=k) for k in range(3)]
+    diaria = _serie("FREQ=DAILY;UNTIL=20260312T215959Z")
+    assert _datas(diaria.ocorrencias(INICIO, date(2027, 1, 1))) == [INICIO + timedelta(days=k) for k in range(2)]
+
+
+def test_ocorrencias_pulam_exdates_e_respeitam_o_periodo():
+    serie = _serie("FREQ=WEEKLY;COUNT=6", exdates=[INICIO, INICIO + timedelta(weeks=2)])
+    assert _datas(serie.ocorrencias(date(2026, 1, 1), date(2027, 1, 1))) == [
+        INICIO + timedelta(weeks=k) for k in (1, 3, 4, 5)
+    ]
+    # Período que começa depois do início da série e termina antes do fim (exclusivo)
+    assert _datas(serie.ocorrencias(INICIO + timedelta(weeks=3), INICIO + timedelta(weeks=5))) == [
+        INICIO + timedelta(weeks=3), INICIO + timedelta(weeks=4)
+    ]
+    # Regra inválida no banco: só o próprio registro
+    invalida = Agendamento(id=8, data=INICIO, hora=time(9, 0), categoria="Outro", local="X", rrule="FREQ=NUNCA")
+    assert list(invalida.ocorrencias(INICIO, INICIO + timedelta(days=30))) == [invalida]
+
+
+def test_na_consulta_inclui_series_anteriores_ao_periodo():
+    filtro = FiltroAgendamentos.do_mes(2026, 12, categoria="🍰 Buffet")
+    consulta = filtro.na_consulta(_ConsultaGravada())
+    assert consulta.chamadas == [
+        ("eq", "categoria", "🍰 Buffet"),
+        ("or_", "data.gte.2026-12-01,rrule.not.is.null"),
+        ("lt", "data", "2027-01-01"),
+    ]
+    assert FiltroAgendamentos().na_consulta(_ConsultaGravada()).chamadas == []
+
+
+def test_aplicar_e_expandir_concordam():
+    unicos = [
+        Agendamento(id=i, data=INICIO + timedelta(days=5 * i), hora=time(9 + i % 8, 0),
+                    categoria=["🍰 Buffet", "📸 Fotografia"][i % 2], local=f"Local {i}",
+                    status=["⏳ Agendado", "✅ Confirmado"][i % 3 == 0])
+        for i in range(40)
+    ]
+    filtros = [
+        FiltroAgendamentos(),
+        FiltroAgendamentos.do_mes(2026, 4),
+        FiltroAgendamentos.do_mes(2026, 5, categoria="📸 Fotografia"),
+        FiltroAgendamentos(status="✅ Confirmado", inicio=INICIO, fim=date(2026, 6, 1)),
+    ]
+    for filtro in filtros:
+        assert filtro.expandir(unicos) == sorted(filtro.aplicar(unicos), key=lambda a: (a.data, a.hora, a.id))
+
+    # Série iniciada antes do mês: só as ocorrências do mês
+    serie = _serie("FREQ=WEEKLY;COUNT=10")
+    abril = FiltroAgendamentos.do_mes(2026, 4)
+    assert _datas(abril.expandir([serie])) == [date(2026, 4, d) for d in (7, 14, 21, 28)]
+    assert abril.aplicar([serie]) == []
+    # Sem período fechado, a série entra uma vez (como em aplicar)
+    assert FiltroAgendamentos(inicio=INICIO).expandir([serie]) == [serie]
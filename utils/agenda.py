@@ -0,0 +1,407 @@
+"""
+Índice por data dos agendamentos, eventos do calendário, conflitos de horário
+e busca de horários livres
+O índice é construído uma vez por versão dos dados; consultas por período
+usam busca binária e os eventos de cada período visível ficam em cache.
+"""
+import heapq
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import streamlit as st
+from utils.feriados import eventos_feriados, nome_feriado
+from utils.models import DURACAO_PADRAO, TZ_SAO_PAULO, Agendamento, FiltroAgendamentos
+from utils.supabase_client import get_all_agendamentos, versao_dados
+
+# Semanas exibidas na grade mensal do FullCalendar (dayGridMonth)
+SEMANAS_GRADE = 6
+
+# Séries recorrentes sem fim são expandidas até este prazo depois de hoje
+# (ou da última visita) nas análises da agenda inteira: conflitos, horários
+# livres e meses do filtro
+HORIZONTE_RECORRENCIA = timedelta(days=366)
+
+# Tempo mínimo entre visitas em locais diferentes (deslocamento)
+INTERVALO_DESLOCAMENTO = timedelta(minutes=30)
+
+# Horário de atendimento dos fornecedores por dia da semana (0 = segunda)
+HORARIO_COMERCIAL: Dict[int, Tuple[time, time]] = {
+    0: (time(9, 0), time(18, 0)),
+    1: (time(9, 0), time(18, 0)),
+    2: (time(9, 0), time(18, 0)),
+    3: (time(9, 0), time(18, 0)),
+    4: (time(9, 0), time(18, 0)),
+    5: (time(9, 0), time(13, 0)),
+}
+
+# Horários sugeridos começam em múltiplos deste passo (ex: 10:00, 10:30)
+PASSO_SUGESTAO = timedelta(minutes=30)
+
+
+def _ordem(agendamento: Agendamento) -> Tuple[date, time, int]:
+    return agendamento.data, agendamento.hora, agendamento.id
+
+
+@st.cache_resource(ttl=10, max_entries=2)
+def _indice(versao: int) -> Tuple[List[date], List[Agendamento], List[Agendamento]]:
+    """Datas e agendamentos únicos (ordenados), e as séries recorrentes à parte"""
+    agendamentos = sorted(get_all_agendamentos(), key=_ordem)
+    unicos = [a for a in agendamentos if not a.rrule]
+    return [a.data for a in unicos], unicos, [a for a in agendamentos if a.rrule]
+
+
+def agendamentos_periodo(inicio: date, fim: date) -> List[Agendamento]:
+    """
+    Agendamentos com data em [inicio, fim), em ordem de data e hora
+
+    Séries recorrentes entram com as ocorrências do período.
+
+    Args:
+        inicio: Primeira data do período
+        fim: Data final (exclusiva)
+
+    Returns:
+        Lista de agendamentos do período
+    """
+    return filtrar_agendamentos(FiltroAgendamentos(inicio=inicio, fim=fim))
+
+
+def filtrar_indice(datas: List[date], agendamentos: List[Agendamento],
+                   filtro: FiltroAgendamentos,
+                   recorrentes: Iterable[Agendamento] = ()) -> List[Agendamento]:
+    """
+    Aplica um filtro sobre agendamentos ordenados por data
+
+    O período é resolvido por busca binária; categoria e status são
+    verificados em uma única passada sobre a fatia resultante. As séries
+    recorrentes são expandidas só no período do filtro (FiltroAgendamentos.
+    expandir) e intercaladas na ordem de data e hora.
+
+    Args:
+        datas: Datas dos agendamentos (mesma ordem, crescente)
+        agendamentos: Agendamentos únicos ordenados por data
+        filtro: Filtro de categoria, status e período
+        recorrentes: Séries recorrentes (ordenadas por data)
+
+    Returns:
+        Agendamentos que passam no filtro
+    """
+    inicio = bisect_left(datas, filtro.inicio) if filtro.inicio else 0
+    fim = bisect_left(datas, filtro.fim) if filtro.fim else len(datas)
+    fatia = agendamentos[inicio:fim]
+    if filtro.categoria is not None or filtro.status is not None:
+        fatia = filtro.aplicar(fatia)
+    if not recorrentes:
+        return fatia
+    return list(heapq.merge(fatia, filtro.expandir(recorrentes), key=_ordem))
+
+
+def filtrar_agendamentos(filtro: FiltroAgendamentos) -> List[Agendamento]:
+    """
+    Aplica o filtro aos agendamentos já em cache (sem consultar o banco)
+
+    Para buscar no banco só os registros filtrados, use
+    get_agendamentos_filtrados com o mesmo filtro.
+
+    Args:
+        filtro: Filtro de categoria, status e período
+
+    Returns:
+        Agendamentos que passam no filtro, em ordem de data e hora
+    """
+    datas, unicos, recorrentes = _indice(versao_dados('agendamentos'))
+    return filtrar_indice(datas, unicos, filtro, recorrentes)
+
+
+@st.cache_resource(ttl=10, max_entries=2)
+def _expandido(versao: int) -> List[Agendamento]:
+    """Agenda inteira com as séries expandidas até o horizonte, em ordem"""
+    datas, unicos, recorrentes = _indice(versao)
+    if not recorrentes:
+        return unicos
+    inicio = min(datas[:1] + [recorrentes[0].data])
+    fim = max(datas[-1:] + [date.today()]) + HORIZONTE_RECORRENCIA
+    return filtrar_indice(datas, unicos, FiltroAgendamentos(inicio=inicio, fim=fim), recorrentes)
+
+
+def meses_com_agendamentos() -> List[Tuple[int, int]]:
+    """
+    Meses (ano, mês) que têm ao menos um agendamento, em ordem
+
+    Returns:
+        Lista de tuplas (ano, mes)
+    """
+    return sorted({(a.data.year, a.data.month) for a in _expandido(versao_dados('agendamentos'))})
+
+
+def janela_mes(mes: date) -> Tuple[date, date]:
+    """
+    Período visível da grade mensal (domingo a sábado, 6 semanas)
+
+    Args:
+        mes: Qualquer data do mês exibido
+
+    Returns:
+        Tupla (inicio, fim) com fim exclusivo
+    """
+    primeiro = mes.replace(day=1)
+    inicio = primeiro - timedelta(days=(primeiro.weekday() + 1) % 7)
+    return inicio, inicio + timedelta(weeks=SEMANAS_GRADE)
+
+
+def _evento_agendamento(agend: Agendamento) -> dict:
+    """Evento do FullCalendar para um agendamento (emoji e início já calculados)"""
+    return {
+        "title": f"{agend.emoji} {'🔁 ' if agend.rrule else ''}{agend.local}",
+        "start": agend.inicio.strftime('%Y-%m-%dT%H:%M:%S'),
+        "color": agend.cor,
+        "backgroundColor": agend.cor,
+        "borderColor": agend.cor,
+        "textColor": "#FFFFFF",
+        "extendedProps": {
+            "id": agend.id,
+            "categoria": agend.categoria,
+            "local": agend.local,
+            "status": agend.status,
+            "observacao": agend.observacao,
+            "recorrente": bool(agend.rrule)
+        },
+        "classNames": ["evento-agendamento"]
+    }
+
+
+@st.cache_data(ttl=10, max_entries=24)
+def _eventos_periodo(inicio: date, fim: date, regiao: Optional[str], versao: int) -> List[dict]:
+    eventos = list(eventos_feriados(inicio, fim - timedelta(days=1), regiao))
+    eventos.extend(_evento_agendamento(agend) for agend in agendamentos_periodo(inicio, fim))
+    return eventos
+
+
+def eventos_calendario(inicio: date, fim: date, regiao: Optional[str] = None) -> List[dict]:
+    """
+    Eventos (feriados e agendamentos) do período visível do calendário
+
+    O resultado fica em cache por (período, região, versão dos dados), então
+    navegar entre meses já vistos não reconstrói nem reenvia nada novo.
+
+    Args:
+        inicio: Primeira data visível
+        fim: Data final visível (exclusiva)
+        regiao: UF ou município dos feriados (ver utils.feriados)
+
+    Returns:
+        Lista de eventos no formato do streamlit-calendar
+    """
+    return _eventos_periodo(inicio, fim, regiao, versao_dados('agendamentos'))
+
+
+# ==================== CONFLITOS DE HORÁRIO ====================
+
+@dataclass(frozen=True, slots=True)
+class Conflito:
+    """Par de visitas em conflito: a segunda começa antes do fim da primeira + deslocamento"""
+    primeiro: Agendamento
+    segundo: Agendamento
+    tipo: str  # "sobreposição" ou "deslocamento"
+    folga: timedelta  # Do fim da primeira ao início da segunda (negativa se sobrepõe)
+
+
+def _ativo(agendamento: Agendamento) -> bool:
+    """Visitas canceladas ou excluídas não ocupam a agenda"""
+    return agendamento.deleted_at is None and 'Cancelado' not in agendamento.status
+
+
+def _mesmo_local(a: Agendamento, b: Agendamento) -> bool:
+    return (a.endereco or a.local).strip().casefold() == (b.endereco or b.local).strip().casefold()
+
+
+def _classificar(anterior: Agendamento, seguinte: Agendamento, intervalo: timedelta,
+                 duracao: timedelta = DURACAO_PADRAO) -> Optional[Conflito]:
+    """Conflito entre duas visitas (anterior começa antes ou junto e dura duracao), ou None"""
+    folga = seguinte.inicio - (anterior.inicio + duracao)
+    if folga < timedelta(0):
+        return Conflito(anterior, seguinte, "sobreposição", folga)
+    if folga < intervalo and not _mesmo_local(anterior, seguinte):
+        return Conflito(anterior, seguinte, "deslocamento", folga)
+    return None
+
+
+def detectar_conflitos(agendamentos: Iterable[Agendamento],
+                       intervalo: timedelta = INTERVALO_DESLOCAMENTO) -> List[Conflito]:
+    """
+    Encontra todas as visitas sobrepostas ou sem tempo de deslocamento
+
+    Varredura em ordem de início mantendo um heap das visitas ainda
+    "abertas" (fim + deslocamento depois do início atual): O(n log n) para
+    ordenar e processar, mais o número de conflitos encontrados.
+
+    Args:
+        agendamentos: Agendamentos (cancelados e excluídos são ignorados)
+        intervalo: Tempo mínimo entre visitas em locais diferentes
+
+    Returns:
+        Lista de conflitos em ordem de início da segunda visita
+    """
+    ordenados = sorted((a for a in agendamentos if _ativo(a)), key=lambda a: (a.inicio, a.id))
+    abertos: List[Tuple] = []  # Heap de (fim + intervalo, índice)
+    conflitos = []
+    for indice, agendamento in enumerate(ordenados):
+        while abertos and abertos[0][0] <= agendamento.inicio:
+            heapq.heappop(abertos)
+        for _, anterior in sorted(abertos, key=lambda item: item[1]):
+            conflito = _classificar(ordenados[anterior], agendamento, intervalo)
+            if conflito:
+                conflitos.append(conflito)
+        heapq.heappush(abertos, (agendamento.inicio + DURACAO_PADRAO + intervalo, indice))
+    return conflitos
+
+
+def verificar_conflitos(agendamento: Agendamento,
+                        intervalo: timedelta = INTERVALO_DESLOCAMENTO,
+                        duracao: timedelta = DURACAO_PADRAO) -> List[Conflito]:
+    """
+    Conflitos de uma visita nova ou editada com as já agendadas
+
+    Só as visitas do dia anterior até o dia em que a visita (mais o
+    deslocamento) termina são examinadas (busca binária no índice por data). A própria visita
+    (mesmo id) é ignorada. Numa série recorrente, cada ocorrência até o
+    horizonte é verificada.
+
+    Args:
+        agendamento: Visita a verificar (id 0 para uma visita nova)
+        intervalo: Tempo mínimo entre visitas em locais diferentes
+        duracao: Duração da visita verificada (as já agendadas usam DURACAO_PADRAO)
+
+    Returns:
+        Lista de conflitos (vazia se a visita estiver cancelada)
+    """
+    if not _ativo(agendamento):
+        return []
+    conflitos = []
+    limite = max(agendamento.data, date.today()) + HORIZONTE_RECORRENCIA
+    for ocorrencia in agendamento.ocorrencias(agendamento.data, limite):
+        termino = (ocorrencia.inicio + duracao + intervalo).date()
+        vizinhos = filtrar_agendamentos(FiltroAgendamentos(
+            inicio=ocorrencia.data - timedelta(days=1), fim=termino + timedelta(days=1)
+        ))
+        for outro in vizinhos:
+            if outro.id == ocorrencia.id or not _ativo(outro):
+                continue
+            if (outro.inicio, outro.id) <= (ocorrencia.inicio, ocorrencia.id):
+                conflito = _classificar(outro, ocorrencia, intervalo)
+            else:
+                conflito = _classificar(ocorrencia, outro, intervalo, duracao)
+            if conflito:
+                conflitos.append(conflito)
+    return conflitos
+
+
+@st.cache_resource(ttl=10, max_entries=2)
+def _conflitos(versao: int) -> List[Conflito]:
+    return detectar_conflitos(_expandido(versao))
+
+
+def relatorio_conflitos() -> List[Conflito]:
+    """
+    Todos os conflitos da agenda (calculados uma vez por versão dos dados)
+
+    Returns:
+        Lista de conflitos em ordem cronológica
+    """
+    return _conflitos(versao_dados('agendamentos'))
+
+
+# ==================== HORÁRIOS LIVRES ====================
+
+@st.cache_resource(ttl=10, max_entries=2)
+def _ocupados(versao: int, intervalo: timedelta) -> Tuple[List[datetime], List[datetime]]:
+    """
+    Intervalos ocupados da agenda, já unidos e ordenados (inícios, fins)
+
+    Cada visita ativa bloqueia do início - deslocamento ao fim + deslocamento,
+    já que o local da nova visita ainda não é conhecido.
+    """
+    inicios: List[datetime] = []
+    fins: List[datetime] = []
+    for agendamento in sorted((a for a in _expandido(versao) if _ativo(a)), key=lambda a: a.inicio):
+        inicio = agendamento.inicio - intervalo
+        fim = agendamento.inicio + DURACAO_PADRAO + intervalo
+        if fins and inicio <= fins[-1]:
+            fins[-1] = max(fins[-1], fim)
+        else:
+            inicios.append(inicio)
+            fins.append(fim)
+    return inicios, fins
+
+
+def _arredondar(momento: datetime, passo: timedelta) -> datetime:
+    """Arredonda para cima até o próximo múltiplo do passo (a partir da meia-noite)"""
+    meia_noite = momento.replace(hour=0, minute=0, second=0, microsecond=0)
+    resto = (momento - meia_noite) % passo
+    return momento + (passo - resto) if resto else momento
+
+
+def horarios_livres(inicio: date, fim: date, quantidade: int = 5,
+                    duracao: timedelta = DURACAO_PADRAO, regiao: Optional[str] = None,
+                    horario: Dict[int, Tuple[time, time]] = HORARIO_COMERCIAL,
+                    intervalo: timedelta = INTERVALO_DESLOCAMENTO,
+                    passo: timedelta = PASSO_SUGESTAO,
+                    agora: Optional[datetime] = None) -> List[datetime]:
+    """
+    Próximos horários livres para uma nova visita
+
+    Percorre os expedientes do período (pulando feriados e dias sem
+    atendimento) junto com os intervalos ocupados já unidos e ordenados,
+    avançando um ponteiro sobre eles: cada intervalo é visitado uma vez.
+    Retorna o primeiro horário de cada espaço livre, para que as sugestões
+    cubram dias e turnos diferentes.
+
+    Args:
+        inicio: Primeira data do período de busca
+        fim: Última data do período de busca (inclusive)
+        quantidade: Número máximo de sugestões
+        duracao: Duração da nova visita
+        regiao: UF ou município dos feriados (ver utils.feriados)
+        horario: Expediente (início, fim) por dia da semana (0 = segunda)
+        intervalo: Tempo de deslocamento respeitado antes e depois das visitas
+        passo: Granularidade dos horários sugeridos
+        agora: Momento atual (horários anteriores não são sugeridos)
+
+    Returns:
+        Lista de datetimes (fuso de São Paulo) em ordem cronológica
+    """
+    inicios, fins = _ocupados(versao_dados('agendamentos'), intervalo)
+    agora = agora or datetime.now(TZ_SAO_PAULO)
+    sugestoes: List[datetime] = []
+    indice: Optional[int] = None
+    dia = inicio
+    while dia <= fim and len(sugestoes) < quantidade:
+        expediente = horario.get(dia.weekday())
+        if expediente is None or nome_feriado(dia, regiao):
+            dia += timedelta(days=1)
+            continue
+        abertura = TZ_SAO_PAULO.localize(datetime.combine(dia, expediente[0]))
+        fechamento = TZ_SAO_PAULO.localize(datetime.combine(dia, expediente[1]))
+        if indice is None:
+            # Primeiro intervalo ocupado que ainda não terminou na abertura
+            indice = bisect_right(fins, abertura)
+        while indice < len(fins) and fins[indice] <= abertura:
+            indice += 1
+
+        cursor = _arredondar(max(abertura, agora), passo)
+        while cursor + duracao <= fechamento and len(sugestoes) < quantidade:
+            if indice < len(inicios) and inicios[indice] < cursor + duracao:
+                # Ocupado: pula para o fim do intervalo
+                cursor = _arredondar(max(cursor, fins[indice]), passo)
+                indice += 1
+                continue
+            sugestoes.append(cursor)
+            # Próxima sugestão só depois do próximo intervalo ocupado
+            if indice >= len(inicios) or inicios[indice] >= fechamento:
+                break
+            cursor = _arredondar(fins[indice], passo)
+            indice += 1
+        dia += timedelta(days=1)
+    return sugestoes
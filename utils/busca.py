@@ -0,0 +1,277 @@
+"""
+Busca global (itens, orçamentos, tarefas e agendamentos)
+Índice invertido em memória, sem acentos e sem diferenciar maiúsculas, com
+busca por prefixo. Após cada escrita só os registros alterados da tabela
+são reindexados; as consultas não acessam o banco.
+"""
+import heapq
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, insort
+from dataclasses import dataclass
+from functools import partial
+from typing import Callable, Dict, FrozenSet, Iterable, List, Set, Tuple
+
+import streamlit as st
+from utils.supabase_client import paginar_agendamentos, paginar_tabela, versao_dados
+
+# Intervalo (segundos) até conferir alterações feitas fora deste processo
+# (as deste processo mudam a versão dos dados e são vistas na hora)
+TTL_BUSCA = 60
+
+# Resultados exibidos por consulta
+LIMITE_RESULTADOS = 20
+
+_PALAVRA = re.compile(r"\w+")
+
+
+def normalizar(texto: str) -> str:
+    """Remove acentos e diferença entre maiúsculas/minúsculas ("Chácara" -> "chacara")"""
+    decomposto = unicodedata.normalize("NFKD", texto)
+    return "".join(c for c in decomposto if not unicodedata.combining(c)).casefold()
+
+
+def termos(texto: str) -> List[str]:
+    """Palavras normalizadas de um texto, na ordem em que aparecem"""
+    return _PALAVRA.findall(normalizar(texto))
+
+
+def _digitos(telefone: str) -> str:
+    """Telefone só com dígitos, para buscar "11987..." em "(11) 98765-4321" """
+    return "".join(c for c in telefone if c.isdigit())
+
+
+@dataclass(frozen=True, slots=True)
+class Resultado:
+    """Registro encontrado na busca, já formatado para exibição"""
+    tabela: str
+    id: int
+    titulo: str
+    detalhe: str
+    secao: str
+
+
+# ==================== DOCUMENTOS POR TABELA ====================
+
+def _documento_item(item) -> Tuple[Resultado, str]:
+    detalhe = " · ".join(filter(None, [item.servico, item.status]))
+    texto = " ".join([item.item, item.servico, item.comentarios])
+    return Resultado("items", item.id, f"📋 {item.item}", detalhe, "📋 Itens do Casamento"), texto
+
+
+def _documento_orcamento(orcamento) -> Tuple[Resultado, str]:
+    detalhe = " · ".join(filter(None, [orcamento.categoria, orcamento.telefone]))
+    texto = " ".join([orcamento.fornecedor, orcamento.categoria, orcamento.telefone,
+                      _digitos(orcamento.telefone), orcamento.observacao])
+    return Resultado("orcamentos", orcamento.id, f"💸 {orcamento.fornecedor}", detalhe, "💸 Orçamentos"), texto
+
+
+def _documento_task(task) -> Tuple[Resultado, str]:
+    detalhe = "Concluída" if task.concluida else "Pendente"
+    return Resultado("tasks", task.id, f"✅ {task.tarefa}", detalhe, "✅ Checklist"), task.tarefa
+
+
+def _documento_agendamento(agend) -> Tuple[Resultado, str]:
+    quando = f"{agend.data.strftime('%d/%m/%Y')} {agend.hora.strftime('%H:%M')}"
+    detalhe = " · ".join(filter(None, [quando, agend.telefone, agend.endereco]))
+    texto = " ".join([agend.categoria, agend.local, agend.endereco, agend.contato, agend.telefone,
+                      _digitos(agend.telefone), agend.observacao])
+    return Resultado("agendamentos", agend.id, f"📅 {agend.local}", detalhe, "📅 Calendário"), texto
+
+
+# Tabela -> (consulta que propaga erros, conversão para documento). Os
+# get_all_* devolvem [] em caso de erro, o que apagaria a tabela do índice
+FONTES: Dict[str, Tuple[Callable[[], Iterable], Callable]] = {
+    "items": (partial(paginar_tabela, "items"), _documento_item),
+    "orcamentos": (partial(paginar_tabela, "orcamentos"), _documento_orcamento),
+    "tasks": (partial(paginar_tabela, "tasks"), _documento_task),
+    "agendamentos": (paginar_agendamentos, _documento_agendamento),
+}
+
+
+# ==================== ÍNDICE INVERTIDO ====================
+
+class IndiceBusca:
+    """
+    Índice invertido termo -> registros, com vocabulário ordenado
+
+    O vocabulário ordenado permite buscar por prefixo com busca binária
+    ("buf" encontra "buffet"). Todas as operações são protegidas por um
+    lock, pois o índice é compartilhado entre as sessões.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._postings: Dict[str, Set[Tuple[str, int]]] = {}
+        self._vocabulario: List[str] = []
+        self._documentos: Dict[Tuple[str, int], Tuple[Resultado, str]] = {}
+        self._termos_doc: Dict[Tuple[str, int], FrozenSet[str]] = {}
+        self._versoes: Dict[str, int] = {}
+        self._sincronizado_em: Dict[str, float] = {}
+        self._cache_prefixos: Dict[str, Set[Tuple[str, int]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._documentos)
+
+    def _descartar(self, chave: Tuple[str, int], termo: str) -> None:
+        registros = self._postings[termo]
+        registros.discard(chave)
+        if not registros:
+            del self._postings[termo]
+            del self._vocabulario[bisect_left(self._vocabulario, termo)]
+
+    def _remover(self, chave: Tuple[str, int]) -> None:
+        self._documentos.pop(chave, None)
+        for termo in self._termos_doc.pop(chave, ()):
+            self._descartar(chave, termo)
+
+    def _indexar(self, chave: Tuple[str, int], documento: Tuple[Resultado, str]) -> None:
+        # Só os termos que entraram ou saíram do registro mexem nas listas
+        palavras = frozenset(termos(documento[1]))
+        anteriores = self._termos_doc.get(chave, frozenset())
+        for termo in anteriores - palavras:
+            self._descartar(chave, termo)
+        self._documentos[chave] = documento
+        self._termos_doc[chave] = palavras
+        for termo in palavras - anteriores:
+            registros = self._postings.get(termo)
+            if registros is None:
+                self._postings[termo] = registros = set()
+                insort(self._vocabulario, termo)
+            registros.add(chave)
+
+    def atualizar_tabela(self, tabela: str, documentos: Iterable[Tuple[Resultado, str]]) -> int:
+        """
+        Sincroniza o índice com o conteúdo atual de uma tabela
+
+        Só os registros novos ou alterados são reindexados, e os que não
+        vieram mais são removidos.
+
+        Args:
+            tabela: Nome da tabela
+            documentos: Pares (resultado, texto indexado) de todos os registros
+
+        Returns:
+            Quantidade de registros reindexados ou removidos
+        """
+        alterados = 0
+        with self._lock:
+            vistos = set()
+            for documento in documentos:
+                chave = (tabela, documento[0].id)
+                vistos.add(chave)
+                if self._documentos.get(chave) != documento:
+                    self._indexar(chave, documento)
+                    alterados += 1
+            for chave in [c for c in self._documentos if c[0] == tabela and c not in vistos]:
+                self._remover(chave)
+                alterados += 1
+            if alterados:
+                self._cache_prefixos.clear()
+        return alterados
+
+    def _prefixados(self, prefixo: str) -> Set[Tuple[str, int]]:
+        """Registros com algum termo começando pelo prefixo (não alterar o retorno)"""
+        encontrados = self._cache_prefixos.get(prefixo)
+        if encontrados is not None:
+            return encontrados
+        inicio = bisect_left(self._vocabulario, prefixo)
+        fim = bisect_left(self._vocabulario, prefixo + "\U0010ffff", inicio)
+        if fim - inicio == 1:
+            encontrados = self._postings[self._vocabulario[inicio]]
+        else:
+            encontrados = set().union(*(self._postings[t] for t in self._vocabulario[inicio:fim]))
+        # Enquanto se digita ("c", "ch", "cha"...) os mesmos prefixos se repetem
+        if len(self._cache_prefixos) >= 256:
+            self._cache_prefixos.clear()
+        self._cache_prefixos[prefixo] = encontrados
+        return encontrados
+
+    def buscar(self, consulta: str, limite: int = LIMITE_RESULTADOS) -> List[Resultado]:
+        """
+        Registros que contêm todas as palavras da consulta (como prefixo)
+
+        Os conjuntos de cada palavra são intersectados do menor para o
+        maior. Palavras completas contam mais que prefixos na ordenação.
+
+        Args:
+            consulta: Texto digitado (acentos e maiúsculas são ignorados)
+            limite: Quantidade máxima de resultados
+
+        Returns:
+            Resultados em ordem de relevância
+        """
+        palavras = set(termos(consulta))
+        if not palavras:
+            return []
+        with self._lock:
+            conjuntos = sorted((self._prefixados(p) for p in palavras), key=len)
+            encontrados = conjuntos[0].intersection(*conjuntos[1:])
+            # Faixas por quantidade de palavras completas; dentro delas, por tabela e id
+            faixas: Dict[int, Set[Tuple[str, int]]] = {0: encontrados}
+            for palavra in palavras:
+                exato = self._postings.get(palavra, ())
+                for pontos in sorted(faixas, reverse=True):
+                    subiram = faixas[pontos].intersection(exato)
+                    if subiram:
+                        faixas[pontos] = faixas[pontos] - subiram
+                        faixas[pontos + 1] = faixas.get(pontos + 1, set()) | subiram
+            chaves: List[Tuple[str, int]] = []
+            for pontos in sorted(faixas, reverse=True):
+                chaves += heapq.nsmallest(limite - len(chaves), faixas[pontos])
+                if len(chaves) >= limite:
+                    break
+            return [self._documentos[chave][0] for chave in chaves]
+
+    def sincronizar(self, agora: float) -> List[str]:
+        """
+        Reindexa as tabelas cuja versão mudou ou cujo TTL expirou
+
+        Se a consulta de uma tabela falha, o índice dela fica como estava e
+        ela é consultada de novo na próxima busca.
+
+        Returns:
+            Tabelas que não puderam ser atualizadas
+        """
+        falhas = []
+        for tabela, (consultar, documento) in FONTES.items():
+            versao = versao_dados(tabela)
+            expirado = agora - self._sincronizado_em.get(tabela, float("-inf")) > TTL_BUSCA
+            if versao != self._versoes.get(tabela) or expirado:
+                try:
+                    documentos = [documento(registro) for registro in consultar()]
+                except Exception:
+                    falhas.append(tabela)
+                    continue
+                self.atualizar_tabela(tabela, documentos)
+                self._versoes[tabela] = versao
+                self._sincronizado_em[tabela] = agora
+        return falhas
+
+
+@st.cache_resource
+def _indice_busca() -> IndiceBusca:
+    return IndiceBusca()
+
+
+def buscar(consulta: str, limite: int = LIMITE_RESULTADOS) -> List[Resultado]:
+    """
+    Busca global em itens, orçamentos, tarefas e agendamentos
+
+    Antes de consultar, reindexa apenas as tabelas alteradas desde a última
+    busca (e, dentro delas, apenas os registros alterados).
+
+    Args:
+        consulta: Texto digitado (ex: "chacara", "buf", "98765")
+        limite: Quantidade máxima de resultados
+
+    Returns:
+        Resultados em ordem de relevância
+    """
+    indice = _indice_busca()
+    falhas = indice.sincronizar(time.monotonic())
+    if falhas:
+        st.toast(f"⚠️ Busca com dados anteriores de: {', '.join(falhas)} (erro ao consultar o banco)")
+    return indice.buscar(consulta, limite)
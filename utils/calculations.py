@@ -1,6 +1,11 @@
 """
 Módulo para cálculos financeiros
 """
+import calendar
+from datetime import date
+
+import numpy as np
+import pandas as pd
 
 
 def calcular_total_orcado(items):
@@ -8,12 +13,12 @@ def calcular_total_orcado(items):
     Calcula o total orçado somando os preços de todos os itens
     
     Args:
-        items: Lista de dicionários com itens do casamento
+        items: Lista de itens do casamento (Item)
         
     Returns:
         Total orçado (float)
     """
-    return sum(item.get('preco', 0.0) for item in items)
+    return sum(item.preco for item in items)
 
 
 def calcular_reserva(orcamento_maximo, total_orcado):
@@ -96,6 +101,375 @@ def calcular_investimento_mensal(valor_inicial, valor_final_desejado, taxa_juros
     return max(0.0, pmt)
 
 
+def calcular_investimento_mensal_vetorizado(valor_inicial, valor_final_desejado, taxa_juros, numero_meses):
+    """
+    Versão vetorizada (NumPy) de calcular_investimento_mensal
+    
+    Aceita escalares ou arrays (com broadcasting) e retorna, em uma única
+    passada, o mesmo resultado que a versão escalar para cada combinação
+    (a potência do NumPy pode diferir da do Python em 1 ulp, ou seja,
+    diferenças relativas da ordem de 1e-14).
+    
+    Args:
+        valor_inicial: Valor(es) disponível(is) inicialmente
+        valor_final_desejado: Valor(es) que se deseja atingir
+        taxa_juros: Taxa(s) de juros mensal(is) (decimal)
+        numero_meses: Número(s) de meses para atingir o objetivo
+        
+    Returns:
+        np.ndarray com o investimento mensal recomendado
+    """
+    vp, vf, i, n = np.broadcast_arrays(
+        np.asarray(valor_inicial, dtype=float),
+        np.asarray(valor_final_desejado, dtype=float),
+        np.asarray(taxa_juros, dtype=float),
+        np.asarray(numero_meses, dtype=float)
+    )
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Mesmas operações (e na mesma ordem) da versão escalar
+        fator_crescimento = (1 + i) ** n
+        diferenca = vf - vp * fator_crescimento
+        pmt = np.maximum(0.0, diferenca * i / (fator_crescimento - 1))
+        pmt = np.where(diferenca <= 0, 0.0, pmt)
+        
+        # Sem juros: apenas divide a diferença
+        sem_juros = (vf - vp) / n
+    
+    resultado = np.where(i == 0, sem_juros, pmt)
+    return np.where(n == 0, 0.0, resultado)
+
+
+def calcular_curva_acumulada(valor_inicial, taxa_juros, numero_meses, aporte_mensal):
+    """
+    Calcula a curva de valor acumulado mês a mês (vetorizada)
+    
+    Para cada mês m: VP * (1 + i)^m + PMT * [((1 + i)^m - 1) / i]
+    
+    Args:
+        valor_inicial: Valor(es) inicial(is)
+        taxa_juros: Taxa(s) de juros mensal(is) (decimal)
+        numero_meses: Número(s) de meses da projeção
+        aporte_mensal: Aporte(s) mensal(is)
+        
+    Returns:
+        np.ndarray com formato (..., max(numero_meses) + 1); os meses além do
+        horizonte de cada combinação ficam como NaN
+    """
+    vp, i, n, pmt = np.broadcast_arrays(
+        np.asarray(valor_inicial, dtype=float),
+        np.asarray(taxa_juros, dtype=float),
+        np.asarray(numero_meses, dtype=float),
+        np.asarray(aporte_mensal, dtype=float)
+    )
+    
+    horizonte = int(np.max(n)) if n.size else 0
+    meses = np.arange(horizonte + 1, dtype=float)
+    
+    # Eixo dos meses sempre por último
+    vp, i, n, pmt = (x[..., np.newaxis] for x in (vp, i, n, pmt))
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fator = (1 + i) ** meses
+        valor_aportes = np.where(i == 0, pmt * meses, pmt * ((fator - 1) / i))
+    
+    valor_aportes = np.where(pmt > 0, valor_aportes, 0.0)
+    curva = vp * fator + valor_aportes
+    return np.where(meses <= n, curva, np.nan)
+
+
+def projetar_investimentos(valor_inicial, orcamento_maximo, taxa_juros, numero_meses, total_orcado=0.0):
+    """
+    Motor financeiro vetorizado: aporte mensal, curva acumulada e reserva
+    para arrays de entradas em uma única passada
+    
+    Args:
+        valor_inicial: Valor(es) inicial(is) disponível(is)
+        orcamento_maximo: Orçamento(s) máximo(s) (valor final desejado)
+        taxa_juros: Taxa(s) de juros mensal(is) (decimal)
+        numero_meses: Número(s) de meses
+        total_orcado: Total(is) já orçado(s)
+        
+    Returns:
+        Dicionário com 'aporte_mensal', 'curva' e 'reserva' (np.ndarray)
+    """
+    aporte_mensal = calcular_investimento_mensal_vetorizado(
+        valor_inicial, orcamento_maximo, taxa_juros, numero_meses
+    )
+    return {
+        'aporte_mensal': aporte_mensal,
+        'curva': calcular_curva_acumulada(valor_inicial, taxa_juros, numero_meses, aporte_mensal),
+        'reserva': np.asarray(orcamento_maximo, dtype=float) - np.asarray(total_orcado, dtype=float)
+    }
+
+
+def calcular_grade_cenarios(taxas_juros, numeros_meses, valores_iniciais, valor_final_desejado):
+    """
+    Calcula o investimento mensal para uma grade completa de cenários
+    
+    Todas as combinações (taxa × meses × valor inicial) são avaliadas em um
+    único lote vetorizado, com a mesma regra de calcular_investimento_mensal.
+    
+    Args:
+        taxas_juros: Sequência de taxas de juros mensais (decimal)
+        numeros_meses: Sequência de prazos em meses
+        valores_iniciais: Sequência de valores iniciais
+        valor_final_desejado: Valor que se deseja atingir
+        
+    Returns:
+        np.ndarray com formato (len(taxas_juros), len(numeros_meses), len(valores_iniciais))
+    """
+    taxas = np.asarray(taxas_juros, dtype=float)[:, None, None]
+    meses = np.asarray(numeros_meses, dtype=float)[None, :, None]
+    valores = np.asarray(valores_iniciais, dtype=float)[None, None, :]
+    return calcular_investimento_mensal_vetorizado(valores, valor_final_desejado, taxas, meses)
+
+
+def simular_monte_carlo(valor_inicial, aporte_mensal, taxa_media, volatilidade, numero_meses,
+                        valor_meta, numero_simulacoes=20000, percentis=(5, 25, 50, 75, 95),
+                        semente=42):
+    """
+    Simula a evolução do investimento com taxas de juros mensais variáveis
+    
+    Cada caminho segue V_t = V_(t-1) * (1 + r_t) + PMT, com r_t sorteada de
+    uma normal (taxa_media, volatilidade). Todos os caminhos são calculados
+    de uma vez: com G_t = produto de (1 + r_k), V_t = G_t * (VP + PMT * Σ 1/G_k).
+    
+    Args:
+        valor_inicial: Valor inicial disponível
+        aporte_mensal: Aporte feito ao final de cada mês
+        taxa_media: Taxa de juros mensal média (decimal)
+        volatilidade: Desvio padrão da taxa mensal (decimal)
+        numero_meses: Número de meses da simulação
+        valor_meta: Valor que se deseja atingir (ex: orçamento máximo)
+        numero_simulacoes: Quantidade de caminhos simulados
+        percentis: Percentis das faixas retornadas
+        semente: Semente do gerador aleatório (resultados reproduzíveis)
+        
+    Returns:
+        Dicionário com 'meses', 'percentis' ({percentil: np.ndarray por mês}),
+        'probabilidade_meta' (0 a 1) e 'valores_finais'
+    """
+    numero_meses = int(numero_meses)
+    rng = np.random.default_rng(semente)
+    
+    # Matriz (meses × simulações): as operações ao longo do tempo percorrem
+    # memória contígua e são feitas no lugar, sem cópias intermediárias
+    crescimento = rng.standard_normal(size=(numero_meses, numero_simulacoes))
+    crescimento *= volatilidade
+    crescimento += 1.0 + taxa_media
+    # Rendimento nunca pode consumir mais do que todo o saldo
+    np.maximum(crescimento, 0.01, out=crescimento)
+    np.cumprod(crescimento, axis=0, out=crescimento)
+    
+    caminhos = np.reciprocal(crescimento)
+    np.cumsum(caminhos, axis=0, out=caminhos)
+    caminhos *= aporte_mensal
+    caminhos += valor_inicial
+    caminhos *= crescimento
+    
+    faixas = np.percentile(caminhos, percentis, axis=1)
+    faixas = np.hstack([np.full((len(percentis), 1), float(valor_inicial)), faixas])
+    valores_finais = caminhos[-1]
+    
+    return {
+        'meses': np.arange(numero_meses + 1),
+        'percentis': dict(zip(percentis, faixas)),
+        'probabilidade_meta': float(np.mean(valores_finais >= valor_meta)),
+        'valores_finais': valores_finais
+    }
+
+
+def dividir_em_parcelas(valor_total, numero_parcelas, primeiro_vencimento):
+    """
+    Divide um valor em parcelas mensais (centavos restantes na última)
+    
+    Args:
+        valor_total: Valor total a parcelar
+        numero_parcelas: Quantidade de parcelas
+        primeiro_vencimento: Data (date) do primeiro vencimento
+        
+    Returns:
+        Lista de dicionários com vencimento, valor e descricao ("1/3", ...)
+    """
+    numero_parcelas = max(1, int(numero_parcelas))
+    valor_parcela = int(round(valor_total * 100) // numero_parcelas) / 100
+    ultima = round(valor_total - valor_parcela * (numero_parcelas - 1), 2)
+    
+    parcelas = []
+    for indice in range(numero_parcelas):
+        # Mesmo dia nos meses seguintes (ajustado para o último dia do mês)
+        meses = primeiro_vencimento.month - 1 + indice
+        ano = primeiro_vencimento.year + meses // 12
+        mes = meses % 12 + 1
+        dia = min(primeiro_vencimento.day, calendar.monthrange(ano, mes)[1])
+        parcelas.append({
+            'vencimento': date(ano, mes, dia),
+            'valor': ultima if indice == numero_parcelas - 1 else valor_parcela,
+            'descricao': f"{indice + 1}/{numero_parcelas}"
+        })
+    return parcelas
+
+
+def calcular_fluxo_caixa(valor_inicial, taxa_juros, aporte_mensal, numero_meses,
+                         vencimentos, valores, inicio=None):
+    """
+    Calcula o saldo mês a mês combinando aportes, rendimento e parcelas a pagar
+    
+    O saldo segue S_t = S_(t-1) * (1 + i) + PMT - D_t, em que D_t é a soma das
+    parcelas com vencimento no mês t. As saídas são agregadas por mês com
+    np.bincount e o saldo é obtido de uma vez por
+    S_t = (1 + i)^t * (VP + Σ (PMT - D_k) / (1 + i)^k).
+    
+    Args:
+        valor_inicial: Valor disponível no mês atual (mês 0)
+        taxa_juros: Taxa de juros mensal (decimal)
+        aporte_mensal: Aporte feito ao final de cada mês
+        numero_meses: Número de meses da projeção
+        vencimentos: Datas de vencimento das parcelas em aberto
+        valores: Valores das parcelas em aberto
+        inicio: Mês inicial (date); padrão: hoje
+        
+    Returns:
+        Dicionário com 'meses' (datetime64[M]), 'saidas', 'saldo',
+        'acumulado' (curva sem as parcelas), 'deficit' (máscara de meses com
+        saldo negativo) e 'fora_do_horizonte' (total vencendo após a projeção).
+        Parcelas vencidas entram no mês 0.
+    """
+    numero_meses = int(numero_meses)
+    mes_inicial = np.datetime64(inicio or date.today(), 'M')
+    
+    vencimentos = np.asarray(vencimentos, dtype='datetime64[M]')
+    valores = np.asarray(valores, dtype=float)
+    indices = np.maximum((vencimentos - mes_inicial).astype(np.int64), 0)
+    no_horizonte = indices <= numero_meses
+    
+    saidas = np.bincount(
+        indices[no_horizonte], weights=valores[no_horizonte], minlength=numero_meses + 1
+    )
+    
+    fator = (1.0 + taxa_juros) ** np.arange(numero_meses + 1)
+    fluxo = aporte_mensal - saidas
+    fluxo[0] = -saidas[0]  # Sem aporte no mês atual
+    saldo = fator * (valor_inicial + np.cumsum(fluxo / fator))
+    
+    return {
+        'meses': mes_inicial + np.arange(numero_meses + 1),
+        'saidas': saidas,
+        'saldo': saldo,
+        'acumulado': calcular_curva_acumulada(valor_inicial, taxa_juros, numero_meses, aporte_mensal),
+        'deficit': saldo < 0,
+        'fora_do_horizonte': float(valores[~no_horizonte].sum())
+    }
+
+
+def otimizar_orcamentos(categorias, valores, notas, orcamento_maximo, objetivo="nota",
+                        resolucao=None):
+    """
+    Escolhe um orçamento por categoria respeitando o orçamento máximo
+    
+    Problema da mochila de múltipla escolha, resolvido por programação
+    dinâmica sobre a soma das notas: para cada soma guarda o menor custo
+    exato (em centavos) que a atinge, então a escolha nunca estoura o limite
+    por arredondamento. Com objetivo "custo" escolhe o menor valor de cada
+    categoria; com objetivo "nota" maximiza a soma das notas (empates
+    decididos pelo menor custo).
+    
+    Args:
+        categorias: Categoria de cada orçamento
+        valores: Valor de cada orçamento
+        notas: Nota de preferência de cada orçamento
+        orcamento_maximo: Limite para a soma dos valores escolhidos
+        objetivo: "nota" (maximizar preferência) ou "custo" (minimizar valor)
+        resolucao: Passo das notas na programação dinâmica (padrão: 1 para
+            notas inteiras, 0,01 para as demais)
+        
+    Returns:
+        Dicionário com 'escolhidos' (posições dos orçamentos escolhidos, uma
+        por categoria), 'total', 'nota_total' e 'viavel' (False quando nem a
+        combinação mais barata cabe no orçamento; nesse caso 'escolhidos'
+        traz a combinação mais barata)
+    """
+    categorias = np.asarray(categorias, dtype=object)
+    valores = np.asarray(valores, dtype=float)
+    notas = np.asarray(notas, dtype=float)
+    
+    if valores.size == 0:
+        return {'escolhidos': np.array([], dtype=int), 'total': 0.0, 'nota_total': 0.0, 'viavel': True}
+    
+    _, grupos = np.unique(categorias.astype(str), return_inverse=True)
+    grupos = grupos.ravel()
+    
+    # Custos comparados em centavos inteiros (somas exatas, sem erro de ponto flutuante)
+    centavos = np.rint(valores * 100).astype(np.int64)
+    limite = int(np.floor(round(orcamento_maximo * 100, 6)))
+    
+    # Mais barato de cada categoria (empate: maior nota)
+    ordem = np.lexsort((-notas, centavos, grupos))
+    primeiro = np.r_[True, grupos[ordem][1:] != grupos[ordem][:-1]]
+    mais_baratos = np.sort(ordem[primeiro])
+    
+    def _resultado(escolhidos, viavel):
+        return {
+            'escolhidos': escolhidos,
+            'total': float(valores[escolhidos].sum()),
+            'nota_total': float(notas[escolhidos].sum()),
+            'viavel': viavel
+        }
+    
+    viavel_mais_barato = bool(centavos[mais_baratos].sum() <= limite)
+    if objetivo == "custo" or not viavel_mais_barato:
+        return _resultado(mais_baratos, viavel_mais_barato)
+    
+    # Pontos de nota (inteiros, a partir da menor nota de cada categoria)
+    if resolucao is None:
+        resolucao = 1.0 if np.allclose(notas, np.rint(notas)) else 0.01
+    pontos = np.rint(notas / resolucao).astype(np.int64)
+    numero_grupos = grupos.max() + 1
+    menor = np.full(numero_grupos, np.iinfo(np.int64).max)
+    np.minimum.at(menor, grupos, pontos)
+    pontos -= menor[grupos]
+    maior = np.zeros(numero_grupos, dtype=np.int64)
+    np.maximum.at(maior, grupos, pontos)
+    capacidade = int(maior.sum())
+    
+    # custo[s]: menor custo (centavos) com soma de pontos exatamente s
+    sem_solucao = np.iinfo(np.int64).max // 4
+    custo = np.full(capacidade + 1, sem_solucao)
+    custo[0] = 0
+    escolhas = []
+    for grupo in range(numero_grupos):
+        opcoes = np.flatnonzero(grupos == grupo)
+        candidatos = np.full((opcoes.size, capacidade + 1), sem_solucao)
+        for linha, opcao in enumerate(opcoes):
+            ponto = pontos[opcao]
+            candidatos[linha, ponto:] = custo[:capacidade + 1 - ponto] + centavos[opcao]
+        escolha = candidatos.argmin(axis=0)
+        custo = np.minimum(candidatos[escolha, np.arange(capacidade + 1)], sem_solucao)
+        escolhas.append(opcoes[escolha])
+    
+    # Maior soma de pontos que cabe no limite (a mais barata das combinações)
+    cabem = np.flatnonzero(custo <= limite)
+    if cabem.size == 0:
+        return _resultado(mais_baratos, viavel_mais_barato)
+    soma = int(cabem[-1])
+    escolhidos = []
+    for grupo in range(len(escolhas) - 1, -1, -1):
+        opcao = escolhas[grupo][soma]
+        escolhidos.append(opcao)
+        soma -= pontos[opcao]
+        if soma < 0:
+            return _resultado(mais_baratos, viavel_mais_barato)
+    escolhidos = np.sort(np.array(escolhidos, dtype=int))
+    
+    assert centavos[escolhidos].sum() <= limite, "Escolha acima do orçamento máximo"
+    return _resultado(escolhidos, True)
+
+
+# Troca dos separadores para o padrão brasileiro ("1_234.56" -> "1.234,56")
+_SEPARADORES_MOEDA = str.maketrans('_.', '.,')
+
+
 def formatar_moeda(valor):
     """
     Formata um valor como moeda brasileira
@@ -106,7 +480,35 @@ def formatar_moeda(valor):
     Returns:
         String formatada (ex: "R$ 1.234,56")
     """
-    return f"R$ {valor:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
+    # Agrupamento com "_" dispensa o marcador temporário: duas trocas em vez de três
+    return f"R$ {float(valor):_.2f}".replace('.', ',').replace('_', '.')
+
+
+def formatar_moeda_vetorizado(valores):
+    """
+    Formata vários valores como moeda brasileira de uma só vez
+    
+    Todos os valores são formatados por uma única chamada a str.format (um
+    modelo repetido n vezes) e os separadores são trocados com uma só chamada
+    a str.translate sobre o texto inteiro, em vez de três replace por valor.
+    
+    Args:
+        valores: Sequência, array ou pd.Series de valores numéricos
+        
+    Returns:
+        pd.Series (mesmo índice) se receber uma Series; caso contrário, lista
+        de strings formatadas (ex: ["R$ 1.234,56", ...])
+    """
+    numeros = np.asarray(valores, dtype=float).ravel().tolist()
+    if not numeros:
+        formatados = []
+    else:
+        texto = ('R$ {:_.2f}\n' * len(numeros)).format(*numeros)
+        formatados = texto[:-1].translate(_SEPARADORES_MOEDA).split('\n')
+    
+    if isinstance(valores, pd.Series):
+        return pd.Series(formatados, index=valores.index, name=valores.name, dtype='object')
+    return formatados
 
 
 def calcular_porcentagem_tarefas(tasks):
@@ -114,7 +516,7 @@ def calcular_porcentagem_tarefas(tasks):
     Calcula a porcentagem de tarefas concluídas
     
     Args:
-        tasks: Lista de dicionários com tarefas
+        tasks: Lista de tarefas (Task)
         
     Returns:
         Porcentagem de conclusão (float)
@@ -122,5 +524,154 @@ def calcular_porcentagem_tarefas(tasks):
     if not tasks:
         return 0.0
     
-    concluidas = sum(1 for task in tasks if task.get('concluida', False))
+    concluidas = sum(1 for task in tasks if task.concluida)
     return (concluidas / len(tasks)) * 100
+
+
+def calcular_resumo_totais(items, tasks, orcamentos):
+    """
+    Calcula localmente o mesmo resumo retornado pela função
+    resumo_totais() do banco (usado quando a função não está disponível)
+    
+    Args:
+        items: Lista de itens do casamento (Item)
+        tasks: Lista de tarefas (Task)
+        orcamentos: Lista de orçamentos (Orcamento)
+        
+    Returns:
+        Dicionário com totais por status, por categoria e contagem de tarefas
+    """
+    items_por_status = {}
+    for item in items:
+        resumo = items_por_status.setdefault(item.status, {'quantidade': 0, 'total': 0.0})
+        resumo['quantidade'] += 1
+        resumo['total'] += item.preco
+    
+    orcamentos_por_categoria = {}
+    for orc in orcamentos:
+        if not orc.categoria:
+            continue
+        resumo = orcamentos_por_categoria.setdefault(orc.categoria, {'quantidade': 0, 'total': 0.0})
+        resumo['quantidade'] += 1
+        resumo['total'] += orc.valor
+    
+    return {
+        'items_por_status': items_por_status,
+        'orcamentos_por_categoria': orcamentos_por_categoria,
+        'tasks': {
+            'total': len(tasks),
+            'concluidas': sum(1 for task in tasks if task.concluida)
+        }
+    }
+
+
+def calcular_total_orcado_resumo(resumo):
+    """
+    Calcula o total orçado a partir do resumo agregado
+    
+    Args:
+        resumo: Dicionário retornado por get_resumo_totais()
+        
+    Returns:
+        Total orçado (float)
+    """
+    return sum(float(r['total']) for r in resumo['items_por_status'].values())
+
+
+def calcular_total_status_resumo(resumo, status):
+    """
+    Retorna o total (R$) dos itens com um determinado status
+    
+    Args:
+        resumo: Dicionário retornado por get_resumo_totais()
+        status: Status dos itens (ex: "Contratado")
+        
+    Returns:
+        Total dos itens com o status (float)
+    """
+    return float(resumo['items_por_status'].get(status, {}).get('total', 0.0))
+
+
+def contar_itens_status_resumo(resumo, status):
+    """
+    Retorna a quantidade de itens com um determinado status
+    
+    Args:
+        resumo: Dicionário retornado por get_resumo_totais()
+        status: Status dos itens (ex: "Pendente")
+        
+    Returns:
+        Quantidade de itens (int)
+    """
+    return int(resumo['items_por_status'].get(status, {}).get('quantidade', 0))
+
+
+def calcular_totais_categoria_resumo(resumo):
+    """
+    Retorna o total de orçamentos por categoria, ordenado pelo nome
+    
+    Args:
+        resumo: Dicionário retornado por get_resumo_totais()
+        
+    Returns:
+        Dicionário {categoria: total}
+    """
+    return {
+        categoria: float(r['total'])
+        for categoria, r in sorted(resumo['orcamentos_por_categoria'].items())
+    }
+
+
+def calcular_porcentagem_tarefas_resumo(resumo):
+    """
+    Calcula a porcentagem de tarefas concluídas a partir do resumo agregado
+    
+    Args:
+        resumo: Dicionário retornado por get_resumo_totais()
+        
+    Returns:
+        Porcentagem de conclusão (float)
+    """
+    total = resumo['tasks']['total']
+    if not total:
+        return 0.0
+    return (resumo['tasks']['concluidas'] / total) * 100
+
+
+def calcular_dashboard_summary(items, tasks, config):
+    """
+    Calcula localmente o mesmo resumo retornado pela função
+    dashboard_summary() do banco (usado quando a função não está disponível)
+    
+    Args:
+        items: Lista de itens do casamento (Item)
+        tasks: Lista de tarefas (Task)
+        config: Dicionário com as configurações financeiras
+        
+    Returns:
+        Dicionário com métricas, séries dos gráficos e tarefas pendentes
+    """
+    status_count = {}
+    for item in items:
+        status_count[item.status] = status_count.get(item.status, 0) + 1
+    
+    return {
+        'orcamento_maximo': config.get('orcamento_maximo', 30000.0),
+        'total_orcado': calcular_total_orcado(items),
+        'tasks': {
+            'total': len(tasks),
+            'concluidas': sum(1 for task in tasks if task.concluida)
+        },
+        'gastos': [
+            {'item': item.item, 'preco': item.preco}
+            for item in items if item.preco > 0
+        ],
+        'status': [
+            {'status': status, 'quantidade': quantidade}
+            for status, quantidade in status_count.items()
+        ],
+        'tarefas_pendentes': [
+            {'id': task.id, 'tarefa': task.tarefa}
+            for task in tasks if not task.concluida
+        ][:5]
+    }
@@ -3,20 +3,80 @@ Utilitários para gerar arquivos .ics (iCalendar)
 para exportação de agendamentos para Google Calendar, Apple Calendar, Outlook, etc.
 """
 
-from icalendar import Calendar, Event, Alarm
+from icalendar import Calendar, Event, Alarm, Timezone, vRecur
 from datetime import datetime, timedelta, time as dt_time
+from functools import lru_cache
 import pytz
+from utils.models import DURACAO_PADRAO, TZ_SAO_PAULO
 
+def _momento_utc(momento):
+    """Converte para UTC (timestamps sem fuso vindos do banco já estão em UTC)"""
+    if momento.tzinfo is None:
+        return pytz.utc.localize(momento)
+    return momento.astimezone(pytz.utc)
+
+
+def _datas_controle(agendamento, agora):
+    """
+    Retorna (criado, modificado) em UTC para CREATED e LAST-MODIFIED
+    
+    A modificação é a exclusão (se houver), senão a última alteração; sem
+    registro no banco, usa agora. DTSTAMP também recebe a modificação, para
+    que um evento inalterado seja exportado sempre com os mesmos bytes.
+    """
+    criado = _momento_utc(agendamento.created_at) if agendamento.created_at else agora
+    modificado = agendamento.deleted_at or agendamento.updated_at
+    modificado = _momento_utc(modificado) if modificado else criado
+    return criado, modificado
+
+
+def _series(agendamentos):
+    """
+    Um agendamento por evento: ocorrências expandidas de uma série
+    recorrente viram a própria série (RRULE), uma única vez
+    """
+    vistas = set()
+    for agendamento in agendamentos:
+        agendamento = agendamento.serie or agendamento
+        if agendamento.rrule:
+            if agendamento.id in vistas:
+                continue
+            vistas.add(agendamento.id)
+        yield agendamento
+
+
+def _exdates(agendamento):
+    """EXDATE: datas excluídas da série, no horário (e fuso) do DTSTART"""
+    return [TZ_SAO_PAULO.localize(datetime.combine(dia, agendamento.hora)) for dia in agendamento.exdates]
+
+
+def _status_evento(agendamento):
+    """STATUS do VEVENT: visitas excluídas são publicadas como canceladas"""
+    if agendamento.deleted_at is not None or 'Cancelado' in agendamento.status:
+        return 'CANCELLED'
+    if 'Confirmado' in agendamento.status or 'Concluído' in agendamento.status:
+        return 'CONFIRMED'
+    return 'TENTATIVE'
+
+
+@lru_cache(maxsize=512)
 def gerar_ics_agendamento(agendamento):
     """
     Gera arquivo .ics para um agendamento específico
     
+    O resultado fica em cache (LRU, até 512 arquivos) pelo hash de todos os
+    campos do agendamento: qualquer alteração gera um novo arquivo e os
+    menos usados são descartados.
+    
+    Uma ocorrência de série recorrente exporta a série inteira (RRULE).
+    
     Args:
-        agendamento (dict): Dicionário com dados do agendamento
+        agendamento (Agendamento): Agendamento (data e hora já convertidas)
         
     Returns:
         bytes: Conteúdo do arquivo .ics
     """
+    agendamento = agendamento.serie or agendamento
     cal = Calendar()
     
     # Propriedades do calendário
@@ -31,70 +91,66 @@ def gerar_ics_agendamento(agendamento):
     # Criar evento
     evento = Event()
     
-    # Parsear data e hora
-    try:
-        if isinstance(agendamento['data'], str):
-            data_agend = datetime.strptime(agendamento['data'], '%Y-%m-%d').date()
-        else:
-            data_agend = agendamento['data']
-        
-        if isinstance(agendamento['hora'], str):
-            # Tentar diferentes formatos de hora
-            try:
-                hora_agend = datetime.strptime(agendamento['hora'], '%H:%M:%S').time()
-            except ValueError:
-                hora_agend = datetime.strptime(agendamento['hora'], '%H:%M').time()
-        else:
-            hora_agend = agendamento['hora']
-    except Exception as e:
-        raise ValueError(f"Erro ao parsear data/hora: {e}")
+    # Data e hora já convertidas na leitura do banco
+    data_agend = agendamento.data
+    hora_agend = agendamento.hora
     
     # Timezone de São Paulo
-    tz = pytz.timezone('America/Sao_Paulo')
+    tz = TZ_SAO_PAULO
     
-    # Combinar data e hora
-    inicio = tz.localize(datetime.combine(data_agend, hora_agend))
-    fim = inicio + timedelta(hours=1)  # Duração padrão de 1 hora
+    # Início (com fuso) já calculado na leitura do banco
+    inicio = agendamento.inicio
+    fim = inicio + DURACAO_PADRAO  # Duração padrão de 1 hora
     
     # UID único para o evento
-    evento.add('uid', f"agendamento-{agendamento['id']}@casamento.douglas-s29.streamlit.app")
+    evento.add('uid', f"agendamento-{agendamento.id}@casamento.douglas-s29.streamlit.app")
     
     # Título do evento
-    titulo = f"{agendamento['categoria']} - {agendamento['local']}"
+    titulo = f"{agendamento.categoria} - {agendamento.local}"
     evento.add('summary', titulo)
     
     # Datas
     evento.add('dtstart', inicio)
     evento.add('dtend', fim)
-    evento.add('dtstamp', datetime.now(tz))
-    evento.add('created', datetime.now(tz))
-    evento.add('last-modified', datetime.now(tz))
+    
+    # Controle de alterações: datas reais do registro e revisão
+    criado, modificado = _datas_controle(agendamento, datetime.now(pytz.utc))
+    evento.add('dtstamp', modificado)
+    evento.add('sequence', agendamento.revisao)
+    evento.add('created', criado)
+    evento.add('last-modified', modificado)
+    
+    # Recorrência (um único evento para a série)
+    if agendamento.rrule:
+        evento.add('rrule', vRecur.from_ical(agendamento.rrule))
+        if agendamento.exdates:
+            evento.add('exdate', _exdates(agendamento))
     
     # Descrição detalhada
     descricao_partes = []
-    descricao_partes.append(f"📅 Visita agendada: {agendamento['categoria']}")
-    descricao_partes.append(f"🏢 Local: {agendamento['local']}")
+    descricao_partes.append(f"📅 Visita agendada: {agendamento.categoria}")
+    descricao_partes.append(f"🏢 Local: {agendamento.local}")
     descricao_partes.append("")
     
-    if agendamento.get('contato'):
-        descricao_partes.append(f"👤 Contato: {agendamento['contato']}")
-    if agendamento.get('telefone'):
-        descricao_partes.append(f"📞 Telefone: {agendamento['telefone']}")
-    if agendamento.get('endereco'):
-        descricao_partes.append(f"📍 Endereço: {agendamento['endereco']}")
+    if agendamento.contato:
+        descricao_partes.append(f"👤 Contato: {agendamento.contato}")
+    if agendamento.telefone:
+        descricao_partes.append(f"📞 Telefone: {agendamento.telefone}")
+    if agendamento.endereco:
+        descricao_partes.append(f"📍 Endereço: {agendamento.endereco}")
     
     descricao_partes.append("")
     
-    if agendamento.get('observacao'):
+    if agendamento.observacao:
         descricao_partes.append(f"📝 Observações:")
-        descricao_partes.append(agendamento['observacao'])
+        descricao_partes.append(agendamento.observacao)
         descricao_partes.append("")
     
-    if agendamento.get('link'):
-        descricao_partes.append(f"🔗 Link: {agendamento['link']}")
+    if agendamento.link:
+        descricao_partes.append(f"🔗 Link: {agendamento.link}")
         descricao_partes.append("")
     
-    descricao_partes.append(f"📊 Status: {agendamento.get('status', 'Agendado')}")
+    descricao_partes.append(f"📊 Status: {agendamento.status}")
     descricao_partes.append("")
     descricao_partes.append("💍 Gerenciador de Casamento")
     descricao_partes.append("Criado em: douglas-s29/casamento_streamlit")
@@ -102,32 +158,27 @@ def gerar_ics_agendamento(agendamento):
     evento.add('description', '\n'.join(descricao_partes))
     
     # Localização
-    if agendamento.get('endereco'):
-        evento.add('location', agendamento['endereco'])
-    elif agendamento.get('local'):
-        evento.add('location', agendamento['local'])
+    if agendamento.endereco:
+        evento.add('location', agendamento.endereco)
+    elif agendamento.local:
+        evento.add('location', agendamento.local)
     
     # Status do evento
-    status_evento = 'TENTATIVE'  # Default
-    if 'Confirmado' in agendamento.get('status', '') or 'Concluído' in agendamento.get('status', ''):
-        status_evento = 'CONFIRMED'
-    elif 'Cancelado' in agendamento.get('status', ''):
-        status_evento = 'CANCELLED'
-    evento.add('status', status_evento)
+    evento.add('status', _status_evento(agendamento))
     
     # Prioridade (Alta para visitas importantes)
     evento.add('priority', 5)  # 1=alta, 5=média, 9=baixa
     
     # Categoria
-    categorias = [agendamento['categoria'].replace('🍰 ', '').replace('🏛️ ', '').replace('📸 ', '').strip(), 'Casamento', 'Visita']
+    categorias = [agendamento.categoria.replace('🍰 ', '').replace('🏛️ ', '').replace('📸 ', '').strip(), 'Casamento', 'Visita']
     evento.add('categories', categorias)
     
     # Cor do evento (se o calendário suportar)
-    evento.add('color', agendamento.get('cor', '#FF69B4'))
+    evento.add('color', agendamento.cor)
     
     # URL do evento (se tiver link)
-    if agendamento.get('link'):
-        evento.add('url', agendamento['link'])
+    if agendamento.link:
+        evento.add('url', agendamento.link)
     
     # Alarme/Lembrete (1 dia antes às 9h)
     # Calcular trigger: diferença entre o evento e 9h do dia anterior
@@ -136,7 +187,8 @@ def gerar_ics_agendamento(agendamento):
     trigger_1dia = dia_anterior_9h - inicio
     
     # Só adiciona o alarme se ele for antes do evento (timedelta negativo)
-    if trigger_1dia.total_seconds() < 0:
+    # e se a visita não foi excluída
+    if trigger_1dia.total_seconds() < 0 and agendamento.deleted_at is None:
         alarme = Alarm()
         alarme.add('action', 'DISPLAY')
         alarme.add('description', f"Lembrete: {titulo}")
@@ -147,134 +199,250 @@ def gerar_ics_agendamento(agendamento):
     # Só adiciona se o horário do evento for 02:00 ou posterior
     # (para garantir que o alarme não dispare no dia anterior)
     hora_em_minutos = hora_agend.hour * 60 + hora_agend.minute
-    if hora_em_minutos >= 120:  # >= 02:00 (120 minutos)
+    if hora_em_minutos >= 120 and agendamento.deleted_at is None:  # >= 02:00 (120 minutos)
         alarme2 = Alarm()
         alarme2.add('action', 'DISPLAY')
-        alarme2.add('description', f"Lembrete: Visita em 2 horas - {agendamento['local']}")
+        alarme2.add('description', f"Lembrete: Visita em 2 horas - {agendamento.local}")
         alarme2.add('trigger', timedelta(hours=-2))
         evento.add_component(alarme2)
     
-    # Adicionar evento ao calendário
+    # Adicionar o VTIMEZONE do TZID usado no DTSTART e o evento ao calendário
+    cal.add_component(_FUSO)
     cal.add_component(evento)
     
     return cal.to_ical()
 
 
-def gerar_ics_multiplos_agendamentos(agendamentos, nome_arquivo="visitas"):
+# ==================== SERIALIZAÇÃO DIRETA (RFC 5545) ====================
+
+# Blocos fixos pré-codificados
+_CABECALHO = (
+    b"BEGIN:VCALENDAR\r\n"
+    b"VERSION:2.0\r\n"
+    b"PRODID:-//Gerenciador de Casamento//douglas-s29//PT-BR\r\n"
+    b"CALSCALE:GREGORIAN\r\n"
+    b"METHOD:PUBLISH\r\n"
+)
+_RODAPE = b"END:VCALENDAR\r\n"
+_TZID = "TZID=America/Sao_Paulo"
+# VTIMEZONE exigido para o TZID dos eventos (RFC 5545, seção 3.6.5), com as
+# transições de horário de verão de São Paulo; mesmo bloco do icalendar
+_FUSO = Timezone.from_tzid(TZ_SAO_PAULO.zone)
+_VTIMEZONE = _FUSO.to_ical()
+
+
+def _escapar(texto):
+    """Escapa um valor TEXT (RFC 5545, seção 3.3.11), na mesma ordem do icalendar"""
+    return (
+        texto.replace(r"\N", "\n")
+        .replace("\\", "\\\\")
+        .replace(";", r"\;")
+        .replace(",", r"\,")
+        .replace("\r\n", r"\n")
+        .replace("\n", r"\n")
+        .replace("\r", r"\n")
+    )
+
+
+def _dobrar(linha):
     """
-    Gera arquivo .ics com múltiplos agendamentos
+    Dobra uma linha de conteúdo em trechos de até 74 octetos (RFC 5545, 3.1)
     
-    Args:
-        agendamentos (list): Lista de dicionários com agendamentos
-        nome_arquivo (str): Nome base do arquivo
-        
-    Returns:
-        bytes: Conteúdo do arquivo .ics
+    Nunca corta um caractere UTF-8 ao meio e, como o icalendar, não deixa
+    uma barra invertida (ou ^) no fim de um trecho.
     """
-    cal = Calendar()
+    dados = linha.encode('utf-8')
+    if len(dados) < 75:
+        return dados
+    
+    partes = []
+    inicio = 0
+    while len(dados) - inicio > 74:
+        fim = inicio + 74
+        while dados[fim] & 0xC0 == 0x80:  # Byte de continuação UTF-8
+            fim -= 1
+        if dados[fim - 1] in b"\\^":
+            fim -= 1
+        partes.append(dados[inicio:fim])
+        inicio = fim
+    partes.append(dados[inicio:])
+    return b"\r\n ".join(partes)
+
+
+def _duracao(delta):
+    """Formata um timedelta como DURATION (ex: -P1DT1H, -PT16H30M)"""
+    sinal = ""
+    if delta.days < 0:
+        sinal = "-"
+        delta = -delta
+    parte_hora = ""
+    if delta.seconds:
+        horas, resto = divmod(delta.seconds, 3600)
+        minutos, segundos = divmod(resto, 60)
+        parte_hora = "T"
+        if horas:
+            parte_hora += f"{horas}H"
+        if minutos or (horas and segundos):
+            parte_hora += f"{minutos}M"
+        if segundos:
+            parte_hora += f"{segundos}S"
+    if delta.days == 0 and parte_hora:
+        return f"{sinal}P{parte_hora}"
+    return f"{sinal}P{delta.days}D{parte_hora}"
+
+
+def _utc_ics(momento):
+    """Formata um datetime em UTC no formato DATE-TIME do iCalendar"""
+    return _momento_utc(momento).strftime('%Y%m%dT%H%M%SZ')
+
+
+def _linhas_evento(agendamento, agora):
+    """
+    Monta as linhas (ainda não dobradas) do VEVENT de um agendamento
     
-    # Propriedades do calendário
-    cal.add('prodid', '-//Gerenciador de Casamento//douglas-s29//PT-BR')
-    cal.add('version', '2.0')
-    cal.add('calscale', 'GREGORIAN')
-    cal.add('method', 'PUBLISH')
-    cal.add('x-wr-calname', f'Casamento - {nome_arquivo.title()}')
-    cal.add('x-wr-timezone', 'America/Sao_Paulo')
-    cal.add('x-wr-caldesc', f'Agendamentos de visitas para o casamento ({len(agendamentos)} eventos)')
+    Agendamentos excluídos (deleted_at) viram registros de cancelamento:
+    mesmo UID, SEQUENCE maior e STATUS:CANCELLED, sem alarme. Séries
+    recorrentes são um único VEVENT com RRULE e EXDATE.
+    """
+    inicio = agendamento.inicio
+    titulo = f"{agendamento.categoria} - {agendamento.local}"
+    
+    # Descrição (mesmo texto da exportação via icalendar)
+    descricao = f"📅 Visita: {agendamento.categoria}\n"
+    descricao += f"🏢 Local: {agendamento.local}\n\n"
+    if agendamento.contato:
+        descricao += f"👤 Contato: {agendamento.contato}\n"
+    if agendamento.telefone:
+        descricao += f"📞 Telefone: {agendamento.telefone}\n"
+    if agendamento.observacao:
+        descricao += f"\n📝 Observações:\n{agendamento.observacao}\n"
+    if agendamento.link:
+        descricao += f"\n🔗 Link: {agendamento.link}\n"
+    descricao += f"\n📊 Status: {agendamento.status}\n"
+    descricao += "\n💍 Gerenciador de Casamento"
+    
+    status_evento = _status_evento(agendamento)
+    criado, modificado = _datas_controle(agendamento, agora)
+    carimbo_modificado = _utc_ics(modificado)
+    
+    categoria = agendamento.categoria.replace('🍰 ', '').replace('🏛️ ', '').replace('📸 ', '').strip()
+    
+    # Propriedades na ordem canônica do icalendar (as demais em ordem alfabética)
+    linhas = [
+        "BEGIN:VEVENT",
+        f"SUMMARY:{_escapar(titulo)}",
+        f"DTSTART;{_TZID}:{inicio:%Y%m%dT%H%M%S}",
+        f"DTEND;{_TZID}:{inicio + DURACAO_PADRAO:%Y%m%dT%H%M%S}",
+        f"DTSTAMP:{carimbo_modificado}",
+        f"UID:{_escapar(f'agendamento-{agendamento.id}@casamento.douglas-s29.streamlit.app')}",
+        f"SEQUENCE:{agendamento.revisao}",
+    ]
+    if agendamento.rrule:
+        # RRULE já gravada na forma canônica (normalizar_rrule)
+        linhas.append(f"RRULE:{agendamento.rrule}")
+        if agendamento.exdates:
+            datas = ",".join(f"{dia:%Y%m%d}T{agendamento.hora:%H%M%S}" for dia in agendamento.exdates)
+            linhas.append(f"EXDATE;{_TZID}:{datas}")
+    linhas += [
+        f"CATEGORIES:{_escapar(categoria)},Casamento",
+        f"COLOR:{agendamento.cor}",  # Sem escape, como no icalendar
+        f"CREATED:{_utc_ics(criado)}",
+        f"DESCRIPTION:{_escapar(descricao)}",
+        f"LAST-MODIFIED:{carimbo_modificado}",
+    ]
+    if agendamento.endereco:
+        linhas.append(f"LOCATION:{_escapar(agendamento.endereco)}")
+    linhas.append(f"STATUS:{status_evento}")
+    if agendamento.link:
+        if '\r' in agendamento.link or '\n' in agendamento.link:
+            raise ValueError("URI não pode conter quebras de linha")
+        linhas.append(f"URL:{agendamento.link}")
+    
+    # Alarme (1 dia antes às 9h), só se for antes do evento
+    dia_anterior_9h = TZ_SAO_PAULO.localize(datetime.combine(agendamento.data - timedelta(days=1), dt_time(9, 0)))
+    trigger_1dia = dia_anterior_9h - inicio
+    if trigger_1dia.total_seconds() < 0 and agendamento.deleted_at is None:
+        linhas += [
+            "BEGIN:VALARM",
+            "ACTION:DISPLAY",
+            f"DESCRIPTION:{_escapar(f'Lembrete: {agendamento.local}')}",
+            f"TRIGGER:{_duracao(trigger_1dia)}",
+            "END:VALARM",
+        ]
+    
+    linhas.append("END:VEVENT")
+    return linhas
+
+
+def gerar_ics_stream(agendamentos, nome_arquivo="visitas", agora=None, total=None):
+    """
+    Gera o arquivo .ics em partes, sob demanda (gerador)
     
-    tz = pytz.timezone('America/Sao_Paulo')
+    Produz o cabeçalho do VCALENDAR, o VTIMEZONE de São Paulo (antes do
+    primeiro evento), um bloco por VEVENT e o rodapé, consumindo
+    os agendamentos de forma preguiçosa (ex: iterar_agendamentos, paginado).
+    Ocorrências de uma mesma série recorrente geram um único VEVENT.
+    A memória usada não depende da quantidade de eventos, e as partes podem
+    ser escritas em qualquer destino (arquivo, resposta HTTP, ...).
     
-    for agendamento in agendamentos:
-        try:
-            evento = Event()
-            
-            # Parsear data e hora
-            if isinstance(agendamento['data'], str):
-                data_agend = datetime.strptime(agendamento['data'], '%Y-%m-%d').date()
-            else:
-                data_agend = agendamento['data']
-            
-            if isinstance(agendamento['hora'], str):
-                try:
-                    hora_agend = datetime.strptime(agendamento['hora'], '%H:%M:%S').time()
-                except ValueError:
-                    hora_agend = datetime.strptime(agendamento['hora'], '%H:%M').time()
-            else:
-                hora_agend = agendamento['hora']
-            
-            # Combinar data e hora
-            inicio = tz.localize(datetime.combine(data_agend, hora_agend))
-            fim = inicio + timedelta(hours=1)
-            
-            # Propriedades do evento
-            evento.add('uid', f"agendamento-{agendamento['id']}@casamento.douglas-s29.streamlit.app")
-            evento.add('summary', f"{agendamento['categoria']} - {agendamento['local']}")
-            evento.add('dtstart', inicio)
-            evento.add('dtend', fim)
-            evento.add('dtstamp', datetime.now(tz))
-            evento.add('created', datetime.now(tz))
-            
-            # Descrição
-            descricao = f"📅 Visita: {agendamento['categoria']}\n"
-            descricao += f"🏢 Local: {agendamento['local']}\n\n"
-            
-            if agendamento.get('contato'):
-                descricao += f"👤 Contato: {agendamento['contato']}\n"
-            if agendamento.get('telefone'):
-                descricao += f"📞 Telefone: {agendamento['telefone']}\n"
-            if agendamento.get('observacao'):
-                descricao += f"\n📝 Observações:\n{agendamento['observacao']}\n"
-            if agendamento.get('link'):
-                descricao += f"\n🔗 Link: {agendamento['link']}\n"
-            
-            descricao += f"\n📊 Status: {agendamento.get('status', 'Agendado')}\n"
-            descricao += f"\n💍 Gerenciador de Casamento"
-            
-            evento.add('description', descricao)
-            
-            # Localização
-            if agendamento.get('endereco'):
-                evento.add('location', agendamento['endereco'])
-            
-            # Status
-            status_evento = 'TENTATIVE'  # Default
-            if 'Confirmado' in agendamento.get('status', '') or 'Concluído' in agendamento.get('status', ''):
-                status_evento = 'CONFIRMED'
-            elif 'Cancelado' in agendamento.get('status', ''):
-                status_evento = 'CANCELLED'
-            evento.add('status', status_evento)
-            
-            # Categoria
-            categorias = [agendamento['categoria'].replace('🍰 ', '').replace('🏛️ ', '').replace('📸 ', '').strip(), 'Casamento']
-            evento.add('categories', categorias)
-            
-            # Cor
-            evento.add('color', agendamento.get('cor', '#FF69B4'))
-            
-            # URL
-            if agendamento.get('link'):
-                evento.add('url', agendamento['link'])
-            
-            # Alarme (1 dia antes às 9h)
-            # Calcular trigger: diferença entre o evento e 9h do dia anterior
-            # Só adiciona se o alarme for antes do evento (para eventos após 9h)
-            dia_anterior_9h = tz.localize(datetime.combine(data_agend - timedelta(days=1), dt_time(9, 0)))
-            trigger_1dia = dia_anterior_9h - inicio
-            
-            # Só adiciona o alarme se ele for antes do evento (timedelta negativo)
-            if trigger_1dia.total_seconds() < 0:
-                alarme = Alarm()
-                alarme.add('action', 'DISPLAY')
-                alarme.add('description', f"Lembrete: {agendamento['local']}")
-                alarme.add('trigger', trigger_1dia)
-                evento.add_component(alarme)
-            
-            # Adicionar ao calendário
-            cal.add_component(evento)
+    Args:
+        agendamentos: Iterável de agendamentos (Agendamento)
+        nome_arquivo (str): Nome base do arquivo
+        agora (datetime): Momento usado em DTSTAMP/CREATED dos agendamentos
+            sem datas de controle (padrão: agora)
+        total (int): Quantidade de eventos exibida na descrição do calendário
+            (omitida quando None)
         
+    Yields:
+        bytes: Partes consecutivas do arquivo .ics
+    """
+    agora = (agora or datetime.now(TZ_SAO_PAULO)).astimezone(pytz.utc).replace(microsecond=0)
+    
+    descricao = "Agendamentos de visitas para o casamento"
+    if total is not None:
+        descricao += f" ({total} eventos)"
+    
+    # Propriedades X- são gravadas sem escape (como no icalendar)
+    yield b"".join([
+        _CABECALHO,
+        _dobrar(f"X-WR-CALDESC:{descricao}"),
+        b"\r\n",
+        _dobrar(f"X-WR-CALNAME:Casamento - {nome_arquivo.title()}"),
+        b"\r\nX-WR-TIMEZONE:America/Sao_Paulo\r\n",
+    ])
+    
+    fuso = _VTIMEZONE
+    for agendamento in _series(agendamentos):
+        try:
+            linhas = _linhas_evento(agendamento, agora)
         except (ValueError, KeyError, TypeError, AttributeError):
             # Ignora agendamentos com dados inválidos e continua processando
-            # Possíveis erros: data/hora inválida, campos obrigatórios faltando
             continue
+        linhas.append("")  # CRLF final do bloco
+        # Calendário sem eventos não referencia o TZID: VTIMEZONE só com o primeiro
+        yield fuso + b"\r\n".join(map(_dobrar, linhas))
+        fuso = b""
     
-    return cal.to_ical()
+    yield _RODAPE
+
+
+def gerar_ics_multiplos_agendamentos(agendamentos, nome_arquivo="visitas", agora=None):
+    """
+    Gera arquivo .ics com múltiplos agendamentos
+    
+    Serializa diretamente no formato RFC 5545 (escape, dobra de linhas em
+    74 octetos e CRLF), sem montar objetos icalendar: os blocos fixos já vêm
+    codificados e cada evento é escrito direto no buffer de saída. Produz os
+    mesmos bytes que a montagem com objetos icalendar (ver tests/test_ics.py).
+    
+    Args:
+        agendamentos (list): Lista de agendamentos (Agendamento)
+        nome_arquivo (str): Nome base do arquivo
+        agora (datetime): Momento usado em DTSTAMP/CREATED dos agendamentos
+            sem datas de controle (padrão: agora)
+        
+    Returns:
+        bytes: Conteúdo do arquivo .ics
+    """
+    agendamentos = list(_series(agendamentos))
+    return b"".join(gerar_ics_stream(agendamentos, nome_arquivo, agora, total=len(agendamentos)))
@@ -0,0 +1,172 @@
+"""
+Feed de calendário assinável (webcal) com os agendamentos
+Servidor HTTP leve que roda junto com o Streamlit e responde a GET
+condicional: clientes que já têm a versão atual recebem 304 sem corpo.
+"""
+import hashlib
+import hmac
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Tuple
+from urllib.parse import parse_qs, urlencode, urlparse
+
+import streamlit as st
+from utils.calendar_utils import gerar_ics_stream
+from utils.supabase_client import paginar_agendamentos, versao_dados
+
+# Caminho do feed no servidor
+CAMINHO_FEED = "/agendamentos.ics"
+
+# Intervalo máximo (segundos) até verificar alterações feitas fora deste processo
+TTL_FEED = 300
+
+
+class _FeedCache:
+    """Último calendário gerado, com o ETag calculado a partir dos dados"""
+
+    def __init__(self, ttl: int = TTL_FEED):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._versao: Optional[int] = None
+        self._gerado_em = 0.0
+        self._etag = ""
+        self._corpo = b""
+
+    def obter(self) -> Tuple[str, bytes]:
+        """Retorna (etag, corpo), regenerando se a versão mudou ou o TTL expirou"""
+        versao = versao_dados('agendamentos')
+        with self._lock:
+            expirado = time.monotonic() - self._gerado_em > self.ttl
+            if versao != self._versao or expirado:
+                self._regenerar(versao)
+            return self._etag, self._corpo
+
+    def _regenerar(self, versao: int) -> None:
+        # Erros propagam (503): um calendário vazio apagaria os eventos dos assinantes.
+        # Excluídos recentes entram como cancelados, para os clientes removerem o evento
+        agendamentos = list(paginar_agendamentos(incluir_excluidos=True))
+
+        # ETag forte: hash dos dados (não do arquivo, cujo DTSTAMP usa o
+        # horário da geração quando o registro não tem datas de controle)
+        resumo = hashlib.sha256()
+        for agendamento in agendamentos:
+            resumo.update(repr(agendamento.to_dict()).encode('utf-8'))
+        etag = f'"{resumo.hexdigest()[:32]}"'
+
+        # Mesmos dados: mantém o corpo anterior (e seu ETag)
+        if etag != self._etag:
+            self._corpo = b"".join(
+                gerar_ics_stream(agendamentos, "visitas", total=len(agendamentos))
+            )
+            self._etag = etag
+        self._versao = versao
+        self._gerado_em = time.monotonic()
+
+
+def _etag_confere(cabecalho: Optional[str], etag: str) -> bool:
+    """Verifica o If-None-Match (lista de ETags ou *) contra o ETag atual"""
+    if not cabecalho:
+        return False
+    candidatos = [parte.strip() for parte in cabecalho.split(',')]
+    # Comparação fraca, como exige o RFC 9110 para If-None-Match
+    return '*' in candidatos or any(
+        candidato.removeprefix('W/') == etag for candidato in candidatos
+    )
+
+
+def _criar_handler(cache: _FeedCache, token: str):
+    """Cria a classe de handler HTTP ligada ao cache e ao token do feed"""
+
+    class FeedHandler(BaseHTTPRequestHandler):
+        server_version = "CasamentoFeed/1.0"
+
+        def do_GET(self):
+            self._responder(corpo=True)
+
+        def do_HEAD(self):
+            self._responder(corpo=False)
+
+        def _responder(self, corpo: bool):
+            url = urlparse(self.path)
+            if url.path != CAMINHO_FEED:
+                self.send_error(404)
+                return
+            recebido = parse_qs(url.query).get('token', [''])[0]
+            # Em bytes: compare_digest recusa str com caracteres não ASCII
+            if not hmac.compare_digest(recebido.encode('utf-8'), token.encode('utf-8')):
+                self.send_error(403)
+                return
+
+            try:
+                etag, conteudo = cache.obter()
+            except Exception:
+                self.send_error(503)
+                return
+
+            if _etag_confere(self.headers.get('If-None-Match'), etag):
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.send_header('Cache-Control', f'private, max-age={cache.ttl}')
+                self.end_headers()
+                return
+
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/calendar; charset=utf-8')
+            self.send_header('Content-Length', str(len(conteudo)))
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', f'private, max-age={cache.ttl}')
+            self.end_headers()
+            if corpo:
+                self.wfile.write(conteudo)
+
+        def log_message(self, format, *args):
+            # Milhares de clientes consultando a cada hora: sem log por requisição
+            pass
+
+    return FeedHandler
+
+
+@st.cache_resource
+def iniciar_feed(porta: int, token: str, endereco: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """
+    Inicia (uma única vez por processo) o servidor do feed em segundo plano
+
+    O feed expõe telefone, endereço, contato e observações de todas as
+    visitas, então não inicia sem token. Falhas levantam exceção em vez de
+    retornar um valor, para que não fiquem no cache: a próxima execução
+    tenta de novo (ex: depois de definir o token ou liberar a porta).
+
+    Args:
+        porta: Porta TCP do servidor
+        token: Token exigido na URL (?token=...), obrigatório
+        endereco: Interface em que o servidor escuta (padrão: só a máquina local)
+
+    Returns:
+        Servidor em execução
+
+    Raises:
+        ValueError: Se o token não foi definido
+        OSError: Se não foi possível abrir a porta
+    """
+    if not token:
+        raise ValueError("token do feed não definido")
+    servidor = ThreadingHTTPServer((endereco, porta), _criar_handler(_FeedCache(), token))
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, name="feed-calendario", daemon=True).start()
+    return servidor
+
+
+def url_feed(host: str, porta: int, token: str) -> str:
+    """
+    Monta a URL webcal:// para assinar o feed
+
+    Args:
+        host: Endereço público do servidor
+        porta: Porta do feed
+        token: Token do feed
+
+    Returns:
+        URL de assinatura (ex: webcal://host:8502/agendamentos.ics?token=...)
+    """
+    return f"webcal://{host}:{porta}{CAMINHO_FEED}?{urlencode({'token': token})}"
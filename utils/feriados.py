@@ -0,0 +1,109 @@
+"""
+Índice de feriados brasileiros (nacionais, estaduais e municipais)
+Construído sob demanda a partir do pacote holidays, um ano por vez, e
+mantido em cache: consultas por data são O(1) para qualquer ano.
+"""
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+import holidays
+from dateutil.easter import easter
+
+# Feriados oficiais (nacionais, estaduais e municipais)
+CATEGORIAS_FERIADOS = ("public",)
+# Pontos facultativos tratados como feriado, em dias a partir da Páscoa:
+# Carnaval (segunda e terça) e Corpus Christi. Os demais (Quarta-feira de
+# Cinzas, Dia do Servidor Público, vésperas de Natal e Ano-Novo) são dias úteis.
+PONTOS_FACULTATIVOS = (-48, -47, 60)
+
+
+@lru_cache(maxsize=64)
+def _indice_ano(ano: int, regiao: Optional[str]) -> Dict[date, str]:
+    """Feriados de um ano (data -> nome), para o Brasil ou uma UF/município"""
+    try:
+        calendario = holidays.country_holidays(
+            "BR", subdiv=regiao, years=ano, language="pt_BR", categories=CATEGORIAS_FERIADOS
+        )
+    except NotImplementedError:
+        # Região desconhecida: apenas os feriados nacionais
+        calendario = holidays.country_holidays(
+            "BR", years=ano, language="pt_BR", categories=CATEGORIAS_FERIADOS
+        )
+    indice = dict(calendario)
+
+    facultativos = holidays.country_holidays("BR", years=ano, language="pt_BR", categories=("optional",))
+    pascoa = easter(ano)
+    for dias in PONTOS_FACULTATIVOS:
+        dia = pascoa + timedelta(days=dias)
+        if dia in facultativos:
+            indice.setdefault(dia, facultativos[dia])
+    return indice
+
+
+def nome_feriado(data: date, regiao: Optional[str] = None) -> Optional[str]:
+    """
+    Retorna o nome do feriado na data (None se não for feriado)
+
+    Args:
+        data: Data a consultar
+        regiao: Sigla da UF (ex: "SP") ou município suportado pelo holidays
+            (ex: "São Paulo Capital"); None para apenas os nacionais
+
+    Returns:
+        Nome do feriado ou None
+    """
+    return _indice_ano(data.year, regiao).get(data)
+
+
+def feriados_periodo(inicio: date, fim: date, regiao: Optional[str] = None) -> List[Tuple[date, str]]:
+    """
+    Lista os feriados entre duas datas (inclusive), em ordem cronológica
+
+    Args:
+        inicio: Primeira data do período
+        fim: Última data do período
+        regiao: UF ou município (ver nome_feriado)
+
+    Returns:
+        Lista de tuplas (data, nome)
+    """
+    return [
+        (dia, nome)
+        for ano in range(inicio.year, fim.year + 1)
+        for dia, nome in sorted(_indice_ano(ano, regiao).items())
+        if inicio <= dia <= fim
+    ]
+
+
+@lru_cache(maxsize=32)
+def eventos_feriados(inicio: date, fim: date, regiao: Optional[str] = None) -> Tuple[dict, ...]:
+    """
+    Eventos de fundo do FullCalendar com os feriados do período
+
+    O resultado fica em cache por (período, região); os dicionários são
+    compartilhados entre as chamadas e não devem ser alterados.
+
+    Args:
+        inicio: Primeira data do período visível
+        fim: Última data do período visível
+        regiao: UF ou município (ver nome_feriado)
+
+    Returns:
+        Tupla de eventos (um por feriado) no formato do streamlit-calendar
+    """
+    return tuple(
+        {
+            "title": f"🔴 {nome}",
+            "start": dia.isoformat(),
+            "end": (dia + timedelta(days=1)).isoformat(),
+            "color": "#F44336",
+            "backgroundColor": "#F44336",
+            "borderColor": "#D32F2F",
+            "textColor": "#FFFFFF",
+            "allDay": True,
+            "display": "background",
+            "classNames": ["evento-feriado"]
+        }
+        for dia, nome in feriados_periodo(inicio, fim, regiao)
+    )
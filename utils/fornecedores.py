@@ -0,0 +1,289 @@
+"""
+Cadastro de fornecedores (orçamentos, itens e agendamentos)
+O mesmo fornecedor aparece com grafias diferentes em orcamentos.fornecedor,
+items.servico e agendamentos.local. Nomes normalizados iguais, o mesmo
+telefone e as unificações confirmadas (tabela fornecedor_aliases) formam um
+grupo com um nome canônico; nomes parecidos viram sugestões de unificação.
+"""
+import math
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+import streamlit as st
+from utils.busca import termos
+from utils.supabase_client import (
+    get_all_agendamentos, get_all_items, get_all_orcamentos, get_fornecedor_aliases, versao_dados
+)
+
+# Semelhança mínima (Jaccard dos trigramas) para sugerir uma unificação
+LIMIAR_SEMELHANCA = 0.5
+
+# Palavras que não distinguem fornecedores ("Buffet da Ana Ltda" = "Buffet Ana")
+_IGNORADAS = frozenset({"ltda", "me", "mei", "eireli", "epp", "sa", "cia", "e", "da", "de", "do", "das", "dos"})
+
+# Tabelas cujas versões invalidam o cadastro
+_TABELAS = ("orcamentos", "items", "agendamentos", "fornecedor_aliases")
+
+
+def chave_fornecedor(nome: str) -> str:
+    """
+    Nome normalizado usado para comparar fornecedores
+
+    Sem acentos, maiúsculas, pontuação, sufixos societários e com as
+    palavras em ordem ("Marquinhos Buffet" = "buffet marquinhos").
+    """
+    return " ".join(sorted(set(termos(nome.replace("&", " e "))) - _IGNORADAS))
+
+
+def chave_telefone(telefone: str) -> Optional[str]:
+    """Últimos 8 dígitos do telefone (ignora DDI, DDD e o nono dígito)"""
+    digitos = "".join(c for c in telefone or "" if c.isdigit())
+    return digitos[-8:] if len(digitos) >= 8 else None
+
+
+def _trigramas(chave: str) -> frozenset:
+    texto = f" {chave} "
+    return frozenset(texto[i:i + 3] for i in range(len(texto) - 2))
+
+
+def semelhanca(a: frozenset, b: frozenset) -> float:
+    """Índice de Jaccard entre dois conjuntos de trigramas"""
+    comuns = len(a & b)
+    return comuns / (len(a) + len(b) - comuns) if comuns else 0.0
+
+
+@dataclass(frozen=True, slots=True)
+class Mencao:
+    """Ocorrência de um fornecedor em uma linha do banco"""
+    tabela: str
+    id: int
+    nome: str
+    telefone: str = ""
+
+
+@dataclass(frozen=True, slots=True)
+class Sugestao:
+    """Dois grupos de fornecedores com nomes parecidos"""
+    manter: str
+    unir: str
+    semelhanca: float
+    chaves: Tuple[str, ...]
+
+
+class _Conjuntos:
+    """Union-find das chaves de fornecedor (compressão de caminho e união por tamanho)"""
+
+    def __init__(self):
+        self._pai: Dict[str, str] = {}
+        self._tamanho: Dict[str, int] = {}
+
+    def raiz(self, chave: str) -> str:
+        pai = self._pai.setdefault(chave, chave)
+        while pai != chave:
+            self._pai[chave] = self._pai[pai]
+            chave, pai = pai, self._pai[pai]
+        return chave
+
+    def unir(self, a: str, b: str) -> None:
+        a, b = self.raiz(a), self.raiz(b)
+        if a == b:
+            return
+        if self._tamanho.get(a, 1) < self._tamanho.get(b, 1):
+            a, b = b, a
+        self._pai[b] = a
+        self._tamanho[a] = self._tamanho.get(a, 1) + self._tamanho.get(b, 1)
+
+
+class RegistroFornecedores:
+    """
+    Fornecedores agrupados por nome normalizado, telefone e unificações
+
+    O nome canônico de um grupo é o da unificação confirmada ou, sem ela, a
+    grafia mais frequente.
+    """
+
+    def __init__(self, mencoes: Iterable[Mencao], aliases: Optional[Dict[str, str]] = None):
+        aliases = aliases or {}
+        conjuntos = _Conjuntos()
+        grafias: Dict[str, Counter] = {}
+        telefones: Dict[str, str] = {}
+        for mencao in mencoes:
+            chave = chave_fornecedor(mencao.nome)
+            if not chave:
+                continue
+            conjuntos.raiz(chave)
+            grafias.setdefault(chave, Counter())[mencao.nome.strip()] += 1
+            telefone = chave_telefone(mencao.telefone)
+            if telefone:
+                conjuntos.unir(telefones.setdefault(telefone, chave), chave)
+        preferidos: Dict[str, str] = {}
+        for alias, canonico in aliases.items():
+            conjuntos.unir(chave_fornecedor(canonico) or alias, alias)
+        for alias, canonico in sorted(aliases.items()):
+            preferidos.setdefault(conjuntos.raiz(alias), canonico)
+
+        self._grupos: Dict[str, List[str]] = {}
+        for chave in grafias:
+            self._grupos.setdefault(conjuntos.raiz(chave), []).append(chave)
+        self._canonico: Dict[str, str] = {}
+        for raiz, chaves in self._grupos.items():
+            # Sem unificação confirmada: grafia mais comum do nome mais citado
+            citado = min(chaves, key=lambda chave: (-sum(grafias[chave].values()), chave))
+            nome = preferidos.get(raiz) or grafias[citado].most_common(1)[0][0]
+            for chave in chaves:
+                self._canonico[chave] = nome
+        for alias, canonico in aliases.items():
+            self._canonico.setdefault(alias, self._canonico.get(chave_fornecedor(canonico), canonico))
+        self._raiz = {chave: conjuntos.raiz(chave) for chave in grafias}
+        self._grafias = grafias
+        self._telefones = {telefone: self._canonico[chave] for telefone, chave in telefones.items()}
+        self._sugestoes: Dict[float, List[Sugestao]] = {}
+
+    def _mencoes(self, chaves: List[str]) -> int:
+        return sum(sum(self._grafias[chave].values()) for chave in chaves)
+
+    def canonico(self, nome: str, telefone: str = "") -> str:
+        """Nome canônico do fornecedor (o próprio nome se não estiver no cadastro)"""
+        encontrado = self._canonico.get(chave_fornecedor(nome))
+        if encontrado is None:
+            encontrado = self._telefones.get(chave_telefone(telefone) or "")
+        return encontrado or nome.strip()
+
+    def grupos(self) -> Dict[str, List[str]]:
+        """Nome canônico -> grafias encontradas, só dos grupos com mais de uma grafia"""
+        resultado = {}
+        for chaves in self._grupos.values():
+            nomes = sorted({grafia for chave in chaves for grafia in self._grafias[chave]})
+            if len(nomes) > 1:
+                resultado[self._canonico[chaves[0]]] = nomes
+        return dict(sorted(resultado.items()))
+
+    def sugestoes(self, limiar: float = LIMIAR_SEMELHANCA) -> List[Sugestao]:
+        """
+        Pares de grupos com nomes parecidos, do mais para o menos parecido
+
+        Junção por semelhança com filtro de prefixo: com os trigramas de cada
+        nome em ordem de raridade, dois nomes com Jaccard >= limiar têm de
+        compartilhar um dos primeiros len - ceil(limiar * len) + 1 trigramas,
+        e o menor não pode ter menos de limiar * len do maior. Só esses
+        prefixos são indexados e consultados, em vez de comparar todos os
+        pares.
+
+        Args:
+            limiar: Semelhança mínima (0 a 1)
+
+        Returns:
+            Uma sugestão por par de grupos (a do par de nomes mais parecido)
+        """
+        # O cadastro não muda depois de criado (um por versão dos dados)
+        if limiar not in self._sugestoes:
+            self._sugestoes[limiar] = self._juntar(limiar)
+        return self._sugestoes[limiar]
+
+    def _juntar(self, limiar: float) -> List[Sugestao]:
+        gramas = {chave: _trigramas(chave) for chave in self._raiz}
+        # Números diferentes indicam fornecedores diferentes ("Salão 1" x "Salão 2")
+        numeros = {chave: {p for p in chave.split() if p.isdigit()} for chave in self._raiz}
+        frequencia = Counter(grama for conjunto in gramas.values() for grama in conjunto)
+        indice: Dict[str, List[str]] = {}
+        melhores: Dict[Tuple[str, str], Tuple[float, str, str]] = {}
+        for chave in sorted(gramas, key=lambda c: len(gramas[c])):
+            conjunto = gramas[chave]
+            ordenados = sorted(conjunto, key=lambda g: (frequencia[g], g))
+            prefixo = ordenados[:len(ordenados) - math.ceil(limiar * len(ordenados) - 1e-9) + 1]
+            # Em ordem de tamanho, os já indexados não são maiores que este
+            minimo = limiar * len(conjunto) - 1e-9
+            candidatos = {
+                outra for grama in prefixo for outra in indice.get(grama, ())
+                if len(gramas[outra]) >= minimo
+            }
+            for outra in candidatos:
+                raizes = tuple(sorted((self._raiz[chave], self._raiz[outra])))
+                if raizes[0] == raizes[1] or numeros[chave] != numeros[outra]:
+                    continue
+                valor = semelhanca(conjunto, gramas[outra])
+                if valor >= limiar and valor > melhores.get(raizes, (0.0,))[0]:
+                    melhores[raizes] = (valor, chave, outra)
+            for grama in prefixo:
+                indice.setdefault(grama, []).append(chave)
+
+        resultado = []
+        for (valor, chave, outra) in melhores.values():
+            grupo, outro = self._grupos[self._raiz[chave]], self._grupos[self._raiz[outra]]
+            # Fica o nome do grupo mais citado
+            if (-self._mencoes(outro), self._canonico[outra]) < (-self._mencoes(grupo), self._canonico[chave]):
+                grupo, outro, chave, outra = outro, grupo, outra, chave
+            resultado.append(Sugestao(
+                manter=self._canonico[chave],
+                unir=self._canonico[outra],
+                semelhanca=valor,
+                chaves=tuple(sorted(set(grupo + outro)))
+            ))
+        return sorted(resultado, key=lambda s: (-s.semelhanca, s.manter, s.unir))
+
+
+def mencoes_fornecedores(orcamentos, items, agendamentos) -> List[Mencao]:
+    """Fornecedores citados nos orçamentos, nos serviços dos itens e nos locais das visitas"""
+    mencoes = [Mencao("orcamentos", o.id, o.fornecedor, o.telefone) for o in orcamentos]
+    mencoes += [Mencao("items", i.id, i.servico) for i in items if i.servico]
+    mencoes += [Mencao("agendamentos", a.id, a.local, a.telefone) for a in agendamentos if a.local]
+    return mencoes
+
+
+@st.cache_resource(ttl=10, max_entries=2)
+def _registro(versoes: Tuple[int, ...]) -> RegistroFornecedores:
+    mencoes = mencoes_fornecedores(get_all_orcamentos(), get_all_items(), get_all_agendamentos())
+    aliases = {a.alias: a.canonico for a in get_fornecedor_aliases()}
+    return RegistroFornecedores(mencoes, aliases)
+
+
+def registro_fornecedores() -> RegistroFornecedores:
+    """Cadastro de fornecedores da versão atual dos dados (em cache)"""
+    return _registro(tuple(versao_dados(tabela) for tabela in _TABELAS))
+
+
+# ==================== TOTAIS POR FORNECEDOR ====================
+
+def totais_por_fornecedor(df_orcamentos: pd.DataFrame, registro: RegistroFornecedores) -> pd.DataFrame:
+    """
+    Orçamentos somados por categoria e fornecedor canônico
+
+    Args:
+        df_orcamentos: DataFrame de frame_orcamentos()
+        registro: Cadastro de fornecedores
+
+    Returns:
+        DataFrame com categoria, fornecedor, quantidade, menor e total
+    """
+    canonicos = [
+        registro.canonico(nome, telefone)
+        for nome, telefone in zip(df_orcamentos['fornecedor'], df_orcamentos['telefone'])
+    ]
+    return (
+        df_orcamentos.assign(fornecedor=canonicos)
+        .groupby(['categoria', 'fornecedor'], as_index=False, observed=True)
+        .agg(quantidade=('valor', 'size'), menor=('valor', 'min'), total=('valor', 'sum'))
+        .sort_values(['categoria', 'total'], ascending=[True, False], ignore_index=True)
+    )
+
+
+def gastos_por_fornecedor(df_items: pd.DataFrame, registro: RegistroFornecedores) -> pd.DataFrame:
+    """
+    Preço dos itens somado por fornecedor canônico (serviço do item)
+
+    Args:
+        df_items: DataFrame de frame_items()
+        registro: Cadastro de fornecedores
+
+    Returns:
+        DataFrame com fornecedor, itens e total, do maior para o menor
+    """
+    df = df_items[(df_items['preco'] > 0) & (df_items['servico'].str.strip() != "")]
+    return (
+        df.assign(fornecedor=[registro.canonico(servico) for servico in df['servico']])
+        .groupby('fornecedor', as_index=False)
+        .agg(itens=('preco', 'size'), total=('preco', 'sum'))
+        .sort_values('total', ascending=False, ignore_index=True)
+    )
@@ -0,0 +1,122 @@
+"""
+Cache colunar (DataFrames pandas) das tabelas, compartilhado entre as seções
+Cada DataFrame é construído uma única vez por versão dos dados, com dtypes
+definidos e status categóricos. As seções recebem uma cópia rasa (colunas
+compartilhadas, sem copiar os dados): podem filtrar, selecionar, incluir ou
+trocar colunas, mas nunca alterar valores no lugar (.loc/.iloc/.at).
+"""
+import pandas as pd
+import streamlit as st
+from utils.supabase_client import (
+    get_all_items, get_all_tasks, get_all_orcamentos, get_all_categorias, get_all_parcelas,
+    versao_dados
+)
+
+# Status possíveis de um item (usados como categorias da coluna status)
+STATUS_ITEMS = ["Pendente", "Contratado"]
+
+
+def _categorias(valores, base):
+    """Retorna as categorias base seguidas de valores extras encontrados"""
+    extras = sorted(set(valores) - set(base))
+    return list(base) + extras
+
+
+@st.cache_resource(ttl=10, max_entries=2)
+def _frame_items(versao: int) -> pd.DataFrame:
+    items = get_all_items()
+    status = [i.status for i in items]
+    return pd.DataFrame({
+        'id': pd.Series([i.id for i in items], dtype='int64'),
+        'item': pd.Series([i.item for i in items], dtype='object'),
+        'servico': pd.Series([i.servico for i in items], dtype='object'),
+        'preco': pd.Series([i.preco for i in items], dtype='float64'),
+        'status': pd.Categorical(status, categories=_categorias(status, STATUS_ITEMS)),
+        'comentarios': pd.Series([i.comentarios for i in items], dtype='object'),
+        'created_at': pd.Series([i.created_at for i in items], dtype='object'),
+    })
+
+
+@st.cache_resource(ttl=10, max_entries=2)
+def _frame_tasks(versao: int) -> pd.DataFrame:
+    tasks = get_all_tasks()
+    return pd.DataFrame({
+        'id': pd.Series([t.id for t in tasks], dtype='int64'),
+        'tarefa': pd.Series([t.tarefa for t in tasks], dtype='object'),
+        'concluida': pd.Series([t.concluida for t in tasks], dtype='bool'),
+        'created_at': pd.Series([t.created_at for t in tasks], dtype='object'),
+    })
+
+
+@st.cache_resource(ttl=10, max_entries=2)
+def _frame_orcamentos(versao: int, versao_categorias: int) -> pd.DataFrame:
+    orcamentos = get_all_orcamentos()
+    categorias = [o.categoria for o in orcamentos]
+    nomes = [c.nome for c in get_all_categorias()]
+    return pd.DataFrame({
+        'id': pd.Series([o.id for o in orcamentos], dtype='int64'),
+        'categoria': pd.Categorical(categorias, categories=_categorias(categorias, nomes)),
+        'categoria_id': pd.Series([o.categoria_id for o in orcamentos], dtype='int64'),
+        'fornecedor': pd.Series([o.fornecedor for o in orcamentos], dtype='object'),
+        'valor': pd.Series([o.valor for o in orcamentos], dtype='float64'),
+        'telefone': pd.Series([o.telefone for o in orcamentos], dtype='object'),
+        'observacao': pd.Series([o.observacao for o in orcamentos], dtype='object'),
+        'nota': pd.Series([o.nota for o in orcamentos], dtype='int64'),
+    })
+
+
+@st.cache_resource(ttl=10, max_entries=2)
+def _frame_parcelas(versao: int) -> pd.DataFrame:
+    parcelas = get_all_parcelas()
+    return pd.DataFrame({
+        'id': pd.Series([p.id for p in parcelas], dtype='int64'),
+        'item_id': pd.Series([p.item_id for p in parcelas], dtype='int64'),
+        'item': pd.Series([p.item for p in parcelas], dtype='object'),
+        'vencimento': pd.Series([p.vencimento for p in parcelas], dtype='datetime64[ns]'),
+        'valor': pd.Series([p.valor for p in parcelas], dtype='float64'),
+        'paga': pd.Series([p.paga for p in parcelas], dtype='bool'),
+        'descricao': pd.Series([p.descricao for p in parcelas], dtype='object'),
+    })
+
+
+def frame_items() -> pd.DataFrame:
+    """
+    DataFrame compartilhado com todos os itens (versão atual dos dados)
+
+    Returns:
+        DataFrame com colunas id, item, servico, preco, status (categórico),
+        comentarios e created_at
+    """
+    return _frame_items(versao_dados('items')).copy(deep=False)
+
+
+def frame_tasks() -> pd.DataFrame:
+    """
+    DataFrame compartilhado com todas as tarefas (versão atual dos dados)
+
+    Returns:
+        DataFrame com colunas id, tarefa, concluida e created_at
+    """
+    return _frame_tasks(versao_dados('tasks')).copy(deep=False)
+
+
+def frame_orcamentos() -> pd.DataFrame:
+    """
+    DataFrame compartilhado com todos os orçamentos (versão atual dos dados)
+
+    Returns:
+        DataFrame com colunas id, categoria (categórica), categoria_id,
+        fornecedor, valor, telefone, observacao e nota
+    """
+    return _frame_orcamentos(versao_dados('orcamentos'), versao_dados('categorias')).copy(deep=False)
+
+
+def frame_parcelas() -> pd.DataFrame:
+    """
+    DataFrame compartilhado com todas as parcelas (versão atual dos dados)
+
+    Returns:
+        DataFrame com colunas id, item_id, item, vencimento (datetime64),
+        valor, paga e descricao
+    """
+    return _frame_parcelas(versao_dados('parcelas')).copy(deep=False)
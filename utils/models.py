@@ -0,0 +1,472 @@
+"""
+Modelos tipados para as linhas das tabelas do Supabase
+Cada modelo é um dataclass com __slots__ e é decodificado uma única vez
+a partir do JSON retornado pelo PostgREST (datas e horas já convertidas)
+"""
+from dataclasses import dataclass, asdict, field, replace
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import pytz
+from dateutil import tz as dateutil_tz
+from dateutil.rrule import rrulestr
+
+# Fuso horário dos agendamentos
+TZ_SAO_PAULO = pytz.timezone('America/Sao_Paulo')
+
+# Mesmo fuso para o dateutil (o rrule combina data e tzinfo a cada ocorrência)
+_TZ_RECORRENCIA = dateutil_tz.gettz('America/Sao_Paulo')
+
+# Partes da RRULE na ordem do RFC 5545, seção 3.3.10 (a mesma do icalendar)
+ORDEM_RRULE = (
+    "FREQ", "UNTIL", "COUNT", "INTERVAL", "BYSECOND", "BYMINUTE", "BYHOUR",
+    "BYDAY", "BYMONTHDAY", "BYYEARDAY", "BYWEEKNO", "BYMONTH", "BYSETPOS", "WKST",
+)
+_PARTES_INTEIRAS = {
+    "COUNT", "INTERVAL", "BYSECOND", "BYMINUTE", "BYHOUR",
+    "BYMONTHDAY", "BYYEARDAY", "BYWEEKNO", "BYMONTH", "BYSETPOS",
+}
+
+# Duração considerada para cada visita (não há horário de término no banco)
+DURACAO_PADRAO = timedelta(hours=1)
+
+
+def _parse_date(value: Any) -> date:
+    """Converte 'YYYY-MM-DD' (ou date) para date"""
+    if isinstance(value, str):
+        return date.fromisoformat(value)
+    return value
+
+
+def _parse_time(value: Any) -> time:
+    """Converte 'HH:MM:SS' / 'HH:MM' (ou time) para time"""
+    if isinstance(value, str):
+        return time.fromisoformat(value)
+    return value
+
+
+def _parse_datetime(value: Any) -> Optional[datetime]:
+    """Converte timestamp ISO 8601 para datetime (None se ausente ou inválido)"""
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    return value
+
+
+def _parse_dates(values: Any) -> Tuple[date, ...]:
+    """Converte uma lista de datas (date[] do Postgres) para tupla ordenada"""
+    return tuple(sorted(_parse_date(value) for value in values or ()))
+
+
+@lru_cache(maxsize=256)
+def _regra(rrule: str, data: date, hora: time):
+    """Regra do dateutil para a série que começa em data/hora (levanta ValueError se inválida)"""
+    return rrulestr(rrule, dtstart=datetime.combine(data, hora, tzinfo=_TZ_RECORRENCIA))
+
+
+def normalizar_rrule(texto: Optional[str]) -> str:
+    """
+    Valida uma RRULE e a coloca na forma canônica usada no banco
+
+    Partes em maiúsculas, na ordem do RFC 5545 e com inteiros sem zeros à
+    esquerda (ex: "count=04;freq=weekly" -> "FREQ=WEEKLY;COUNT=4"): assim a
+    regra gravada é exportada para o .ics exatamente como está.
+
+    Args:
+        texto: Regra, com ou sem o prefixo "RRULE:"; vazio para nenhuma
+
+    Returns:
+        Regra canônica ("" se vazia)
+
+    Raises:
+        ValueError: Se a regra for inválida (UNTIL deve estar em UTC, com Z)
+    """
+    texto = (texto or "").strip()
+    if texto.upper().startswith("RRULE:"):
+        texto = texto[len("RRULE:"):]
+    partes = {}
+    for parte in filter(None, texto.split(";")):
+        chave, _, valor = parte.partition("=")
+        chave, valor = chave.strip().upper(), valor.strip().upper()
+        if chave not in ORDEM_RRULE:
+            raise ValueError(f"Parte desconhecida na RRULE: {chave}")
+        if chave in _PARTES_INTEIRAS:
+            valor = ",".join(str(int(numero)) for numero in valor.split(","))
+        partes[chave] = valor
+    if not partes:
+        return ""
+    regra = ";".join(f"{chave}={partes[chave]}" for chave in ORDEM_RRULE if chave in partes)
+    _regra(regra, date(2000, 1, 1), time(0, 0))  # Valida com um DTSTART com fuso
+    return regra
+
+
+@dataclass(frozen=True, slots=True)
+class Item:
+    """Item do casamento (tabela items)"""
+    id: int
+    item: str
+    servico: str = ""
+    preco: float = 0.0
+    status: str = "Pendente"
+    comentarios: str = ""
+    created_at: Optional[datetime] = None
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> "Item":
+        return cls(
+            id=row['id'],
+            item=row['item'],
+            servico=row.get('servico') or "",
+            preco=float(row.get('preco') or 0.0),
+            status=row.get('status') or "Pendente",
+            comentarios=row.get('comentarios') or "",
+            created_at=_parse_datetime(row.get('created_at'))
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass(frozen=True, slots=True)
+class Task:
+    """Tarefa do checklist (tabela tasks)"""
+    id: int
+    tarefa: str
+    concluida: bool = False
+    created_at: Optional[datetime] = None
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> "Task":
+        return cls(
+            id=row['id'],
+            tarefa=row['tarefa'],
+            concluida=bool(row.get('concluida', False)),
+            created_at=_parse_datetime(row.get('created_at'))
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass(frozen=True, slots=True)
+class Categoria:
+    """Categoria de serviço para orçamentos (tabela categorias)"""
+    id: int
+    nome: str
+    created_at: Optional[datetime] = None
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> "Categoria":
+        return cls(
+            id=row['id'],
+            nome=row['nome'],
+            created_at=_parse_datetime(row.get('created_at'))
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass(frozen=True, slots=True)
+class FornecedorAlias:
+    """Unificação confirmada de fornecedor (tabela fornecedor_aliases)"""
+    id: int
+    alias: str
+    canonico: str
+    created_at: Optional[datetime] = None
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> "FornecedorAlias":
+        return cls(
+            id=row['id'],
+            alias=row['alias'],
+            canonico=row['canonico'],
+            created_at=_parse_datetime(row.get('created_at'))
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass(frozen=True, slots=True)
+class Orcamento:
+    """Orçamento de fornecedor (tabela orcamentos + nome da categoria)"""
+    id: int
+    categoria_id: int
+    categoria: str
+    fornecedor: str
+    valor: float
+    telefone: str = ""
+    observacao: str = ""
+    nota: int = 5
+    created_at: Optional[datetime] = None
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> "Orcamento":
+        return cls(
+            id=row['id'],
+            categoria_id=row['categoria_id'],
+            categoria=(row.get('categorias') or {}).get('nome') or "",
+            fornecedor=row['fornecedor'],
+            valor=float(row.get('valor') or 0.0),
+            telefone=row.get('telefone') or "",
+            observacao=row.get('observacao') or "",
+            nota=int(row['nota']) if row.get('nota') is not None else 5,
+            created_at=_parse_datetime(row.get('created_at'))
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _emoji_categoria(categoria: str) -> str:
+    """Emoji do início da categoria (ex: '🍰 Buffet' -> '🍰'), ou 📅 se não houver"""
+    partes = categoria.split()
+    primeiro = partes[0] if partes else ""
+    # Emojis ficam nas faixas altas do Unicode (verificação simplificada)
+    if primeiro and len(primeiro) <= 2 and ord(primeiro[0]) > 127:
+        return primeiro
+    return "📅"
+
+
+@dataclass(frozen=True, slots=True)
+class Agendamento:
+    """Visita agendada (tabela agendamentos), com data e hora já convertidas"""
+    id: int
+    data: date
+    hora: time
+    categoria: str
+    local: str
+    endereco: str = ""
+    telefone: str = ""
+    contato: str = ""
+    observacao: str = ""
+    status: str = "⏳ Agendado"
+    link: str = ""
+    cor: str = "#FF69B4"
+    created_at: Optional[datetime] = None
+    # Controle de alterações: revisao é incrementada pelo banco a cada UPDATE
+    # e deleted_at marca visitas excluídas (mantidas como cancelamento no .ics)
+    revisao: int = 0
+    updated_at: Optional[datetime] = None
+    deleted_at: Optional[datetime] = None
+    # Recorrência: RRULE canônica (normalizar_rrule) e datas excluídas da série
+    rrule: str = ""
+    exdates: Tuple[date, ...] = ()
+    # Em ocorrências expandidas (ocorrencias), a série de origem
+    serie: Optional["Agendamento"] = field(default=None, repr=False, compare=False)
+    # Derivados de data/hora/categoria, calculados uma única vez na criação
+    inicio: datetime = field(init=False, repr=False, compare=False)
+    mes: int = field(init=False, repr=False, compare=False)
+    dia_semana: int = field(init=False, repr=False, compare=False)
+    emoji: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        definir = object.__setattr__  # Dataclass congelado
+        definir(self, 'inicio', TZ_SAO_PAULO.localize(datetime.combine(self.data, self.hora)))
+        definir(self, 'mes', self.data.month)
+        definir(self, 'dia_semana', self.data.weekday())
+        definir(self, 'emoji', _emoji_categoria(self.categoria))
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> "Agendamento":
+        return cls(
+            id=row['id'],
+            data=_parse_date(row['data']),
+            hora=_parse_time(row['hora']),
+            categoria=row['categoria'],
+            local=row['local'],
+            endereco=row.get('endereco') or "",
+            telefone=row.get('telefone') or "",
+            contato=row.get('contato') or "",
+            observacao=row.get('observacao') or "",
+            status=row.get('status') or "⏳ Agendado",
+            link=row.get('link') or "",
+            cor=row.get('cor') or "#FF69B4",
+            created_at=_parse_datetime(row.get('created_at')),
+            revisao=int(row.get('revisao') or 0),
+            updated_at=_parse_datetime(row.get('updated_at')),
+            deleted_at=_parse_datetime(row.get('deleted_at')),
+            rrule=row.get('rrule') or "",
+            exdates=_parse_dates(row.get('exdates'))
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    def ocorrencias(self, inicio: date, fim: date) -> Iterator["Agendamento"]:
+        """
+        Ocorrências com data em [inicio, fim), em ordem cronológica
+
+        A regra é expandida sob demanda e só até o fim do período; datas em
+        exdates são puladas. A primeira ocorrência é o próprio registro; as
+        demais são cópias com a data (e hora) da ocorrência e serie apontando
+        para o registro. Sem RRULE (ou com regra inválida), é só o registro.
+
+        Args:
+            inicio: Primeira data do período
+            fim: Data final (exclusiva)
+
+        Yields:
+            Agendamentos do período
+        """
+        try:
+            regra = _regra(self.rrule, self.data, self.hora) if self.rrule else None
+        except ValueError:
+            regra = None
+        if regra is None:
+            if inicio <= self.data < fim:
+                yield self
+            return
+
+        excluidas = set(self.exdates)
+        desde = datetime.combine(max(inicio, self.data), time(0, 0), tzinfo=_TZ_RECORRENCIA)
+        for momento in regra.xafter(desde, inc=True):
+            dia = momento.date()
+            if dia >= fim:
+                break
+            if dia in excluidas:
+                continue
+            if dia == self.data and momento.time() == self.hora:
+                yield self
+            else:
+                yield replace(self, data=dia, hora=momento.time(), serie=self)
+
+
+@dataclass(frozen=True, slots=True)
+class FiltroAgendamentos:
+    """
+    Filtro de agendamentos (categoria, status e período [inicio, fim))
+
+    O mesmo filtro é aplicado na consulta ao banco (na_consulta) ou sobre
+    agendamentos já carregados (aplicar/expandir); campos None não filtram.
+    """
+    categoria: Optional[str] = None
+    status: Optional[str] = None
+    inicio: Optional[date] = None
+    fim: Optional[date] = None
+
+    @classmethod
+    def do_mes(cls, ano: int, mes: int, categoria: Optional[str] = None,
+               status: Optional[str] = None) -> "FiltroAgendamentos":
+        proximo = date(ano + mes // 12, mes % 12 + 1, 1)
+        return cls(categoria, status, date(ano, mes, 1), proximo)
+
+    def na_consulta(self, consulta):
+        """Acrescenta os predicados do filtro a uma consulta do PostgREST"""
+        if self.categoria is not None:
+            consulta = consulta.eq("categoria", self.categoria)
+        if self.status is not None:
+            consulta = consulta.eq("status", self.status)
+        if self.inicio is not None:
+            # Séries recorrentes iniciadas antes do período podem ter ocorrências nele
+            consulta = consulta.or_(f"data.gte.{self.inicio.isoformat()},rrule.not.is.null")
+        if self.fim is not None:
+            consulta = consulta.lt("data", self.fim.isoformat())
+        return consulta
+
+    def aceita(self, agendamento: "Agendamento") -> bool:
+        """Verifica se um agendamento passa no filtro"""
+        return (
+            (self.categoria is None or agendamento.categoria == self.categoria)
+            and (self.status is None or agendamento.status == self.status)
+            and (self.inicio is None or agendamento.data >= self.inicio)
+            and (self.fim is None or agendamento.data < self.fim)
+        )
+
+    def aplicar(self, agendamentos: List["Agendamento"]) -> List["Agendamento"]:
+        """Filtra uma lista de agendamentos em uma única passada"""
+        aceita = self.aceita
+        return [a for a in agendamentos if aceita(a)]
+
+    def expandir(self, agendamentos: List["Agendamento"]) -> List["Agendamento"]:
+        """
+        Filtra expandindo as séries recorrentes nas ocorrências do período
+
+        Sem período fechado (inicio e fim), cada série entra uma única vez,
+        na data de início, como em aplicar.
+
+        Args:
+            agendamentos: Agendamentos (séries ainda não expandidas)
+
+        Returns:
+            Agendamentos e ocorrências em ordem de data e hora
+        """
+        if self.inicio is None or self.fim is None:
+            return self.aplicar(agendamentos)
+        resultado = []
+        for agendamento in agendamentos:
+            if ((self.categoria is None or agendamento.categoria == self.categoria)
+                    and (self.status is None or agendamento.status == self.status)):
+                resultado.extend(agendamento.ocorrencias(self.inicio, self.fim))
+        resultado.sort(key=lambda a: (a.data, a.hora, a.id))
+        return resultado
+
+
+@dataclass(frozen=True, slots=True)
+class Parcela:
+    """Parcela de pagamento de um item contratado (tabela parcelas + nome do item)"""
+    id: int
+    item_id: int
+    vencimento: date
+    valor: float
+    paga: bool = False
+    descricao: str = ""
+    item: str = ""
+    created_at: Optional[datetime] = None
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> "Parcela":
+        return cls(
+            id=row['id'],
+            item_id=row['item_id'],
+            vencimento=_parse_date(row['vencimento']),
+            valor=float(row.get('valor') or 0.0),
+            paga=bool(row.get('paga', False)),
+            descricao=row.get('descricao') or "",
+            item=(row.get('items') or {}).get('item') or "",
+            created_at=_parse_datetime(row.get('created_at'))
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass(frozen=True, slots=True)
+class ConfigEntry:
+    """Configuração financeira chave/valor (tabela config)"""
+    chave: str
+    valor: float
+    id: Optional[int] = None
+    updated_at: Optional[datetime] = None
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> "ConfigEntry":
+        return cls(
+            chave=row['chave'],
+            valor=float(row['valor']),
+            id=row.get('id'),
+            updated_at=_parse_datetime(row.get('updated_at'))
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def decodificar(modelo, rows: Optional[List[Dict[str, Any]]]) -> List[Any]:
+    """
+    Decodifica as linhas retornadas pelo PostgREST para o modelo informado
+
+    Args:
+        modelo: Classe do modelo (Item, Task, Categoria, ...)
+        rows: Lista de dicionários (response.data)
+
+    Returns:
+        Lista de instâncias do modelo
+    """
+    if not rows:
+        return []
+    from_row = modelo.from_row
+    return [from_row(row) for row in rows]
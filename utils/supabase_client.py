@@ -3,8 +3,14 @@ Módulo para gerenciamento de dados no Supabase
 Fornece funções para CRUD de items, tasks e config
 """
 import streamlit as st
+from datetime import date, datetime, timedelta, timezone
 from supabase import create_client, Client
-from typing import List, Dict, Optional, Any, Union
+from typing import List, Dict, Optional, Any, Union, Iterator
+from utils.calculations import calcular_resumo_totais, calcular_dashboard_summary
+from utils.models import (
+    Item, Task, Categoria, Orcamento, FornecedorAlias, Agendamento, FiltroAgendamentos, Parcela,
+    ConfigEntry, decodificar
+)
 
 
 def init_supabase() -> Client:
@@ -23,10 +29,38 @@ def init_supabase() -> Client:
         raise
 
 
+# Versão dos dados de cada tabela (incrementada a cada escrita neste processo)
+_VERSOES: Dict[str, int] = {}
+
+
+def versao_dados(tabela: str) -> int:
+    """
+    Retorna a versão atual dos dados de uma tabela
+    
+    Args:
+        tabela: Nome da tabela (items, tasks, orcamentos, ...)
+        
+    Returns:
+        Número da versão (muda a cada escrita)
+    """
+    return _VERSOES.get(tabela, 0)
+
+
+def _nova_versao(tabela: str) -> None:
+    """Incrementa a versão dos dados de uma tabela após uma escrita"""
+    _VERSOES[tabela] = _VERSOES.get(tabela, 0) + 1
+
+
+def _limpar_resumos() -> None:
+    """Limpa o cache dos resumos agregados após qualquer escrita"""
+    get_resumo_totais.clear()
+    get_dashboard_summary.clear()
+
+
 # ==================== OPERAÇÕES DE ITEMS ====================
 
 @st.cache_data(ttl=10)
-def get_all_items() -> List[Dict[str, Any]]:
+def get_all_items() -> List[Item]:
     """
     Busca todos os itens do casamento do Supabase
     
@@ -36,7 +70,7 @@ def get_all_items() -> List[Dict[str, Any]]:
     try:
         supabase = init_supabase()
         response = supabase.table('items').select('*').order('id').execute()
-        return response.data if response.data else []
+        return decodificar(Item, response.data)
     except Exception as e:
         st.error(f"❌ Erro ao buscar itens: {e}")
         return []
@@ -68,6 +102,8 @@ def add_item(item: str, servico: str = "", preco: float = 0.0,
         }
         supabase.table('items').insert(data).execute()
         get_all_items.clear()  # Limpa o cache
+        _nova_versao('items')
+        _limpar_resumos()
         return True
     except Exception as e:
         st.error(f"❌ Erro ao adicionar item: {e}")
@@ -89,6 +125,8 @@ def update_item(item_id: int, data: Dict[str, Any]) -> bool:
         supabase = init_supabase()
         supabase.table('items').update(data).eq('id', item_id).execute()
         get_all_items.clear()  # Limpa o cache
+        _nova_versao('items')
+        _limpar_resumos()
         return True
     except Exception as e:
         st.error(f"❌ Erro ao atualizar item: {e}")
@@ -109,6 +147,11 @@ def delete_item(item_id: int) -> bool:
         supabase = init_supabase()
         supabase.table('items').delete().eq('id', item_id).execute()
         get_all_items.clear()  # Limpa o cache
+        _nova_versao('items')
+        # As parcelas do item são removidas em cascata (ON DELETE CASCADE)
+        get_all_parcelas.clear()
+        _nova_versao('parcelas')
+        _limpar_resumos()
         return True
     except Exception as e:
         st.error(f"❌ Erro ao deletar item: {e}")
@@ -134,6 +177,8 @@ def update_all_items(items: List[Dict[str, Any]]) -> bool:
                 item_data = {k: v for k, v in item.items() if k != 'id'}
                 supabase.table('items').update(item_data).eq('id', item_id).execute()
         get_all_items.clear()  # Limpa o cache
+        _nova_versao('items')
+        _limpar_resumos()
         return True
     except Exception as e:
         st.error(f"❌ Erro ao atualizar itens: {e}")
@@ -143,7 +188,7 @@ def update_all_items(items: List[Dict[str, Any]]) -> bool:
 # ==================== OPERAÇÕES DE TASKS ====================
 
 @st.cache_data(ttl=10)
-def get_all_tasks() -> List[Dict[str, Any]]:
+def get_all_tasks() -> List[Task]:
     """
     Busca todas as tarefas do Supabase
     
@@ -153,7 +198,7 @@ def get_all_tasks() -> List[Dict[str, Any]]:
     try:
         supabase = init_supabase()
         response = supabase.table('tasks').select('*').order('id').execute()
-        return response.data if response.data else []
+        return decodificar(Task, response.data)
     except Exception as e:
         st.error(f"❌ Erro ao buscar tarefas: {e}")
         return []
@@ -178,6 +223,8 @@ def add_task(tarefa: str, concluida: bool = False) -> bool:
         }
         supabase.table('tasks').insert(data).execute()
         get_all_tasks.clear()  # Limpa o cache
+        _nova_versao('tasks')
+        _limpar_resumos()
         return True
     except Exception as e:
         st.error(f"❌ Erro ao adicionar tarefa: {e}")
@@ -204,6 +251,8 @@ def update_task(task_id: int, data: Union[bool, Dict[str, Any]]) -> bool:
             update_data = data
         supabase.table('tasks').update(update_data).eq('id', task_id).execute()
         get_all_tasks.clear()  # Limpa o cache
+        _nova_versao('tasks')
+        _limpar_resumos()
         return True
     except Exception as e:
         st.error(f"❌ Erro ao atualizar tarefa: {e}")
@@ -224,6 +273,8 @@ def delete_task(task_id: int) -> bool:
         supabase = init_supabase()
         supabase.table('tasks').delete().eq('id', task_id).execute()
         get_all_tasks.clear()  # Limpa o cache
+        _nova_versao('tasks')
+        _limpar_resumos()
         return True
     except Exception as e:
         st.error(f"❌ Erro ao deletar tarefa: {e}")
@@ -245,10 +296,10 @@ def get_config() -> Dict[str, float]:
         response = supabase.table('config').select('*').execute()
         
         # Converter lista de chave-valor para dicionário
-        config = {}
-        if response.data:
-            for row in response.data:
-                config[row['chave']] = float(row['valor'])
+        config = {
+            entrada.chave: entrada.valor
+            for entrada in decodificar(ConfigEntry, response.data)
+        }
         
         # Garantir que todas as chaves existam
         default_config = {
@@ -299,6 +350,8 @@ def update_config(chave: str, valor: float) -> bool:
             supabase.table('config').insert({'chave': chave, 'valor': valor}).execute()
         
         get_config.clear()  # Limpa o cache
+        _nova_versao('config')
+        _limpar_resumos()  # Dashboard exibe o orçamento máximo
         return True
     except Exception as e:
         st.error(f"❌ Erro ao atualizar configuração: {e}")
@@ -328,7 +381,7 @@ def update_all_config(config_dict: Dict[str, float]) -> bool:
 # ==================== OPERAÇÕES DE CATEGORIAS ====================
 
 @st.cache_data(ttl=10)
-def get_all_categorias() -> List[Dict[str, Any]]:
+def get_all_categorias() -> List[Categoria]:
     """
     Busca todas as categorias
     
@@ -338,7 +391,7 @@ def get_all_categorias() -> List[Dict[str, Any]]:
     try:
         supabase = init_supabase()
         response = supabase.table('categorias').select('*').order('nome').execute()
-        return response.data if response.data else []
+        return decodificar(Categoria, response.data)
     except Exception as e:
         st.error(f"❌ Erro ao buscar categorias: {e}")
         return []
@@ -359,6 +412,7 @@ def add_categoria(nome: str) -> Optional[List[Dict[str, Any]]]:
         data = {"nome": nome}
         response = supabase.table('categorias').insert(data).execute()
         get_all_categorias.clear()  # Limpa o cache
+        _nova_versao('categorias')
         return response.data
     except Exception as e:
         st.error(f"❌ Erro ao adicionar categoria: {e}")
@@ -381,6 +435,10 @@ def update_categoria(id: int, nome: str) -> Optional[List[Dict[str, Any]]]:
         data = {"nome": nome}
         response = supabase.table('categorias').update(data).eq('id', id).execute()
         get_all_categorias.clear()  # Limpa o cache
+        _nova_versao('categorias')
+        get_all_orcamentos.clear()  # Orçamentos trazem o nome da categoria
+        _nova_versao('orcamentos')
+        _limpar_resumos()  # Totais por categoria usam o nome
         return response.data
     except Exception as e:
         st.error(f"❌ Erro ao atualizar categoria: {e}")
@@ -401,7 +459,10 @@ def delete_categoria(id: int) -> Optional[List[Dict[str, Any]]]:
         supabase = init_supabase()
         response = supabase.table('categorias').delete().eq('id', id).execute()
         get_all_categorias.clear()  # Limpa o cache
+        _nova_versao('categorias')
         get_all_orcamentos.clear()  # Limpa cache de orçamentos também
+        _nova_versao('orcamentos')
+        _limpar_resumos()
         return response.data
     except Exception as e:
         st.error(f"❌ Erro ao deletar categoria: {e}")
@@ -411,7 +472,7 @@ def delete_categoria(id: int) -> Optional[List[Dict[str, Any]]]:
 # ==================== OPERAÇÕES DE ORÇAMENTOS ====================
 
 @st.cache_data(ttl=10)
-def get_all_orcamentos() -> List[Dict[str, Any]]:
+def get_all_orcamentos() -> List[Orcamento]:
     """
     Busca todos orçamentos com informação de categoria
     
@@ -421,14 +482,15 @@ def get_all_orcamentos() -> List[Dict[str, Any]]:
     try:
         supabase = init_supabase()
         response = supabase.table('orcamentos').select('*, categorias(nome)').execute()
-        return response.data if response.data else []
+        return decodificar(Orcamento, response.data)
     except Exception as e:
         st.error(f"❌ Erro ao buscar orçamentos: {e}")
         return []
 
 
 def add_orcamento(categoria_id: int, fornecedor: str, valor: float, 
-                  telefone: str = "", observacao: str = "") -> Optional[List[Dict[str, Any]]]:
+                  telefone: str = "", observacao: str = "",
+                  nota: int = 5) -> Optional[List[Dict[str, Any]]]:
     """
     Adiciona novo orçamento
     
@@ -438,6 +500,7 @@ def add_orcamento(categoria_id: int, fornecedor: str, valor: float,
         valor: Valor do orçamento
         telefone: Telefone de contato
         observacao: Observações
+        nota: Nota de preferência (0 a 10)
         
     Returns:
         Dados do orçamento criado ou None em caso de erro
@@ -449,10 +512,13 @@ def add_orcamento(categoria_id: int, fornecedor: str, valor: float,
             "fornecedor": fornecedor,
             "valor": valor,
             "telefone": telefone,
-            "observacao": observacao
+            "observacao": observacao,
+            "nota": nota
         }
         response = supabase.table('orcamentos').insert(data).execute()
         get_all_orcamentos.clear()  # Limpa o cache
+        _nova_versao('orcamentos')
+        _limpar_resumos()
         return response.data
     except Exception as e:
         st.error(f"❌ Erro ao adicionar orçamento: {e}")
@@ -474,6 +540,8 @@ def update_orcamento(id: int, data: Dict[str, Any]) -> Optional[List[Dict[str, A
         supabase = init_supabase()
         response = supabase.table('orcamentos').update(data).eq('id', id).execute()
         get_all_orcamentos.clear()  # Limpa o cache
+        _nova_versao('orcamentos')
+        _limpar_resumos()
         return response.data
     except Exception as e:
         st.error(f"❌ Erro ao atualizar orçamento: {e}")
@@ -494,16 +562,223 @@ def delete_orcamento(id: int) -> Optional[List[Dict[str, Any]]]:
         supabase = init_supabase()
         response = supabase.table('orcamentos').delete().eq('id', id).execute()
         get_all_orcamentos.clear()  # Limpa o cache
+        _nova_versao('orcamentos')
+        _limpar_resumos()
         return response.data
     except Exception as e:
         st.error(f"❌ Erro ao deletar orçamento: {e}")
         return None
 
 
+# ==================== OPERAÇÕES DE FORNECEDORES ====================
+
+@st.cache_data(ttl=10)
+def get_fornecedor_aliases() -> List[FornecedorAlias]:
+    """
+    Busca as unificações de fornecedores confirmadas
+    
+    Returns:
+        Lista de unificações (alias normalizado -> nome canônico)
+    """
+    try:
+        supabase = init_supabase()
+        response = supabase.table('fornecedor_aliases').select('*').order('canonico').order('alias').execute()
+        return decodificar(FornecedorAlias, response.data)
+    except Exception:
+        # Tabela ainda não criada no banco: nenhuma unificação
+        return []
+
+
+def add_fornecedor_aliases(aliases: List[str], canonico: str) -> bool:
+    """
+    Unifica fornecedores sob um nome canônico (uma única requisição)
+    
+    Args:
+        aliases: Nomes normalizados (chave_fornecedor) a unificar
+        canonico: Nome canônico exibido para o grupo
+        
+    Returns:
+        True se sucesso, False caso contrário
+    """
+    try:
+        supabase = init_supabase()
+        data = [{"alias": alias, "canonico": canonico} for alias in aliases]
+        supabase.table('fornecedor_aliases').upsert(data, on_conflict='alias').execute()
+        get_fornecedor_aliases.clear()  # Limpa o cache
+        _nova_versao('fornecedor_aliases')
+        return True
+    except Exception as e:
+        st.error(f"❌ Erro ao unificar fornecedores: {e}")
+        return False
+
+
+def delete_fornecedor_aliases(alias_ids: List[int]) -> bool:
+    """
+    Desfaz unificações de fornecedores (uma única requisição)
+    
+    Args:
+        alias_ids: IDs das unificações
+        
+    Returns:
+        True se sucesso, False caso contrário
+    """
+    try:
+        supabase = init_supabase()
+        supabase.table('fornecedor_aliases').delete().in_('id', alias_ids).execute()
+        get_fornecedor_aliases.clear()  # Limpa o cache
+        _nova_versao('fornecedor_aliases')
+        return True
+    except Exception as e:
+        st.error(f"❌ Erro ao desfazer unificação: {e}")
+        return False
+
+
+# ==================== OPERAÇÕES DE PARCELAS ====================
+
+@st.cache_data(ttl=10)
+def get_all_parcelas() -> List[Parcela]:
+    """
+    Retorna todas as parcelas com o nome do item
+    
+    Returns:
+        Lista de parcelas ordenadas por vencimento
+    """
+    try:
+        supabase = init_supabase()
+        response = supabase.table('parcelas').select('*, items(item)').order('vencimento').order('id').execute()
+        return decodificar(Parcela, response.data)
+    except Exception as e:
+        st.error(f"❌ Erro ao buscar parcelas: {e}")
+        return []
+
+
+def add_parcelas(parcelas: List[Dict[str, Any]]) -> bool:
+    """
+    Adiciona várias parcelas de uma vez (uma única requisição)
+    
+    Args:
+        parcelas: Lista de dicionários com item_id, vencimento (YYYY-MM-DD),
+            valor e, opcionalmente, paga e descricao
+        
+    Returns:
+        True se sucesso, False caso contrário
+    """
+    if not parcelas:
+        return True
+    try:
+        supabase = init_supabase()
+        data = [
+            {
+                "item_id": parcela['item_id'],
+                "vencimento": str(parcela['vencimento']),
+                "valor": parcela['valor'],
+                "paga": parcela.get('paga', False),
+                "descricao": parcela.get('descricao', "")
+            }
+            for parcela in parcelas
+        ]
+        supabase.table('parcelas').insert(data).execute()
+        get_all_parcelas.clear()  # Limpa o cache
+        _nova_versao('parcelas')
+        return True
+    except Exception as e:
+        st.error(f"❌ Erro ao adicionar parcelas: {e}")
+        return False
+
+
+def update_parcela(parcela_id: int, data: Dict[str, Any]) -> bool:
+    """
+    Atualiza uma parcela existente
+    
+    Args:
+        parcela_id: ID da parcela
+        data: Dicionário com os campos a serem atualizados
+        
+    Returns:
+        True se sucesso, False caso contrário
+    """
+    try:
+        supabase = init_supabase()
+        supabase.table('parcelas').update(data).eq('id', parcela_id).execute()
+        get_all_parcelas.clear()  # Limpa o cache
+        _nova_versao('parcelas')
+        return True
+    except Exception as e:
+        st.error(f"❌ Erro ao atualizar parcela: {e}")
+        return False
+
+
+def delete_parcela(parcela_id: int) -> bool:
+    """
+    Deleta uma parcela
+    
+    Args:
+        parcela_id: ID da parcela a ser deletada
+        
+    Returns:
+        True se sucesso, False caso contrário
+    """
+    try:
+        supabase = init_supabase()
+        supabase.table('parcelas').delete().eq('id', parcela_id).execute()
+        get_all_parcelas.clear()  # Limpa o cache
+        _nova_versao('parcelas')
+        return True
+    except Exception as e:
+        st.error(f"❌ Erro ao deletar parcela: {e}")
+        return False
+
+
+# ==================== RESUMOS AGREGADOS ====================
+
+@st.cache_data(ttl=10)
+def get_resumo_totais() -> Dict[str, Any]:
+    """
+    Busca os totais pré-agregados (por status, por categoria e tarefas)
+    através da função resumo_totais() do banco (ver create_resumos.sql)
+    
+    Returns:
+        Dicionário com 'items_por_status', 'orcamentos_por_categoria' e 'tasks'
+    """
+    try:
+        supabase = init_supabase()
+        response = supabase.rpc('resumo_totais').execute()
+        if response.data:
+            return response.data
+    except Exception:
+        # Função ainda não criada no banco: calcula a partir das tabelas
+        pass
+    return calcular_resumo_totais(get_all_items(), get_all_tasks(), get_all_orcamentos())
+
+
+@st.cache_data(ttl=10)
+def get_dashboard_summary() -> Dict[str, Any]:
+    """
+    Busca tudo o que o Dashboard exibe em uma única chamada através da
+    função dashboard_summary() do banco (ver create_resumos.sql)
+    
+    Returns:
+        Dicionário com 'orcamento_maximo', 'total_orcado', 'tasks',
+        'gastos', 'status' e 'tarefas_pendentes' (no máximo 5)
+    """
+    try:
+        supabase = init_supabase()
+        response = supabase.rpc('dashboard_summary').execute()
+        if response.data:
+            return response.data
+    except Exception:
+        # Função ainda não criada no banco: calcula a partir das tabelas
+        pass
+    return calcular_dashboard_summary(get_all_items(), get_all_tasks(), get_config())
+
+
 # ==================== OPERAÇÕES DE AGENDAMENTOS ====================
 
+# Agendamentos excluídos continuam no feed como cancelados por este período (dias)
+JANELA_CANCELAMENTOS = 90
+
 @st.cache_data(ttl=10)
-def get_all_agendamentos() -> List[Dict[str, Any]]:
+def get_all_agendamentos() -> List[Agendamento]:
     """
     Retorna todos os agendamentos
     
@@ -512,33 +787,53 @@ def get_all_agendamentos() -> List[Dict[str, Any]]:
     """
     try:
         supabase = init_supabase()
-        response = supabase.table("agendamentos").select("*").order("data", desc=False).order("hora", desc=False).execute()
-        return response.data if response.data else []
+        response = supabase.table("agendamentos").select("*").is_("deleted_at", "null").order("data", desc=False).order("hora", desc=False).execute()
+        return decodificar(Agendamento, response.data)
     except Exception as e:
         st.error(f"❌ Erro ao buscar agendamentos: {e}")
         return []
 
 
-def get_agendamentos_by_data(data: str) -> List[Dict[str, Any]]:
+@st.cache_data(ttl=10)
+def get_agendamentos_filtrados(filtro: FiltroAgendamentos) -> List[Agendamento]:
     """
-    Retorna agendamentos de uma data específica
+    Retorna os agendamentos que passam no filtro, filtrando no banco
+    
+    Categoria, status e período viram predicados da consulta (eq/gte/lt),
+    atendidos pelos índices compostos de create_agendamentos_table.sql.
+    Séries recorrentes são expandidas só nas ocorrências do período.
     
     Args:
-        data: Data no formato YYYY-MM-DD
+        filtro: Filtro de categoria, status e período
         
     Returns:
-        Lista de agendamentos da data especificada
+        Lista de agendamentos ordenados por data e hora
     """
     try:
         supabase = init_supabase()
-        response = supabase.table("agendamentos").select("*").eq("data", data).order("hora", desc=False).execute()
-        return response.data if response.data else []
+        consulta = supabase.table("agendamentos").select("*").is_("deleted_at", "null")
+        response = filtro.na_consulta(consulta).order("data", desc=False).order("hora", desc=False).execute()
+        return filtro.expandir(decodificar(Agendamento, response.data))
     except Exception as e:
         st.error(f"❌ Erro ao buscar agendamentos: {e}")
         return []
 
 
-def get_proximos_agendamentos(dias: int = 7) -> List[Dict[str, Any]]:
+def get_agendamentos_by_data(data: str) -> List[Agendamento]:
+    """
+    Retorna agendamentos de uma data específica
+    
+    Args:
+        data: Data no formato YYYY-MM-DD
+        
+    Returns:
+        Lista de agendamentos da data especificada
+    """
+    dia = date.fromisoformat(str(data))
+    return get_agendamentos_filtrados(FiltroAgendamentos(inicio=dia, fim=dia + timedelta(days=1)))
+
+
+def get_proximos_agendamentos(dias: int = 7) -> List[Agendamento]:
     """
     Retorna agendamentos dos próximos X dias
     
@@ -548,23 +843,124 @@ def get_proximos_agendamentos(dias: int = 7) -> List[Dict[str, Any]]:
     Returns:
         Lista de agendamentos dos próximos dias
     """
+    hoje = datetime.now().date()
+    return get_agendamentos_filtrados(FiltroAgendamentos(inicio=hoje, fim=hoje + timedelta(days=dias + 1)))
+
+
+def iterar_agendamentos(tamanho_pagina: int = 500, incluir_excluidos: bool = False) -> Iterator[Agendamento]:
+    """
+    Percorre todos os agendamentos em páginas, sob demanda (gerador)
+    
+    Cada página é buscada apenas quando a anterior foi consumida, então a
+    memória usada depende do tamanho da página e não do total de registros.
+    
+    Args:
+        tamanho_pagina: Quantidade de registros buscados por requisição
+        incluir_excluidos: Inclui os excluídos nos últimos JANELA_CANCELAMENTOS
+            dias (com deleted_at preenchido)
+        
+    Yields:
+        Agendamentos ordenados por data e hora
+    """
     try:
-        from datetime import datetime, timedelta
-        hoje = datetime.now().date()
-        data_limite = hoje + timedelta(days=dias)
+        yield from paginar_agendamentos(tamanho_pagina, incluir_excluidos)
+    except Exception as e:
+        st.error(f"❌ Erro ao buscar agendamentos: {e}")
+
+
+def paginar_agendamentos(tamanho_pagina: int = 500, incluir_excluidos: bool = False) -> Iterator[Agendamento]:
+    """
+    Igual a iterar_agendamentos, mas propaga erros em vez de interromper
+    em silêncio (para quem não pode confundir falha com lista vazia)
+    
+    Args:
+        tamanho_pagina: Quantidade de registros buscados por requisição
+        incluir_excluidos: Inclui os excluídos nos últimos JANELA_CANCELAMENTOS
+            dias (com deleted_at preenchido)
         
+    Yields:
+        Agendamentos ordenados por data e hora
+    """
+    supabase = init_supabase()
+    if incluir_excluidos:
+        limite = (datetime.now(timezone.utc) - timedelta(days=JANELA_CANCELAMENTOS)).strftime('%Y-%m-%dT%H:%M:%S')
+        filtro = f"deleted_at.is.null,deleted_at.gte.{limite}"
+    inicio = 0
+    while True:
+        consulta = supabase.table("agendamentos").select("*")
+        if incluir_excluidos:
+            consulta = consulta.or_(filtro)
+        else:
+            consulta = consulta.is_("deleted_at", "null")
+        response = (
+            consulta
+            .order("data", desc=False).order("hora", desc=False).order("id", desc=False)
+            .range(inicio, inicio + tamanho_pagina - 1)
+            .execute()
+        )
+        yield from decodificar(Agendamento, response.data)
+        if len(response.data or []) < tamanho_pagina:
+            break
+        inicio += tamanho_pagina
+
+
+# Tabela -> (modelo, colunas) das consultas de paginar_tabela
+_CONSULTAS_PAGINADAS = {
+    'items': (Item, '*'),
+    'tasks': (Task, '*'),
+    'orcamentos': (Orcamento, '*, categorias(nome)'),
+}
+
+
+def paginar_tabela(tabela: str, tamanho_pagina: int = 500) -> Iterator[Union[Item, Task, Orcamento]]:
+    """
+    Percorre todos os itens, tarefas ou orçamentos em páginas, propagando
+    erros como paginar_agendamentos (para quem não pode confundir falha com
+    lista vazia)
+    
+    Args:
+        tabela: 'items', 'tasks' ou 'orcamentos'
+        tamanho_pagina: Quantidade de registros buscados por requisição
+        
+    Yields:
+        Registros ordenados por id
+    """
+    modelo, colunas = _CONSULTAS_PAGINADAS[tabela]
+    supabase = init_supabase()
+    inicio = 0
+    while True:
+        response = (
+            supabase.table(tabela).select(colunas)
+            .order('id', desc=False)
+            .range(inicio, inicio + tamanho_pagina - 1)
+            .execute()
+        )
+        yield from decodificar(modelo, response.data)
+        if len(response.data or []) < tamanho_pagina:
+            break
+        inicio += tamanho_pagina
+
+
+def contar_agendamentos() -> int:
+    """
+    Retorna a quantidade total de agendamentos (sem buscar os registros)
+    
+    Returns:
+        Número de agendamentos (0 em caso de erro)
+    """
+    try:
         supabase = init_supabase()
-        response = supabase.table("agendamentos").select("*").gte("data", str(hoje)).lte("data", str(data_limite)).order("data", desc=False).order("hora", desc=False).execute()
-        return response.data if response.data else []
+        response = supabase.table("agendamentos").select("id", count="exact").is_("deleted_at", "null").limit(1).execute()
+        return response.count or 0
     except Exception as e:
-        st.error(f"❌ Erro ao buscar próximos agendamentos: {e}")
-        return []
+        st.error(f"❌ Erro ao contar agendamentos: {e}")
+        return 0
 
 
 def add_agendamento(data: str, hora: str, categoria: str, local: str, 
                    endereco: str = "", telefone: str = "", contato: str = "", 
                    observacao: str = "", status: str = "⏳ Agendado", 
-                   link: str = "", cor: str = "#FF69B4") -> Optional[List[Dict[str, Any]]]:
+                   link: str = "", cor: str = "#FF69B4", rrule: str = "") -> Optional[List[Dict[str, Any]]]:
     """
     Adiciona novo agendamento
     
@@ -580,6 +976,7 @@ def add_agendamento(data: str, hora: str, categoria: str, local: str,
         status: Status do agendamento
         link: Link para Google Maps ou site
         cor: Cor para exibir no calendário
+        rrule: Regra de repetição canônica (normalizar_rrule); vazia para visita única
         
     Returns:
         Dados do agendamento criado ou None em caso de erro
@@ -602,10 +999,13 @@ def add_agendamento(data: str, hora: str, categoria: str, local: str,
             "observacao": observacao,
             "status": status,
             "link": link,
-            "cor": cor
+            "cor": cor,
+            "rrule": rrule or None
         }
         response = supabase.table("agendamentos").insert(agend_data).execute()
         get_all_agendamentos.clear()  # Limpa o cache
+        get_agendamentos_filtrados.clear()
+        _nova_versao('agendamentos')
         
         if response.data:
             return response.data
@@ -635,6 +1035,8 @@ def update_agendamento(id: int, data: Dict[str, Any]) -> Optional[List[Dict[str,
         supabase = init_supabase()
         response = supabase.table("agendamentos").update(data).eq("id", id).execute()
         get_all_agendamentos.clear()  # Limpa o cache
+        get_agendamentos_filtrados.clear()
+        _nova_versao('agendamentos')
         return response.data
     except Exception as e:
         st.error(f"❌ Erro ao atualizar agendamento: {e}")
@@ -643,7 +1045,10 @@ def update_agendamento(id: int, data: Dict[str, Any]) -> Optional[List[Dict[str,
 
 def delete_agendamento(id: int) -> bool:
     """
-    Deleta agendamento
+    Deleta agendamento (exclusão lógica)
+    
+    O registro é mantido com deleted_at preenchido para que o feed publique
+    o cancelamento (STATUS:CANCELLED) aos calendários que já têm o evento.
     
     Args:
         id: ID do agendamento
@@ -653,8 +1058,11 @@ def delete_agendamento(id: int) -> bool:
     """
     try:
         supabase = init_supabase()
-        supabase.table("agendamentos").delete().eq("id", id).execute()
+        agora = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S')
+        supabase.table("agendamentos").update({"deleted_at": agora}).eq("id", id).execute()
         get_all_agendamentos.clear()  # Limpa o cache
+        get_agendamentos_filtrados.clear()
+        _nova_versao('agendamentos')
         return True
     except Exception as e:
         st.error(f"❌ Erro ao deletar agendamento: {e}")